@@ -1,19 +1,56 @@
 """The Smartbox integration."""
 
-from dataclasses import dataclass
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
 import logging
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.hass_dict import HassKey
 from smartbox import AsyncSmartboxSession
 from smartbox.error import APIUnavailableError, InvalidAuthError, SmartboxError
 
-from .const import CONF_API_NAME
+from .backfill import HistoryBackfill
+from .const import (
+    CONF_API_BUDGET,
+    CONF_API_BURST,
+    CONF_API_NAME,
+    CONF_API_RATE_LIMIT,
+    CONF_RETRY_WRITES,
+    CONF_STATISTICS_REPAIR,
+    DEFAULT_API_BUDGET,
+    DEFAULT_API_BURST,
+    DEFAULT_API_RATE_LIMIT,
+    DOMAIN,
+)
 from .models import SmartboxDevice, SmartboxNode, get_devices
+from .retry import retry_policies
+from .rollups import ConsumptionRollups
+from .scheduler import ApiPriority, RequestBudgets, RequestScheduler, api_priority
+from .services import async_setup_services, repair_statistics
+from .session import SmartboxApiSession
+from .statistics import (
+    REPAIR_DAYS,
+    REPAIR_HOUR,
+    REPAIR_MINUTE,
+    StatisticsCoordinator,
+    StatisticsState,
+)
+from .websocket import async_setup_websocket
 
 __version__ = "2.1.2"
 
@@ -27,6 +64,11 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Request budgets of the resellers, shared by all the config entries
+DATA_BUDGETS: HassKey[RequestBudgets] = HassKey(DOMAIN)
+
 type SmartboxConfigEntry = ConfigEntry[SmartboxData]
 
 
@@ -34,9 +76,30 @@ type SmartboxConfigEntry = ConfigEntry[SmartboxData]
 class SmartboxData:
     """Runtime data for the Smartbox class."""
 
-    client: AsyncSmartboxSession
+    client: SmartboxApiSession
     devices: list[SmartboxDevice]
     nodes: list[SmartboxNode]
+    statistics_state: StatisticsState
+    statistics_coordinator: StatisticsCoordinator
+    backfill: HistoryBackfill
+    rollups: ConsumptionRollups
+    # Node and extra option of the boost number entities, by entity_id
+    boost_entities: dict[str, tuple[SmartboxNode, str]] = field(default_factory=dict)
+    # Node of the climate entities, by entity_id
+    climate_entities: dict[str, SmartboxNode] = field(default_factory=dict)
+    # Node of the total consumption sensors, by entity_id
+    consumption_entities: dict[str, SmartboxNode] = field(default_factory=dict)
+    # Statistics repair of the energy sensors, by entity_id
+    statistics_repairs: dict[str, Callable[[int], Awaitable[dict[str, int]]]] = field(
+        default_factory=dict
+    )
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    """Set up the Smartbox integration."""
+    async_setup_services(hass)
+    async_setup_websocket(hass)
+    return True
 
 
 async def create_smartbox_session_from_entry(
@@ -72,17 +135,44 @@ async def create_smartbox_session_from_entry(
 async def async_setup_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) -> bool:
     """Set up Smartbox from a config entry."""
     try:
-        entry.runtime_data = SmartboxData(
-            client=(await create_smartbox_session_from_entry(hass, entry)),
-            devices=[],
-            nodes=[],
-        )
+        session = await create_smartbox_session_from_entry(hass, entry)
     except InvalidAuthError as ex:
         raise ConfigEntryAuthFailed from ex
     except (SmartboxError, APIUnavailableError) as ex:
         raise ConfigEntryNotReady from ex
-
-    devices = await get_devices(session=entry.runtime_data.client, hass=hass)
+    statistics_state = StatisticsState(hass, entry.entry_id)
+    await statistics_state.async_load()
+    rollups = ConsumptionRollups(hass, entry.entry_id)
+    await rollups.async_load()
+    scheduler = RequestScheduler(
+        rate=entry.options.get(CONF_API_RATE_LIMIT, DEFAULT_API_RATE_LIMIT),
+        burst=entry.options.get(CONF_API_BURST, DEFAULT_API_BURST),
+    )
+    budgets = hass.data.setdefault(DATA_BUDGETS, RequestBudgets())
+    budget = budgets.share(
+        entry.data[CONF_API_NAME],
+        entry.entry_id,
+        entry.options.get(CONF_API_BUDGET, DEFAULT_API_BUDGET),
+    )
+    entry.async_on_unload(partial(budgets.release, entry.entry_id))
+    entry.runtime_data = SmartboxData(
+        client=SmartboxApiSession(
+            session,
+            scheduler,
+            retry_policies(entry.options.get(CONF_RETRY_WRITES, False)),
+            budget,
+        ),
+        devices=[],
+        nodes=[],
+        statistics_state=statistics_state,
+        statistics_coordinator=StatisticsCoordinator(hass),
+        backfill=HistoryBackfill(hass, statistics_state),
+        rollups=rollups,
+    )
+    entry.async_on_unload(entry.runtime_data.statistics_coordinator.async_shutdown)
+
+    with api_priority(ApiPriority.RESYNC):
+        devices = await get_devices(session=entry.runtime_data.client, hass=hass)
     for device in devices:
         _LOGGER.info("Setting up configured device %s", device.dev_id)
         entry.runtime_data.devices.append(device)
@@ -92,6 +182,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) ->
         entry.runtime_data.nodes.extend(nodes)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if entry.options.get(CONF_STATISTICS_REPAIR, False):
+
+        async def _async_repair_statistics(_now: datetime) -> None:
+            await repair_statistics(
+                dict(entry.runtime_data.statistics_repairs), REPAIR_DAYS
+            )
+
+        entry.async_on_unload(
+            async_track_time_change(
+                hass,
+                _async_repair_statistics,
+                hour=REPAIR_HOUR,
+                minute=REPAIR_MINUTE,
+                second=0,
+            )
+        )
+
+    @callback
+    def _async_stop(_: Event) -> None:
+        for node in entry.runtime_data.nodes:
+            node.cancel_pending_writes()
+        # the recorder still runs until the final write
+        entry.runtime_data.statistics_coordinator.async_flush()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
+    )
     entry.async_on_unload(entry.add_update_listener(update_listener))
     return True
 
@@ -100,9 +217,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) ->
     """Unload a config entry."""
     for device in entry.runtime_data.devices:
         await device.update_manager.cancel()
+        await device.command_queue.cancel()
+        device.poller.async_shutdown()
+    for node in entry.runtime_data.nodes:
+        node.cancel_pending_writes()
+    entry.runtime_data.client.scheduler.cancel()
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) -> None:
+    """Remove the data stored for a config entry."""
+    await StatisticsState(hass, entry.entry_id).async_remove()
+    await ConsumptionRollups(hass, entry.entry_id).async_remove()
+
+
 async def update_listener(hass: HomeAssistant, entry: SmartboxConfigEntry) -> None:
     """Reload entity from config entry."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,107 @@
+"""Consumption history backfill of the Smartbox nodes."""
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .models import SmartboxNode
+from .scheduler import ApiPriority, api_priority
+from .statistics import Sample, StatisticsState
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_YEARS = 3
+# History chunks downloaded at the same time, for all the nodes of an entry
+BACKFILL_CONCURRENCY = 4
+
+
+def history_chunks(now: datetime) -> list[tuple[int, int]]:
+    """Split the history to backfill into monthly (start, end) timestamps."""
+    start = now - timedelta(days=365 * BACKFILL_YEARS)
+    chunks = []
+    while start < now:
+        month_start = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = min(now, (month_start + timedelta(days=32)).replace(day=1))
+        chunks.append((int(start.timestamp()), int(end.timestamp())))
+        start = end
+    return chunks
+
+
+class HistoryBackfill:
+    """Download the consumption history of the nodes of a config entry.
+
+    The history is split into monthly chunks, downloaded a few at a time
+    with the backfill priority and imported as they arrive. The imported
+    chunks are recorded in the statistics state so that an interrupted
+    backfill resumes where it stopped.
+    """
+
+    def __init__(self, hass: HomeAssistant, statistics_state: StatisticsState) -> None:
+        """Initialise the backfill."""
+        self._hass = hass
+        self._statistics_state = statistics_state
+        self._semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        self._running: set[str] = set()
+
+    async def async_backfill(
+        self,
+        node: SmartboxNode,
+        import_samples: Callable[[list[Sample]], None],
+    ) -> None:
+        """Download and import the history of a node not imported yet."""
+        if node.node_id in self._running:
+            return
+        self._running.add(node.node_id)
+        try:
+            chunks = self._statistics_state.backfill_chunks(
+                node.node_id, history_chunks(dt_util.utcnow())
+            )
+            _LOGGER.debug(
+                "Backfilling %d history chunks of node %s", len(chunks), node.name
+            )
+            results = await asyncio.gather(
+                *(
+                    self._async_backfill_chunk(node, chunk, import_samples)
+                    for chunk in chunks
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            self._running.discard(node.node_id)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _async_backfill_chunk(
+        self,
+        node: SmartboxNode,
+        chunk: tuple[int, int],
+        import_samples: Callable[[list[Sample]], None],
+    ) -> None:
+        async with self._semaphore:
+            with api_priority(ApiPriority.BACKFILL):
+                samples = await node.get_samples(*chunk)
+        import_samples(samples)
+        self._statistics_state.set_backfill_done(node.node_id, chunk)
+        async_dispatcher_send(self._hass, f"{DOMAIN}_{node.device.dev_id}_backfill")
+
+    def progress(self, nodes: list[SmartboxNode]) -> int:
+        """Return the percentage of the history of nodes imported."""
+        done, total = self._statistics_state.backfill_progress(
+            [node.node_id for node in nodes]
+        )
+        if not total:
+            return 100
+        return round(100 * done / total)
+
+    def complete(self, nodes: list[SmartboxNode]) -> bool:
+        """Return whether the history of all the nodes has been imported."""
+        return self._statistics_state.backfill_complete(
+            [node.node_id for node in nodes]
+        )
@@ -1,5 +1,6 @@
 """Support for Smartbox climate entities."""
 
+from functools import cached_property
 import logging
 from typing import Any
 from unittest.mock import MagicMock
@@ -32,14 +33,11 @@ from .const import (
 from .entity import SmartBoxNodeEntity
 from .models import (
     SmartboxNode,
-    _check_status_key,
-    get_hvac_mode,
-    get_target_temperature,
-    get_temperature_unit,
     set_hvac_mode_args,
     set_preset_mode_status_update,
     set_temperature_args,
 )
+from .node_status import AccumulatorStatus, HeaterModStatus, HeaterStatus
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -63,6 +61,140 @@ async def async_setup_entry(
     _LOGGER.debug("Finished setting up Smartbox climate platform")
 
 
+class DerivedStatus:
+    """Values of a heater derived from a version of its status, computed once.
+
+    Home Assistant reads them on each state write and attribute read, so they
+    are only derived again from the parsed status of the node once the status,
+    setup or away status change.
+    """
+
+    def __init__(self, node: SmartboxNode | MagicMock) -> None:
+        """Initialise for the current status version of the node."""
+        self.node = node
+        status = node.parsed_status
+        # only the heaters have a climate entity
+        self.status = status if isinstance(status, HeaterStatus) else HeaterStatus()
+        self.version: int = node.status_version
+
+    def _required[T](self, key: str, value: T | None) -> T:
+        """Return a value of the status, which must be present."""
+        if value is None:
+            msg = (
+                f"'{key}' not found in {self.node.node_type} - please report to"
+                f" {GITHUB_ISSUES_URL}. status: {self.status}"
+            )
+            raise KeyError(msg)
+        return value
+
+    @cached_property
+    def temperature_unit(self) -> str:
+        """Return the unit of the temperatures."""
+        if self.status.units is None or self.status.units == "C":
+            return UnitOfTemperature.CELSIUS
+        if self.status.units == "F":
+            return UnitOfTemperature.FAHRENHEIT
+        msg = f"Unknown temp unit {self.status.units}"
+        raise ValueError(msg)
+
+    @cached_property
+    def current_temperature(self) -> float | None:
+        """Return the current temperature."""
+        return self.status.mtemp
+
+    @cached_property
+    def target_temperature(self) -> float:
+        """Return the target temperature."""
+        status = self.status
+        if isinstance(status, HeaterModStatus):
+            selected_temp = self._required("selected_temp", status.selected_temp)
+            if selected_temp == "comfort":
+                return self._required("comfort_temp", status.comfort_temp)
+            if selected_temp == "eco":
+                return self._required(
+                    "comfort_temp", status.comfort_temp
+                ) - self._required("eco_offset", status.eco_offset)
+            if selected_temp == "ice":
+                return self._required("ice_temp", status.ice_temp)
+            if selected_temp == "off":
+                return 0.0
+            msg = (
+                f"'Unexpected 'selected_temp' value {selected_temp}"
+                f" found for {self.node.node_type} - please report to"
+                f" {GITHUB_ISSUES_URL}. status: {status}"
+            )
+            raise KeyError(msg)
+        return self._required("stemp", status.stemp)
+
+    @cached_property
+    def _off(self) -> bool:
+        """Return whether the heater is switched off."""
+        return self.status.mode == "off" or (
+            isinstance(self.status, HeaterModStatus) and not self.status.on
+        )
+
+    @cached_property
+    def hvac_mode(self) -> HVACMode | None:
+        """Return the hvac mode."""
+        if self.status.boost:
+            return HVACMode.HEAT
+        mode = self._required("mode", self.status.mode)
+        if self._off:
+            return HVACMode.OFF
+        if mode == "manual":
+            return HVACMode.HEAT
+        # modified_auto occurs when the temperature is modified in auto mode
+        if mode in ("auto", "modified_auto", "self_learn", "presence"):
+            return HVACMode.AUTO
+        msg = f"Unknown smartbox node mode {mode}"
+        _LOGGER.error(msg)
+        raise ValueError(msg)
+
+    @cached_property
+    def hvac_action(self) -> HVACAction:
+        """Return the current operation, heating, idle or off."""
+        status = self.status
+        if status.charging if isinstance(status, AccumulatorStatus) else status.active:
+            return HVACAction.HEATING
+        if self._off and not self.node.boost:
+            return HVACAction.OFF
+        return HVACAction.IDLE
+
+    @cached_property
+    def preset_mode(self) -> str:  # noqa: PLR0911
+        """Return the preset mode."""
+        if self.node.away:
+            return PRESET_AWAY
+        if self.node.boost:
+            return PRESET_BOOST
+        if isinstance(self.status, HeaterModStatus):
+            mode = self._required("mode", self.status.mode)
+            if mode == "auto":
+                return PRESET_SCHEDULE
+            if mode == "presence":
+                return PRESET_ACTIVITY
+            if mode == "self_learn":
+                return PRESET_SELF_LEARN
+            if mode == "manual":
+                selected_temp = self._required(
+                    "selected_temp", self.status.selected_temp
+                )
+                if selected_temp == "comfort":
+                    return PRESET_COMFORT
+                if selected_temp == "eco":
+                    return PRESET_ECO
+                if selected_temp == "ice":
+                    return PRESET_FROST
+                msg = (
+                    f"'Unexpected 'selected_temp' value {selected_temp} found for "
+                    f"{self.node.node_type} and {mode} - please report to {GITHUB_ISSUES_URL}."
+                )
+                raise ValueError(msg)
+            msg = f"Unknown smartbox node mode {mode}"
+            raise ValueError(msg)
+        return PRESET_HOME
+
+
 class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
     """Smartbox heater climate control."""
 
@@ -81,8 +213,24 @@ class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
         _LOGGER.debug("Setting up Smartbox climate platerqgsdform")
         super().__init__(node=node, entry=entry)
         self._status: dict[str, Any] = {}
+        self._derived_status: DerivedStatus | None = None
         _LOGGER.debug("Created node unique_id=%s", self.unique_id)
 
+    @property
+    def _derived(self) -> DerivedStatus:
+        """Return the values derived from the current status."""
+        derived = self._derived_status
+        if derived is None or derived.version != self._node.status_version:
+            derived = self._derived_status = DerivedStatus(self._node)
+        return derived
+
+    async def async_added_to_hass(self) -> None:
+        """Add the entity to the index used by the bulk_apply service."""
+        await super().async_added_to_hass()
+        climate_entities = self._entry.runtime_data.climate_entities
+        climate_entities[self.entity_id] = self._node
+        self.async_on_remove(lambda: climate_entities.pop(self.entity_id, None))
+
     async def async_turn_off(self) -> None:
         """Turn off hvac."""
         await self.async_set_hvac_mode(HVACMode.OFF)
@@ -94,20 +242,17 @@ class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
     @property
     def temperature_unit(self) -> str:
         """Return the unit of measurement."""
-        unit = get_temperature_unit(self._status)
-        if unit is not None:
-            return unit
-        return UnitOfTemperature.CELSIUS
+        return self._derived.temperature_unit
 
     @property
-    def current_temperature(self) -> float:
+    def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        return float(self._status["mtemp"])
+        return self._derived.current_temperature
 
     @property
     def target_temperature(self) -> float:
         """Return the target temperature."""
-        return get_target_temperature(self._node.node_type, self._status)
+        return self._derived.target_temperature
 
     async def async_set_temperature(self, **kwargs: Any) -> None:  # noqa: ANN401
         """Set new target temperature."""
@@ -119,22 +264,12 @@ class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
     @property
     def hvac_action(self) -> HVACAction | None:
         """Return current operation ie. heat or idle."""
-        if self._node.is_heating(self._status):
-            return HVACAction.HEATING
-        if (
-            self._node.status["mode"] == "off"
-            or (
-                self._node.node_type == SmartboxNodeType.HTR_MOD
-                and not self._node.status["on"]
-            )
-        ) and not self._node.boost:
-            return HVACAction.OFF
-        return HVACAction.IDLE
+        return self._derived.hvac_action
 
     @property
     def hvac_mode(self) -> HVACMode | None:
         """Return hvac target hvac state."""
-        return get_hvac_mode(self._node.node_type, self._status)
+        return self._derived.hvac_mode
 
     @property
     def hvac_modes(self) -> list[HVACMode]:
@@ -150,38 +285,9 @@ class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
         await self._node.set_status(**status_args)
 
     @property
-    def preset_mode(self) -> str:  # noqa: PLR0911
+    def preset_mode(self) -> str:
         """Get preset mode."""
-        if self._node.away:
-            return PRESET_AWAY
-        if self._node.boost:
-            return PRESET_BOOST
-        if self._node.node_type == SmartboxNodeType.HTR_MOD:
-            _check_status_key("mode", self._node.node_type, self._status)
-            mode = self._status["mode"]
-            if mode == "auto":
-                return PRESET_SCHEDULE
-            if mode == "presence":
-                return PRESET_ACTIVITY
-            if mode == "self_learn":
-                return PRESET_SELF_LEARN
-            if mode == "manual":
-                _check_status_key("selected_temp", self._node.node_type, self._status)
-                selected_temp = self._status["selected_temp"]
-                if selected_temp == "comfort":
-                    return PRESET_COMFORT
-                if selected_temp == "eco":
-                    return PRESET_ECO
-                if selected_temp == "ice":
-                    return PRESET_FROST
-                msg = (
-                    f"'Unexpected 'selected_temp' value {'selected_temp'} found for "
-                    f"{self._node.node_type} and {mode} - please report to {GITHUB_ISSUES_URL}."
-                )
-                raise ValueError(msg)
-            msg = f"Unknown smartbox node mode {mode}"
-            raise ValueError(msg)
-        return PRESET_HOME
+        return self._derived.preset_mode
 
     @property
     def preset_modes(self) -> list[str]:
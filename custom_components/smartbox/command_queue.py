@@ -0,0 +1,96 @@
+"""Serialised command queue for Smartbox devices."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from functools import partial
+import logging
+import time
+from typing import Any
+
+from .metrics import DurationStats
+
+_LOGGER = logging.getLogger(__name__)
+
+type _QueuedCommand = tuple[Callable[[], Awaitable[Any]], asyncio.Future, float]
+
+
+class CommandQueue:
+    """Run the commands sent to a device one at a time, in submission order.
+
+    A single worker task is started when the first command is queued and stops
+    once the queue is empty, so each device gets its own ordering without any
+    lock shared between devices.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialise the command queue."""
+        self._name = name
+        self._queue: deque[_QueuedCommand] = deque()
+        self._worker: asyncio.Task | None = None
+        self.wait_time = DurationStats()
+        self.processed: int = 0
+
+    def __len__(self) -> int:
+        """Return the number of commands waiting to run."""
+        return len(self._queue)
+
+    async def run[R](
+        self,
+        command: Callable[..., Awaitable[R]],
+        *args: Any,  # noqa: ANN401
+    ) -> R:
+        """Queue a command and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._queue.append((partial(command, *args), future, time.monotonic()))
+        if self._worker is None:
+            self._worker = loop.create_task(
+                self._process(), name=f"Smartbox command queue {self._name}"
+            )
+        return await future
+
+    async def _process(self) -> None:
+        """Run the queued commands until the queue is empty."""
+        try:
+            while self._queue:
+                command, future, queued_at = self._queue.popleft()
+                if future.done():
+                    # The caller gave up waiting
+                    continue
+                self.wait_time.record(time.monotonic() - queued_at)
+                try:
+                    result = await command()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as ex:  # noqa: BLE001
+                    if not future.done():
+                        future.set_exception(ex)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                finally:
+                    self.processed += 1
+        finally:
+            self._worker = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue metrics as a dict."""
+        return {
+            "length": len(self._queue),
+            "processed": self.processed,
+            "wait_time": self.wait_time.as_dict(),
+        }
+
+    async def cancel(self) -> None:
+        """Cancel the running and queued commands."""
+        while self._queue:
+            _, future, _ = self._queue.popleft()
+            future.cancel()
+        if self._worker is not None:
+            _LOGGER.debug("Cancelling command queue %s", self._name)
+            self._worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._worker
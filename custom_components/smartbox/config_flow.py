@@ -28,11 +28,25 @@ from . import (
     create_smartbox_session_from_entry,
 )
 from .const import (
+    CONF_ADAPTIVE_POWER,
+    CONF_API_BUDGET,
+    CONF_API_BURST,
     CONF_API_NAME,
+    CONF_API_RATE_LIMIT,
+    CONF_AVERAGE_POWER_DUTY,
     CONF_DISPLAY_ENTITY_PICTURES,
     CONF_HISTORY_CONSUMPTION,
+    CONF_RETRY_WRITES,
+    CONF_STATISTICS_REPAIR,
     CONF_TIMEDELTA_POWER,
+    CONF_TIMEDELTA_POWER_MAX,
+    CONF_TIMEDELTA_POWER_MIN,
+    DEFAULT_API_BUDGET,
+    DEFAULT_API_BURST,
+    DEFAULT_API_RATE_LIMIT,
     DEFAULT_TIMEDELTA_POWER,
+    DEFAULT_TIMEDELTA_POWER_MAX,
+    DEFAULT_TIMEDELTA_POWER_MIN,
     DOMAIN,
     HistoryConsumptionStatus,
 )
@@ -61,6 +75,25 @@ OPTIONS_DATA_SCHEMA = {
     vol.Required(
         CONF_TIMEDELTA_POWER, default=DEFAULT_TIMEDELTA_POWER
     ): cv.positive_int,
+    vol.Required(CONF_ADAPTIVE_POWER, default=False): BooleanSelector(),
+    vol.Required(
+        CONF_TIMEDELTA_POWER_MIN, default=DEFAULT_TIMEDELTA_POWER_MIN
+    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Required(
+        CONF_TIMEDELTA_POWER_MAX, default=DEFAULT_TIMEDELTA_POWER_MAX
+    ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Required(CONF_API_RATE_LIMIT, default=DEFAULT_API_RATE_LIMIT): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Required(CONF_API_BURST, default=DEFAULT_API_BURST): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Required(CONF_API_BUDGET, default=DEFAULT_API_BUDGET): vol.All(
+        vol.Coerce(int), vol.Range(min=1)
+    ),
+    vol.Required(CONF_RETRY_WRITES, default=False): BooleanSelector(),
+    vol.Required(CONF_AVERAGE_POWER_DUTY, default=False): BooleanSelector(),
+    vol.Required(CONF_STATISTICS_REPAIR, default=False): BooleanSelector(),
 }
 
 
@@ -189,12 +222,19 @@ class OptionsFlowHandler(OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Manage the options."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            return self.async_create_entry(title=None, data=user_input)
+            if user_input.get(
+                CONF_TIMEDELTA_POWER_MIN, DEFAULT_TIMEDELTA_POWER_MIN
+            ) > user_input.get(CONF_TIMEDELTA_POWER_MAX, DEFAULT_TIMEDELTA_POWER_MAX):
+                errors[CONF_TIMEDELTA_POWER_MIN] = "power_interval_range"
+            else:
+                return self.async_create_entry(title=None, data=user_input)
 
         return self.async_show_form(
             step_id="options",
             data_schema=self.add_suggested_values_to_schema(
-                vol.Schema(OPTIONS_DATA_SCHEMA), self.config_entry_options
+                vol.Schema(OPTIONS_DATA_SCHEMA), user_input or self.config_entry_options
             ),
+            errors=errors,
         )
@@ -6,15 +6,47 @@ from smartbox import SmartboxNodeType
 
 DOMAIN = "smartbox"
 
+ATTR_DAYS = "days"
 ATTR_DURATION = "duration"
+ATTR_END = "end"
+ATTR_FILENAME = "filename"
+ATTR_FORMAT = "format"
+ATTR_OVERWRITE = "overwrite"
+ATTR_START = "start"
+ATTR_SETUP = "setup"
+ATTR_STATUS = "status"
+SERVICE_BULK_APPLY = "bulk_apply"
+SERVICE_EXPORT_CONSUMPTION = "export_consumption"
+SERVICE_REPAIR_STATISTICS = "repair_statistics"
 SERVICE_SET_BOOST_PARAMS = "set_boost_params"
 CONF_API_NAME = "api_name"
 CONF_DISPLAY_ENTITY_PICTURES = "reseller_entity"
 CONF_TIMEDELTA_POWER = "timedelta_update_power"
+CONF_API_RATE_LIMIT = "api_rate_limit"
+CONF_API_BURST = "api_burst"
+CONF_API_BUDGET = "api_budget"
+CONF_RETRY_WRITES = "retry_writes"
+CONF_AVERAGE_POWER_DUTY = "average_power_duty"
+CONF_STATISTICS_REPAIR = "statistics_repair"
+CONF_ADAPTIVE_POWER = "adaptive_power"
+CONF_TIMEDELTA_POWER_MIN = "timedelta_update_power_min"
+CONF_TIMEDELTA_POWER_MAX = "timedelta_update_power_max"
 
 DEFAULT_TIMEDELTA_POWER = 60
+# Bounds of the power update interval, in seconds, when it adapts to the load
+DEFAULT_TIMEDELTA_POWER_MIN = 15
+DEFAULT_TIMEDELTA_POWER_MAX = 480
+# Requests per minute, and requests that can be sent at once, to the API
+DEFAULT_API_RATE_LIMIT = 180
+DEFAULT_API_BURST = 60
+# Requests per minute to the API of a reseller, by all the entries of the reseller
+DEFAULT_API_BUDGET = 300
 DEFAULT_BOOST_TIME = 60
 DEFAULT_BOOST_TEMP = 21.0
+# Seconds to wait for the socket to confirm a status write before rolling it back
+WRITE_CONFIRMATION_TIMEOUT = 30
+# Directory of the consumption exports, in the configuration directory
+EXPORT_DIRECTORY = "smartbox_exports"
 GITHUB_ISSUES_URL = "https://github.com/ajtudela/hass-smartbox/issues"
 
 HEATER_NODE_TYPES = [
@@ -19,12 +19,42 @@ async def async_get_config_entry_diagnostics(
     diagnostics_data: dict[str, Any] = {
         "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
         "runtime_data": {
-            "client": {"expiry_time": config_entry.runtime_data.client.expiry_time},
+            "client": {
+                "expiry_time": config_entry.runtime_data.client.expiry_time,
+                "scheduler": config_entry.runtime_data.client.scheduler.as_dict(),
+                "budget": config_entry.runtime_data.client.budget.budget.as_dict(),
+                "retries": {
+                    name: stats.as_dict()
+                    for name, stats in config_entry.runtime_data.client.retry_stats.items()
+                },
+            },
             "nodes": [
-                {"info": e.node_info, "setup": e.setup, "status": e.status}
+                {
+                    "info": e.node_info,
+                    "setup": e.setup,
+                    "status": e.status,
+                    "writes": {
+                        "pending": len(e.pending_writes),
+                        "failures": e.write_failures,
+                        "timeouts": e.write_timeouts,
+                        "confirmation_latency": e.write_confirmation_latency.as_dict(),
+                    },
+                    "sample_cache": e.sample_cache.as_dict(),
+                }
                 for e in config_entry.runtime_data.nodes
             ],
             "devices": [d.device for d in config_entry.runtime_data.devices],
+            "statistics": config_entry.runtime_data.statistics_state.as_dict(),
+            "statistics_import": (
+                config_entry.runtime_data.statistics_coordinator.as_dict()
+            ),
+            "command_queues": {
+                d.dev_id: d.command_queue.as_dict()
+                for d in config_entry.runtime_data.devices
+            },
+            "pollers": {
+                d.dev_id: d.poller.as_dict() for d in config_entry.runtime_data.devices
+            },
         },
     }
     diagnostics_data["hass_devices"] = [
@@ -0,0 +1,67 @@
+"""Energy totals of groups of Smartbox nodes."""
+
+from .const import SmartboxNodeType
+from .models import SmartboxNode
+from .statistics import Sample
+
+
+def consumption_nodes(nodes: list[SmartboxNode]) -> list[SmartboxNode]:
+    """Return the nodes adding up to the consumption of a group.
+
+    The counter of a power monitor measures the heaters of its device, which
+    are already counted, so it is left out of the totals.
+    """
+    return [node for node in nodes if node.node_type != SmartboxNodeType.PMO]
+
+
+class EnergyTotal:
+    """Running sum of the energy counters of a group of nodes.
+
+    The counter of each node is kept, so that a node update only adds its
+    difference to the total instead of summing all the nodes again.
+    """
+
+    def __init__(self, nodes: list[SmartboxNode]) -> None:
+        """Initialise the total from the current counters of the nodes."""
+        self.nodes = nodes
+        self._counters: dict[str, float] = {}
+        self._total = 0.0
+        for node in nodes:
+            self.update(node)
+
+    def update(self, node: SmartboxNode) -> bool:
+        """Take the current counter of a node into account, return if it changed."""
+        if (counter := node.total_energy) is None:
+            return False
+        counter = float(counter)
+        previous = self._counters.get(node.node_id)
+        if previous == counter:
+            return False
+        self._counters[node.node_id] = counter
+        self._total += counter - (previous or 0.0)
+        return True
+
+    @property
+    def total(self) -> float | None:
+        """Return the total of the nodes whose counter is known, if any is."""
+        if not self._counters:
+            return None
+        return self._total
+
+
+def sum_samples(samples_by_node: list[list[Sample]]) -> list[Sample]:
+    """Sum the counters of the timestamps sampled for all the nodes.
+
+    The nodes without any sample are left out, so that a node which never
+    reports does not hold back the total of the others.
+    """
+    totals: dict[int, float] = {}
+    for index, samples in enumerate(filter(None, samples_by_node)):
+        counters = {int(sample["t"]): float(sample["counter"]) for sample in samples}
+        if index == 0:
+            totals = counters
+        else:
+            totals = {
+                t: total + counters[t] for t, total in totals.items() if t in counters
+            }
+    return [{"t": t, "counter": total} for t, total in sorted(totals.items())]
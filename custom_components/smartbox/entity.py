@@ -22,6 +22,7 @@ class DefaultSmartBoxEntity(Entity):
 
     def __init__(self, entry: SmartboxConfigEntry) -> None:
         """Initialize the default Device Entity."""
+        self._entry = entry
         self._device_id = self._node.node_id
         self._status: dict[str, Any] = {}
         self._available = False
@@ -0,0 +1,232 @@
+"""Export of the hourly consumption of the Smartbox nodes to a file."""
+
+import asyncio
+from collections import deque
+import csv
+from datetime import UTC, datetime
+from enum import StrEnum
+from functools import partial
+from itertools import islice
+import logging
+from pathlib import Path
+import time
+from typing import Any, Protocol
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import EXPORT_DIRECTORY
+from .models import SmartboxNode
+from .scheduler import ApiPriority, api_priority
+from .statistics import HOUR, Sample
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds of samples fetched by each request
+EXPORT_CHUNK = 7 * 24 * HOUR
+# Chunks fetched at the same time, which bounds the samples held in memory
+EXPORT_CONCURRENCY = 4
+EXPORT_COLUMNS = ("node_id", "node", "start", "end", "energy", "counter")
+
+type Row = tuple[str, str, datetime, datetime, float | None, float]
+
+
+class ExportFormat(StrEnum):
+    """File format of a consumption export."""
+
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+def export_chunks(start_time: int, end_time: int) -> list[tuple[int, int]]:
+    """Split a period into (start, end) timestamps fetched by one request each."""
+    return [
+        (start, min(start + EXPORT_CHUNK - 1, end_time))
+        for start in range(start_time, end_time + 1, EXPORT_CHUNK)
+    ]
+
+
+def consumption_rows(
+    node: SmartboxNode, samples: list[Sample], previous: tuple[int, float] | None
+) -> tuple[list[Row], tuple[int, float] | None]:
+    """Return the hourly consumption rows of samples, and the last hourly sample.
+
+    A sample holds the counter at the end of the hour before it, and the
+    consumption is its difference with the sample of the hour before, so the
+    last sample of a chunk is carried over to the next one.
+    """
+    rows: list[Row] = []
+    for sample in sorted(samples, key=lambda s: int(s["t"])):
+        if (t := int(sample["t"])) % HOUR:
+            continue
+        counter = float(sample["counter"])
+        if previous is not None and previous[0] < t:
+            energy = counter - previous[1] if previous[0] == t - HOUR else None
+            rows.append(
+                (
+                    node.node_id,
+                    node.name,
+                    datetime.fromtimestamp(t - HOUR, UTC),
+                    datetime.fromtimestamp(t, UTC),
+                    energy,
+                    counter,
+                )
+            )
+        previous = (t, counter)
+    return rows, previous
+
+
+class _Writer(Protocol):
+    def write(self, rows: list[Row]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class _CsvWriter:
+    """Write the rows to a CSV file, as they come."""
+
+    def __init__(self, path: Path) -> None:
+        self._file = path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows: list[Row]) -> None:
+        self._writer.writerows(
+            (node_id, name, start.isoformat(), end.isoformat(), energy, counter)
+            for node_id, name, start, end, energy, counter in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Write the rows to a Parquet file, one row group per chunk."""
+
+    def __init__(self, path: Path) -> None:
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("node_id", pa.string()),
+                ("node", pa.string()),
+                ("start", pa.timestamp("s", tz="UTC")),
+                ("end", pa.timestamp("s", tz="UTC")),
+                ("energy", pa.float64()),
+                ("counter", pa.float64()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows: list[Row]) -> None:
+        if rows:
+            columns = [list(column) for column in zip(*rows, strict=True)]
+            self._writer.write_table(
+                self._pa.Table.from_arrays(columns, schema=self._schema)
+            )
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _open_writer(path: Path, file_format: ExportFormat) -> _Writer:
+    if file_format == ExportFormat.PARQUET:
+        return _ParquetWriter(path)
+    return _CsvWriter(path)
+
+
+def export_path(hass: HomeAssistant, filename: str, *, overwrite: bool) -> Path:
+    """Return the path of a new export file, in the exports directory.
+
+    A relative name is in the exports directory of the configuration, an
+    absolute one must be in a directory allowed by allowlist_external_dirs.
+    This does blocking I/O, run it in the executor.
+    """
+    export_dir = Path(hass.config.path(EXPORT_DIRECTORY)).resolve()
+    path = (export_dir / filename).resolve()
+    if path.is_relative_to(export_dir) and path != export_dir:
+        export_dir.mkdir(exist_ok=True)
+    elif not hass.config.is_allowed_path(str(path)):
+        msg = (
+            f"The export file {filename} is not in {export_dir} or an allowed"
+            " external directory"
+        )
+        raise HomeAssistantError(msg)
+    if path.is_dir():
+        msg = f"The export file {filename} is a directory"
+        raise HomeAssistantError(msg)
+    if path.exists() and not overwrite:
+        msg = f"The export file {path} already exists, set overwrite to replace it"
+        raise HomeAssistantError(msg)
+    return path
+
+
+async def async_export_consumption(
+    hass: HomeAssistant,
+    nodes: list[SmartboxNode],
+    start_time: int,
+    end_time: int,
+    *,
+    path: Path,
+    file_format: ExportFormat,
+) -> dict[str, Any]:
+    """Write the hourly consumption of nodes between two timestamps to a file.
+
+    The period of each node is fetched in chunks, a few at a time, and each
+    chunk is written in order as soon as it and the ones before are fetched,
+    so only a few chunks of samples are held in memory whatever the period.
+    """
+    started_at = time.monotonic()
+    start_time = start_time // HOUR * HOUR
+    chunks = iter(
+        (node, chunk) for node in nodes for chunk in export_chunks(start_time, end_time)
+    )
+    fetching: deque[tuple[SmartboxNode, asyncio.Task[list[Sample]]]] = deque()
+
+    async def _fetch(node: SmartboxNode, chunk: tuple[int, int]) -> list[Sample]:
+        with api_priority(ApiPriority.BACKFILL):
+            return await node.get_samples(*chunk)
+
+    def _fetch_next() -> None:
+        for node, chunk in islice(chunks, EXPORT_CONCURRENCY - len(fetching)):
+            fetching.append((node, asyncio.create_task(_fetch(node, chunk))))
+
+    # written under a temporary name, so a failed export leaves no partial file
+    part_path = path.with_name(f".{path.name}.part")
+    try:
+        writer = await hass.async_add_executor_job(_open_writer, part_path, file_format)
+    except ImportError as ex:
+        msg = "Exporting to Parquet requires the pyarrow package"
+        raise HomeAssistantError(msg) from ex
+    rows = 0
+    previous: dict[str, tuple[int, float] | None] = {}
+    completed = False
+    try:
+        _fetch_next()
+        while fetching:
+            node, task = fetching.popleft()
+            samples = await task
+            _fetch_next()
+            chunk_rows, previous[node.node_id] = consumption_rows(
+                node, samples, previous.get(node.node_id)
+            )
+            await hass.async_add_executor_job(writer.write, chunk_rows)
+            rows += len(chunk_rows)
+        completed = True
+    finally:
+        for _, task in fetching:
+            task.cancel()
+        # retrieve the errors of the fetches cancelled or failed in the meantime
+        await asyncio.gather(*(task for _, task in fetching), return_exceptions=True)
+        await hass.async_add_executor_job(writer.close)
+        if completed:
+            await hass.async_add_executor_job(part_path.replace, path)
+        else:
+            await hass.async_add_executor_job(
+                partial(part_path.unlink, missing_ok=True)
+            )
+    elapsed = round(time.monotonic() - started_at, 3)
+    _LOGGER.debug("Exported %d rows to %s in %ss", rows, path, elapsed)
+    return {"path": str(path), "rows": rows, "elapsed": elapsed}
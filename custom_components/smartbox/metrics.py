@@ -0,0 +1,39 @@
+"""Runtime metrics for Smartbox."""
+
+from typing import Any
+
+
+class DurationStats:
+    """Running statistics of a duration, in seconds."""
+
+    __slots__ = ("count", "last", "max", "total")
+
+    def __init__(self) -> None:
+        """Initialise empty statistics."""
+        self.count: int = 0
+        self.total: float = 0.0
+        self.last: float | None = None
+        self.max: float = 0.0
+
+    def record(self, duration: float) -> None:
+        """Record a new duration."""
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        self.max = max(self.max, duration)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration."""
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "count": self.count,
+            "last": self.last,
+            "mean": self.mean,
+            "max": self.max,
+        }
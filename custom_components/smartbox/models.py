@@ -1,7 +1,9 @@
 """Models for Smartbox."""
 
 import asyncio
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from functools import partial
 import logging
 import math
 import time
@@ -19,10 +21,12 @@ from homeassistant.components.climate import (
     HVACMode,
 )
 from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from smartbox import AsyncSmartboxSession, SmartboxNodeType, UpdateManager
 
+from .command_queue import CommandQueue
 from .const import (
     DEFAULT_BOOST_TEMP,
     DEFAULT_BOOST_TIME,
@@ -32,8 +36,14 @@ from .const import (
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    WRITE_CONFIRMATION_TIMEOUT,
     BoostConfig,
 )
+from .metrics import DurationStats
+from .node_status import HeaterStatus, NodeSetup, NodeStatus, parse_setup, parse_status
+from .polling import DevicePoller
+from .samples import SampleCache
+from .session import unwrap_session
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -45,6 +55,16 @@ Node = dict[str, Any]
 Device = dict[str, Any]
 
 
+@dataclass(slots=True)
+class PendingWrite:
+    """A status write waiting for the device to confirm it."""
+
+    values: StatusDict
+    previous: StatusDict
+    started_at: float = field(default_factory=time.monotonic)
+    cancel_timeout: CALLBACK_TYPE | None = None
+
+
 class SmartboxDevice:
     """Smartbox device."""
 
@@ -64,9 +84,11 @@ class SmartboxDevice:
         self._hass = hass
         self._connected_status: bool | None = None
         self.update_manager: UpdateManager = UpdateManager(
-            self._session,
+            unwrap_session(self._session),
             self.dev_id,
         )
+        self.command_queue = CommandQueue(self.dev_id)
+        self.poller = DevicePoller(hass, self.dev_id)
 
     @classmethod
     async def initialise_nodes(
@@ -122,6 +144,8 @@ class SmartboxDevice:
         if self._away != away_status["away"]:
             self._away = away_status["away"]
             for node in self._nodes.values():
+                # the presets of the nodes depend on the away status
+                node.status_version += 1
                 async_dispatcher_send(
                     self._hass, f"{DOMAIN}_{node.node_id}_away_status", self._away
                 )
@@ -137,16 +161,21 @@ class SmartboxDevice:
     def _node_status_update(
         self, node_type: str, addr: int, node_status: StatusDict
     ) -> None:
-        if node_type == SmartboxNodeType.PMO:
+        if node_type == SmartboxNodeType.PMO and "power" not in (node_status or {}):
+            # only the power of the energy monitors is used
             return
         _LOGGER.debug("Node status update: %s", node_status)
         if node_status is not None and (node_type, addr) in self._nodes:
             node: SmartboxNode | None = self._nodes.get((node_type, addr), None)
-            if node is not None and node.status != node_status:
+            if node is not None:
+                # Always pass the update on so pending writes get confirmed,
+                # even when it matches our optimistic status
+                changed = node.status != node_status
                 node.update_status(node_status)
-                async_dispatcher_send(
-                    self._hass, f"{DOMAIN}_{node.node_id}_status", node_status
-                )
+                if changed:
+                    async_dispatcher_send(
+                        self._hass, f"{DOMAIN}_{node.node_id}_status", node_status
+                    )
         else:
             _LOGGER.error(
                 "Received status update for unknown node %s %s", node_type, addr
@@ -173,6 +202,11 @@ class SmartboxDevice:
         """Return the device."""
         return self._device
 
+    @property
+    def hass(self) -> HomeAssistant:
+        """Return the Home Assistant instance."""
+        return self._hass
+
     @property
     def connected(self) -> bool | None:
         """Return the device."""
@@ -221,7 +255,9 @@ class SmartboxDevice:
 
     async def set_away_status(self, away: bool) -> None:
         """Set the away status."""
-        await self._session.set_device_away_status(self.dev_id, {"away": away})
+        await self.command_queue.run(
+            self._session.set_device_away_status, self.dev_id, {"away": away}
+        )
         self._away_status_update(away_status={"away": away})
 
     @property
@@ -231,7 +267,9 @@ class SmartboxDevice:
 
     async def set_power_limit(self, power_limit: int) -> None:
         """Set the power limit of the device."""
-        await self._session.set_device_power_limit(self.dev_id, power_limit)
+        await self.command_queue.run(
+            self._session.set_device_power_limit, self.dev_id, power_limit
+        )
         self._power_limit = power_limit
 
 
@@ -252,8 +290,20 @@ class SmartboxNode:
         self._node_info = node_info
         self._session = session
         self._status = status
-        self._setup = setup
+        # a copy, changed through update_setup so that it is parsed again
+        self._setup = dict(setup)
         self._samples = samples
+        self.sample_cache = SampleCache(self.get_samples)
+        self._pending_writes: list[PendingWrite] = []
+        self.write_confirmation_latency = DurationStats()
+        self.write_failures: int = 0
+        self.write_timeouts: int = 0
+        # timestamp of the last status, from the socket or the API
+        self.updated_at: float = time.time()
+        # bumped on each change of the status, setup or away status
+        self.status_version: int = 0
+        self._parsed_status = parse_status(self.node_type, status)
+        self._parsed_setup = parse_setup(setup)
 
     @classmethod
     async def create(
@@ -316,6 +366,19 @@ class SmartboxNode:
         """Update status."""
         _LOGGER.debug("Updating node %s status: %s", self.name, status)
         self._status |= {**status}
+        self.updated_at = time.time()
+        self._status_changed()
+        self._confirm_pending_writes(status)
+
+    @property
+    def parsed_status(self) -> NodeStatus:
+        """Return the status of node, parsed into the model of its type."""
+        return self._parsed_status
+
+    def _status_changed(self) -> None:
+        """Parse the status once on each change, for the entities to read."""
+        self._parsed_status = parse_status(self.node_type, self._status)
+        self.status_version += 1
 
     @property
     def setup(self) -> SetupDict:
@@ -325,17 +388,106 @@ class SmartboxNode:
     def update_setup(self, setup: SetupDict) -> None:
         """Update setup."""
         _LOGGER.debug("Updating node %s setup: %s", self.name, setup)
-        self._setup = setup
+        self._setup = dict(setup)
+        self._setup_changed()
+
+    @property
+    def parsed_setup(self) -> NodeSetup:
+        """Return the setup of node, parsed."""
+        return self._parsed_setup
+
+    def _setup_changed(self) -> None:
+        """Parse the setup once on each change."""
+        self._parsed_setup = parse_setup(self._setup)
+        self.status_version += 1
 
     async def set_status(self, **status_args: StatusDict) -> StatusDict:
-        """Set status."""
-        await self._session.set_node_status(
-            self._device.dev_id, self._node_info, status_args
+        """Set status.
+
+        The new values are applied locally straight away and stay pending until
+        the device confirms them through the socket. They are rolled back if the
+        request fails or no confirmation arrives in time.
+        """
+        write = PendingWrite(
+            values=dict(status_args),
+            previous={k: self._status[k] for k in status_args if k in self._status},
         )
-        # update our status locally until we get an update
+        self._pending_writes.append(write)
         self._status |= {**status_args}
+        self._async_write_status()
+        try:
+            await self._device.command_queue.run(
+                self._session.set_node_status,
+                self._device.dev_id,
+                self._node_info,
+                status_args,
+            )
+        except Exception:
+            if write in self._pending_writes:
+                self._pending_writes.remove(write)
+                self.write_failures += 1
+                self._rollback_write(write)
+            raise
+        if write in self._pending_writes:
+            write.cancel_timeout = async_call_later(
+                self._device.hass,
+                WRITE_CONFIRMATION_TIMEOUT,
+                partial(self._write_timed_out, write),
+            )
         return self._status
 
+    @property
+    def pending_writes(self) -> list[PendingWrite]:
+        """Return the status writes not yet confirmed by the device."""
+        return self._pending_writes
+
+    def cancel_pending_writes(self) -> None:
+        """Stop waiting for confirmation of the pending writes."""
+        for write in self._pending_writes:
+            if write.cancel_timeout is not None:
+                write.cancel_timeout()
+        self._pending_writes.clear()
+
+    def _confirm_pending_writes(self, status: StatusDict) -> None:
+        """Confirm the pending writes matched by a status update."""
+        for write in list(self._pending_writes):
+            if not _status_confirms(status, write.values):
+                continue
+            self._pending_writes.remove(write)
+            if write.cancel_timeout is not None:
+                write.cancel_timeout()
+            self.write_confirmation_latency.record(time.monotonic() - write.started_at)
+
+    @callback
+    def _write_timed_out(self, write: PendingWrite, _: datetime) -> None:
+        """Roll back a write the device never confirmed."""
+        if write not in self._pending_writes:
+            return
+        self._pending_writes.remove(write)
+        self.write_timeouts += 1
+        _LOGGER.warning(
+            "Node %s did not confirm status %s, rolling back", self.name, write.values
+        )
+        self._rollback_write(write)
+
+    def _rollback_write(self, write: PendingWrite) -> None:
+        """Restore the values a write replaced, unless updated since."""
+        for key, value in write.values.items():
+            if key not in self._status or not _values_equal(self._status[key], value):
+                continue
+            if key in write.previous:
+                self._status[key] = write.previous[key]
+            else:
+                del self._status[key]
+        self._async_write_status()
+
+    def _async_write_status(self) -> None:
+        """Push the current status to the entities."""
+        self._status_changed()
+        async_dispatcher_send(
+            self._device.hass, f"{DOMAIN}_{self.node_id}_status", self._status
+        )
+
     @property
     def away(self) -> bool:
         """Is away mode."""
@@ -362,45 +514,65 @@ class SmartboxNode:
     @property
     def window_mode(self) -> bool:
         """Is windows mode enable."""
-        if "window_mode_enabled" not in self._setup:
+        if (window_mode := self._parsed_setup.window_mode_enabled) is None:
             msg = "window_mode_enabled not present in setup for node {self.name}"
             raise KeyError(msg)
-        return self._setup["window_mode_enabled"]
+        return window_mode
 
     async def set_window_mode(self, window_mode: bool) -> bool:
         """Set window mode."""
-        await self._session.set_node_setup(
+        await self._device.command_queue.run(
+            self._session.set_node_setup,
             self._device.dev_id,
             self._node_info,
             {"window_mode_enabled": window_mode},
         )
         self._setup["window_mode_enabled"] = window_mode
+        self._setup_changed()
         return window_mode
 
     @property
     def true_radiant(self) -> bool:
         """Is a true radiant."""
-        if "true_radiant_enabled" not in self._setup:
+        if (true_radiant := self._parsed_setup.true_radiant_enabled) is None:
             msg = "true_radiant_enabled not present in setup for node {self.name}"
             raise KeyError(msg)
-        return self._setup["true_radiant_enabled"]
+        return true_radiant
 
     async def set_true_radiant(self, true_radiant: bool) -> None:
         """Set true radiant."""
-        await self._session.set_node_setup(
+        await self._device.command_queue.run(
+            self._session.set_node_setup,
             self._device.dev_id,
             self._node_info,
             {"true_radiant_enabled": true_radiant},
         )
         self._setup["true_radiant_enabled"] = true_radiant
+        self._setup_changed()
+
+    async def set_setup(self, **setup_args: Any) -> None:  # noqa: ANN401
+        """Set setup."""
+        await self._device.command_queue.run(
+            self._session.set_node_setup,
+            self._device.dev_id,
+            self._node_info,
+            setup_args,
+        )
+        self._setup |= setup_args
+        self._setup_changed()
 
     async def set_extra_options(self, options: dict[str, Any]) -> None:
-        """Set window mode."""
-        await self._session.set_node_setup(
+        """Set extra options."""
+        # The whole extra_options are replaced, so keep the other ones
+        setup = {"extra_options": {**self.setup.get("extra_options", {}), **options}}
+        await self._device.command_queue.run(
+            self._session.set_node_setup,
             self._device.dev_id,
             self._node_info,
-            {"extra_options": options},
+            setup,
         )
+        self._setup |= setup
+        self._setup_changed()
 
     def is_heating(self, status: dict[str, Any]) -> str:
         """Is heating."""
@@ -416,11 +588,13 @@ class SmartboxNode:
             self.device.dev_id,
             self._node_info,
         )
+        self.updated_at = time.time()
+        self._status_changed()
 
     async def update_samples(self) -> None:
         """Update the samples."""
         max_sample = 2
-        sample = await self.get_samples(
+        sample = await self.sample_cache.get_samples(
             int(time.time() - (3600 * 3)),
             int(time.time()),
         )
@@ -446,16 +620,31 @@ class SmartboxNode:
             return None
         return self._samples[-1]["counter"]
 
+    @property
+    def average_power(self) -> float | None:
+        """Get the average power between the last two samples, in W."""
+        if len(self._samples) < 2:  # noqa: PLR2004
+            return None
+        first, last = self._samples[-2:]
+        if (elapsed := last["t"] - first["t"]) <= 0:
+            return None
+        energy = float(last["counter"]) - float(first["counter"])
+        # a counter going back is a reset, not a negative consumption
+        if energy < 0:
+            return None
+        return energy * 3600 / elapsed
+
     @property
     def boost_config(self) -> BoostConfig:
         """Get the boost config."""
-        _boost_config = self._setup.get("factory_options", {}).get("boost_config", 0)
+        _boost_config = self._parsed_setup.factory_options.get("boost_config", 0)
         return BoostConfig(_boost_config)
 
     @property
     def boost(self) -> bool:
         """Boost status."""
-        return self.status.get("boost", False)
+        status = self._parsed_status
+        return isinstance(status, HeaterStatus) and status.boost
 
     @property
     def boost_available(self) -> bool:
@@ -471,20 +660,21 @@ class SmartboxNode:
     def boost_time(self) -> float:
         """Get the boost time."""
         return float(
-            self.setup.get("extra_options", {}).get("boost_time", DEFAULT_BOOST_TIME)
+            self._parsed_setup.extra_options.get("boost_time", DEFAULT_BOOST_TIME)
         )
 
     @property
     def boost_temp(self) -> float:
         """Get the boost time."""
         return float(
-            self.setup.get("extra_options", {}).get("boost_temp", DEFAULT_BOOST_TEMP)
+            self._parsed_setup.extra_options.get("boost_temp", DEFAULT_BOOST_TEMP)
         )
 
     @property
     def boost_end_min(self) -> int:
         """Get the boost end time."""
-        return self.status.get("boost_end_min", 0)
+        status = self._parsed_status
+        return status.boost_end_min if isinstance(status, HeaterStatus) else 0
 
     @property
     def remaining_boost_time(self) -> int:
@@ -501,6 +691,24 @@ class SmartboxNode:
         return (boost_end_datetime - today).total_seconds()
 
 
+def _values_equal(current: Any, expected: Any) -> bool:  # noqa: ANN401
+    """Compare status values, allowing for numbers sent as strings."""
+    if current == expected:
+        return True
+    if isinstance(current, bool) or isinstance(expected, bool):
+        return False
+    try:
+        return float(current) == float(expected)
+    except (TypeError, ValueError):
+        return False
+
+
+def _status_confirms(status: StatusDict, values: StatusDict) -> bool:
+    """Return whether a status update confirms the values written."""
+    keys = [key for key in values if key in status]
+    return bool(keys) and all(_values_equal(status[key], values[key]) for key in keys)
+
+
 def get_temperature_unit(status: StatusDict) -> None | UnitOfTemperature:
     """Get the unit of temperature."""
     if "units" not in status:
@@ -0,0 +1,129 @@
+"""Typed status and setup of the Smartbox nodes, parsed once on each update."""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
+from typing import Any
+
+from smartbox import SmartboxNodeType
+
+
+@dataclass(slots=True)
+class NodeStatus:
+    """Status of a node, with its numbers parsed and its unknown keys kept."""
+
+    sync_status: str | None = None
+    locked: bool = False
+    power: float | None = None
+    # keys without a field or that failed to parse, as received, so that the
+    # ones added by newer firmwares are not lost
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class PowerMeterStatus(NodeStatus):
+    """Status of a 'pmo' node."""
+
+
+@dataclass(slots=True)
+class HeaterStatus(NodeStatus):
+    """Status of a 'htr' node."""
+
+    mode: str | None = None
+    units: str | None = None
+    mtemp: float | None = None
+    stemp: float | None = None
+    active: bool = False
+    duty: float | None = None
+    boost: bool = False
+    boost_end_min: int = 0
+
+
+@dataclass(slots=True)
+class HeaterModStatus(HeaterStatus):
+    """Status of a 'htr_mod' node."""
+
+    on: bool = False
+    selected_temp: str | None = None
+    comfort_temp: float | None = None
+    eco_offset: float | None = None
+    ice_temp: float | None = None
+
+
+@dataclass(slots=True)
+class AccumulatorStatus(HeaterStatus):
+    """Status of an 'acm' node."""
+
+    charging: bool = False
+    charge_level: int | None = None
+
+
+@dataclass(slots=True)
+class NodeSetup:
+    """Setup of a node, with its unknown keys kept."""
+
+    window_mode_enabled: bool | None = None
+    true_radiant_enabled: bool | None = None
+    factory_options: dict[str, Any] = field(default_factory=dict)
+    extra_options: dict[str, Any] = field(default_factory=dict)
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+STATUS_MODELS: dict[str, type[NodeStatus]] = {
+    SmartboxNodeType.HTR: HeaterStatus,
+    SmartboxNodeType.HTR_MOD: HeaterModStatus,
+    SmartboxNodeType.ACM: AccumulatorStatus,
+    SmartboxNodeType.PMO: PowerMeterStatus,
+}
+
+# The API sends most numbers as strings, and some flags as 0 or 1
+_CONVERTERS: dict[str, Callable[[Any], Any]] = {
+    "locked": bool,
+    "power": float,
+    "mtemp": float,
+    "stemp": float,
+    "active": bool,
+    "duty": float,
+    "boost": bool,
+    "boost_end_min": int,
+    "on": bool,
+    "comfort_temp": float,
+    "eco_offset": float,
+    "ice_temp": float,
+    "charging": bool,
+    "charge_level": int,
+}
+
+_FIELD_NAMES: dict[type, frozenset[str]] = {
+    model: frozenset(f.name for f in fields(model) if f.name != "extra")
+    for model in (NodeStatus, NodeSetup, *STATUS_MODELS.values())
+}
+
+
+def _parse(raw: dict[str, Any], names: frozenset[str]) -> dict[str, Any]:
+    """Return the fields of a model from a raw dict, the others in extra."""
+    values: dict[str, Any] = {}
+    extra: dict[str, Any] = {}
+    for key, value in raw.items():
+        if key not in names:
+            extra[key] = value
+            continue
+        if value is not None and (convert := _CONVERTERS.get(key)) is not None:
+            try:
+                value = convert(value)  # noqa: PLW2901
+            except (TypeError, ValueError):
+                extra[key] = value
+                continue
+        values[key] = value
+    values["extra"] = extra
+    return values
+
+
+def parse_status(node_type: str, status: dict[str, Any]) -> NodeStatus:
+    """Parse a raw status into the model of its node type."""
+    model = STATUS_MODELS.get(node_type, NodeStatus)
+    return model(**_parse(status, _FIELD_NAMES[model]))
+
+
+def parse_setup(setup: dict[str, Any]) -> NodeSetup:
+    """Parse a raw setup."""
+    return NodeSetup(**_parse(setup, _FIELD_NAMES[NodeSetup]))
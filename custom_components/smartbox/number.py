@@ -4,26 +4,16 @@ import logging
 
 from homeassistant.components.number import NumberDeviceClass, NumberEntity, NumberMode
 from homeassistant.const import (
-    ATTR_AREA_ID,
-    ATTR_DEVICE_ID,
-    ATTR_ENTITY_ID,
-    ATTR_TEMPERATURE,
     EntityCategory,
     UnitOfPower,
     UnitOfTemperature,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import (
-    config_validation as cv,
-    device_registry as dr,
-    entity_registry as er,
-)
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-import voluptuous as vol
 
 from . import SmartboxConfigEntry
-from .const import ATTR_DURATION, DEFAULT_BOOST_TIME, DOMAIN, SERVICE_SET_BOOST_PARAMS
+from .const import DEFAULT_BOOST_TIME
 from .entity import SmartBoxDeviceEntity, SmartBoxNodeEntity
 from .models import get_temperature_unit
 
@@ -32,7 +22,7 @@ _MAX_POWER_LIMIT = 9999
 
 
 async def async_setup_entry(
-    hass: HomeAssistant,
+    hass: HomeAssistant,  # noqa: ARG001
     entry: SmartboxConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
@@ -66,49 +56,6 @@ async def async_setup_entry(
     )
     async_add_entities(boost_entities, update_before_add=True)
 
-    async def handle_set_boost_params(call: ServiceCall) -> None:  # pragma: no cover
-        """Handle the service call."""
-        areas: list = call.data.get(ATTR_AREA_ID, [])
-        devices: list = call.data.get(ATTR_DEVICE_ID, [])
-        entities: list = call.data.get(ATTR_ENTITY_ID, [])
-        for area in areas:
-            for device in dr.async_entries_for_area(dr.async_get(hass), area):
-                if device.id not in devices:
-                    devices.append(device.id)
-        for device in devices:
-            for entity in er.async_entries_for_device(er.async_get(hass), device):
-                if entity.id not in entities:
-                    entities.append(entity.entity_id)
-        for _entity in entities:
-            entity = next(
-                (e for e in boost_entities if e.entity_id == _entity),
-                None,
-            )
-            if entity is not None:
-                if (
-                    boost_temp := call.data.get(ATTR_TEMPERATURE, False)
-                ) and entity.device_class == ATTR_TEMPERATURE:
-                    await entity.async_set_native_value(boost_temp)
-                if (
-                    boost_time := call.data.get(ATTR_DURATION, False)
-                ) and entity.device_class == ATTR_DURATION:
-                    await entity.async_set_native_value(boost_time)
-
-    hass.services.async_register(
-        DOMAIN,
-        SERVICE_SET_BOOST_PARAMS,
-        handle_set_boost_params,
-        schema=vol.All(
-            vol.Schema(
-                {
-                    vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
-                    vol.Optional(ATTR_DURATION): vol.Coerce(int),
-                    **(cv.ENTITY_SERVICE_FIELDS),
-                },
-            ),
-            cv.has_at_least_one_key(ATTR_TEMPERATURE, ATTR_DURATION),
-        ),
-    )
     _LOGGER.debug("Finished setting up Smartbox number platform")
 
 
@@ -133,10 +80,24 @@ class PowerLimit(SmartBoxDeviceEntity, NumberEntity):
         self.async_write_ha_state()
 
 
-class ConfigBoostTemperature(SmartBoxNodeEntity, NumberEntity):
+class ConfigBoostEntity(SmartBoxNodeEntity, NumberEntity):
+    """Base class of the boost parameter controls."""
+
+    _extra_option: str
+
+    async def async_added_to_hass(self) -> None:
+        """Add the entity to the index used by the set_boost_params service."""
+        await super().async_added_to_hass()
+        boost_entities = self._entry.runtime_data.boost_entities
+        boost_entities[self.entity_id] = (self._node, self._extra_option)
+        self.async_on_remove(lambda: boost_entities.pop(self.entity_id, None))
+
+
+class ConfigBoostTemperature(ConfigBoostEntity):
     """Smartbox boost temperature control."""
 
     _attr_key = "config_boost_temperature"
+    _extra_option = "boost_temp"
     _attr_websocket_event = "setup"
     _attr_mode = NumberMode.SLIDER
     _attr_entity_category = EntityCategory.CONFIG
@@ -163,10 +124,11 @@ class ConfigBoostTemperature(SmartBoxNodeEntity, NumberEntity):
         await self._node.set_extra_options({"boost_temp": str(value)})
 
 
-class ConfigBoostDuration(SmartBoxNodeEntity, NumberEntity):
+class ConfigBoostDuration(ConfigBoostEntity):
     """Smartbox boost duration control."""
 
     _attr_key = "config_boost_duration"
+    _extra_option = "boost_time"
     _attr_websocket_event = "setup"
     _attr_mode = NumberMode.SLIDER
     _attr_entity_category = EntityCategory.CONFIG
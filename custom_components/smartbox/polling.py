@@ -0,0 +1,202 @@
+"""Periodic fetches of the Smartbox devices, shared by their entities."""
+
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+import logging
+import random
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from smartbox.error import APIUnavailableError, SmartboxError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds the first fetches of a device are spread over, so that the devices
+# do not all poll the API at the same second
+POLL_JITTER = 10
+# Seconds before their time the fetches are run with the others of a tick
+POLL_ALIGN = 5
+
+
+@dataclass
+class _PolledRequest:
+    """A periodic fetch and the listeners of its result."""
+
+    fetch: Callable[[], Awaitable[Any]]
+    interval: float
+    last_run: float
+    next_run: float
+    updated_at: Callable[[], float] | None = None
+    fetched_at: float = 0.0
+    listeners: list[Callable[[], None]] = field(default_factory=list)
+
+
+class AdaptiveInterval:
+    """Poll interval reset to its minimum on changes, and doubled while stable."""
+
+    def __init__(self, minimum: float, maximum: float) -> None:
+        """Initialise the interval at its minimum."""
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.interval = minimum
+
+    def changed(self) -> float:
+        """Poll again quickly, and return the new interval."""
+        self.interval = self.minimum
+        return self.interval
+
+    def stable(self) -> float:
+        """Back off, and return the new interval."""
+        self.interval = min(self.interval * 2, self.maximum)
+        return self.interval
+
+
+class DevicePoller:
+    """Run the periodic fetches of a device with a single timer.
+
+    The entities subscribe to a fetch of a node keyed on the fetched resource,
+    such as the power or the samples of the node, so the entities needing the
+    same data share a single request. The fetches due at about the same time run
+    together, then the timer is set for the next ones, and the listeners of
+    each fetch are called with its result. A fetch whose data was updated
+    by something else since it last ran, within its interval, is skipped.
+    """
+
+    def __init__(self, hass: HomeAssistant, name: str) -> None:
+        """Initialise the poller."""
+        self._hass = hass
+        self._name = name
+        self._requests: dict[str, _PolledRequest] = {}
+        self._jitter = random.uniform(0, POLL_JITTER)  # noqa: S311
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self.ticks: int = 0
+        self.fetches: int = 0
+        self.suppressed: Counter[str] = Counter()
+
+    @callback
+    def async_add_listener(
+        self,
+        key: str,
+        interval: float,
+        fetch: Callable[[], Awaitable[Any]],
+        listener: Callable[[], None],
+        updated_at: Callable[[], float] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Run a fetch periodically and call a listener after each, until removed.
+
+        The key names the fetched resource, and the fetch is the method of the
+        node updating it, so that a fetch already registered with the same key
+        is shared, at the shortest interval of its listeners. The optional
+        updated_at returns the timestamp of the data, which the socket may keep
+        fresh without the fetch.
+        """
+        if (request := self._requests.get(key)) is None:
+            now = time.time()
+            request = self._requests[key] = _PolledRequest(
+                fetch, interval, now, now + interval + self._jitter, updated_at
+            )
+        elif interval < request.interval:
+            request.interval = interval
+            request.next_run = min(request.next_run, time.time() + interval)
+        request.listeners.append(listener)
+        self._async_schedule()
+
+        @callback
+        def _remove() -> None:
+            request.listeners.remove(listener)
+            if not request.listeners and self._requests.get(key) is request:
+                del self._requests[key]
+                self._async_schedule()
+
+        return _remove
+
+    @callback
+    def async_set_interval(self, key: str, interval: float) -> None:
+        """Change the interval of a fetch, from its last run."""
+        if (request := self._requests.get(key)) is None:
+            return
+        request.interval = interval
+        request.next_run = request.last_run + interval
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if not self._requests:
+            return
+        next_run = min(request.next_run for request in self._requests.values())
+        self._unsub_timer = async_call_later(
+            self._hass, max(0.0, next_run - time.time()), self._async_tick
+        )
+
+    async def _async_tick(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        now = time.time()
+        due: dict[str, _PolledRequest] = {}
+        for key, request in self._requests.items():
+            if request.next_run > now + POLL_ALIGN:
+                continue
+            if (updated_at := self._updated_since_fetch(request)) > (
+                now - request.interval
+            ):
+                # updated since the last fetch, poll once it is as old as the interval
+                request.last_run = updated_at
+                request.next_run = updated_at + request.interval
+                self.suppressed[key] += 1
+                continue
+            request.last_run = now
+            request.next_run = now + request.interval
+            due[key] = request
+        self._async_schedule()
+        if not due:
+            return
+        self.ticks += 1
+        self.fetches += len(due)
+        results = await asyncio.gather(
+            *(request.fetch() for request in due.values()), return_exceptions=True
+        )
+        fetched_at = time.time()
+        for request in due.values():
+            request.fetched_at = fetched_at
+        for (key, request), result in zip(due.items(), results, strict=True):
+            if isinstance(result, SmartboxError | APIUnavailableError):
+                _LOGGER.warning("Failed to poll %s of %s: %s", key, self._name, result)
+            elif isinstance(result, BaseException):
+                _LOGGER.error(
+                    "Error polling %s of %s", key, self._name, exc_info=result
+                )
+            else:
+                for listener in list(request.listeners):
+                    listener()
+
+    @staticmethod
+    def _updated_since_fetch(request: _PolledRequest) -> float:
+        """Return when the data was updated after the last fetch, or 0."""
+        if request.updated_at is None:
+            return 0.0
+        updated_at = request.updated_at()
+        return updated_at if updated_at > request.fetched_at else 0.0
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop polling."""
+        self._requests.clear()
+        self._async_schedule()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the polled fetches and counters as a dict."""
+        return {
+            "requests": {
+                key: request.interval for key, request in self._requests.items()
+            },
+            "ticks": self.ticks,
+            "fetches": self.fetches,
+            "suppressed": dict(self.suppressed),
+        }
@@ -0,0 +1,123 @@
+"""Retry of the Smartbox API requests."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+import logging
+import random
+import time
+from typing import Any
+
+from smartbox.error import APIUnavailableError, SmartboxError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Errors worth another try; authentication errors are not
+RETRYABLE_ERRORS = (APIUnavailableError, SmartboxError, TimeoutError)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by attempts and elapsed time."""
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    max_elapsed: float = 60.0
+    jitter: float = 0.5
+
+    def delay(self, attempt: int) -> float:
+        """Return the delay to wait after the given failed attempt."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())  # noqa: S311
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+READ_RETRY_POLICIES: dict[str, RetryPolicy] = {
+    "get_devices": RetryPolicy(),
+    "get_homes": RetryPolicy(),
+    "get_nodes": RetryPolicy(),
+    "get_device_away_status": RetryPolicy(),
+    "get_device_connected": RetryPolicy(),
+    "get_device_power_limit": RetryPolicy(),
+    "get_node_setup": RetryPolicy(),
+    "get_node_status": RetryPolicy(max_delay=10.0, max_elapsed=30.0),
+    # Samples are only used for statistics, which can wait a bit longer
+    "get_node_samples": RetryPolicy(
+        max_attempts=5, base_delay=2.0, max_delay=60.0, max_elapsed=300.0
+    ),
+}
+# The writes set absolute values, so they can be sent again safely
+WRITE_RETRY_POLICIES: dict[str, RetryPolicy] = {
+    "set_device_away_status": RetryPolicy(max_attempts=2),
+    "set_device_power_limit": RetryPolicy(max_attempts=2),
+    "set_node_setup": RetryPolicy(max_attempts=2),
+    "set_node_status": RetryPolicy(max_attempts=2),
+}
+
+
+def retry_policies(retry_writes: bool) -> dict[str, RetryPolicy]:
+    """Return the retry policy of each endpoint."""
+    if retry_writes:
+        return READ_RETRY_POLICIES | WRITE_RETRY_POLICIES
+    return dict(READ_RETRY_POLICIES)
+
+
+class RetryStats:
+    """Counters of the retries of an endpoint."""
+
+    __slots__ = ("calls", "failures", "recovered", "retries")
+
+    def __init__(self) -> None:
+        """Initialise empty counters."""
+        self.calls: int = 0
+        self.retries: int = 0
+        self.recovered: int = 0
+        self.failures: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as a dict."""
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "failures": self.failures,
+        }
+
+
+async def call_with_retry[R](
+    name: str,
+    request: Callable[[], Awaitable[R]],
+    policy: RetryPolicy,
+    stats: RetryStats,
+) -> R:
+    """Send a request, retrying it on transient errors as allowed by the policy."""
+    stats.calls += 1
+    started_at = time.monotonic()
+    attempt = 1
+    while True:
+        try:
+            result = await request()
+        except RETRYABLE_ERRORS as ex:
+            delay = policy.delay(attempt)
+            if (
+                attempt >= policy.max_attempts
+                or time.monotonic() - started_at + delay > policy.max_elapsed
+            ):
+                stats.failures += 1
+                raise
+            _LOGGER.debug(
+                "Retrying %s in %.1fs after attempt %d failed: %s",
+                name,
+                delay,
+                attempt,
+                ex,
+            )
+            stats.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+        else:
+            if attempt > 1:
+                stats.recovered += 1
+            return result
@@ -0,0 +1,153 @@
+"""Daily and monthly consumption rollups of the Smartbox nodes."""
+
+from datetime import datetime
+from enum import StrEnum
+import math
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SmartboxNodeType
+from .models import SmartboxNode
+from .statistics import HOUR, STORAGE_SAVE_DELAY, Sample
+
+STORAGE_VERSION = 1
+# Days and months kept for each node, device and home
+ROLLUP_DAYS = 366
+ROLLUP_MONTHS = 36
+# Seconds of samples rolled up the first time a node is seen
+ROLLUP_START = 24 * HOUR
+
+
+class RollupPeriod(StrEnum):
+    """Period of a consumption rollup."""
+
+    DAY = "day"
+    MONTH = "month"
+
+
+_PERIOD_FORMATS = {RollupPeriod.DAY: "%Y-%m-%d", RollupPeriod.MONTH: "%Y-%m"}
+_PERIOD_LIMITS = {RollupPeriod.DAY: ROLLUP_DAYS, RollupPeriod.MONTH: ROLLUP_MONTHS}
+
+
+def period_key(period: RollupPeriod, moment: datetime) -> str:
+    """Return the local day or month of a datetime, as stored in the rollups."""
+    return dt_util.as_local(moment).strftime(_PERIOD_FORMATS[period])
+
+
+def period_start(period: RollupPeriod, moment: datetime) -> datetime:
+    """Return the start of the local day or month of a datetime."""
+    start = dt_util.start_of_local_day(moment)
+    return start.replace(day=1) if period == RollupPeriod.MONTH else start
+
+
+def rollup_keys(node: SmartboxNode) -> tuple[str, ...]:
+    """Return the keys a node adds its consumption to: its own, device and home.
+
+    A power monitor measures the heaters of its device, so its consumption is
+    only kept for itself.
+    """
+    if node.node_type == SmartboxNodeType.PMO:
+        return (node.node_id,)
+    return node.node_id, node.device.dev_id, node.device.home["id"]
+
+
+class ConsumptionRollups:
+    """Consumption of each node, device and home by local day and month.
+
+    The difference of each new sample with the last one of its node is added
+    to the day and month it started in, for the node, its device and its
+    home, so an update only touches a few totals and reading a day or month
+    is a lookup. The totals are persisted, and only the last days and months
+    are kept.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialise the rollups."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.rollups"
+        )
+        # last sample of each node, as [t, counter]
+        self._last: dict[str, list[float]] = {}
+        # consumption of each node, device and home, by period and day or month
+        self._totals: dict[str, dict[str, dict[str, float]]] = {}
+
+    async def async_load(self) -> None:
+        """Load the rollups from storage."""
+        if (data := await self._store.async_load()) is not None:
+            self._last = data.get("last", {})
+            self._totals = data.get("totals", {})
+
+    async def async_remove(self) -> None:
+        """Remove the rollups from storage."""
+        await self._store.async_remove()
+
+    def start_time(self, node: SmartboxNode) -> int:
+        """Return the timestamp to roll up the samples of a node from."""
+        if (last := self._last.get(node.node_id)) is None:
+            return int(time.time()) - ROLLUP_START
+        return int(last[0])
+
+    def add_samples(self, node: SmartboxNode, samples: list[Sample]) -> bool:
+        """Add the samples after the last one of a node, return if any was."""
+        last = self._last.get(node.node_id)
+        added = False
+        for sample in sorted(samples, key=lambda s: int(s["t"])):
+            t, counter = int(sample["t"]), float(sample["counter"])
+            if last is not None:
+                if t <= last[0]:
+                    continue
+                # a counter going back is a reset, not a negative consumption
+                if (energy := counter - last[1]) > 0:
+                    self._add_between(node, int(last[0]), t, energy)
+            last = [t, counter]
+            added = True
+        if added and last is not None:
+            self._last[node.node_id] = last
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+        return added
+
+    def _add_between(
+        self, node: SmartboxNode, start: int, end: int, energy: float
+    ) -> None:
+        """Add the energy between two samples, split evenly across their hours.
+
+        The samples after an outage can be days apart, their difference is
+        then spread over the days and months it covers.
+        """
+        hours = max(1, math.ceil((end - start) / HOUR))
+        for hour in range(hours):
+            self._add(
+                node,
+                datetime.fromtimestamp(start + hour * HOUR, dt_util.UTC),
+                energy / hours,
+            )
+
+    def _add(self, node: SmartboxNode, start: datetime, energy: float) -> None:
+        for period in RollupPeriod:
+            day_or_month = period_key(period, start)
+            for key in rollup_keys(node):
+                totals = self._totals.setdefault(key, {}).setdefault(period.value, {})
+                totals[day_or_month] = totals.get(day_or_month, 0.0) + energy
+                if len(totals) > _PERIOD_LIMITS[period]:
+                    del totals[min(totals)]
+
+    def value(self, key: str, period: RollupPeriod, moment: datetime) -> float:
+        """Return the consumption of a node, device or home in a day or month."""
+        return (
+            self._totals.get(key, {})
+            .get(period, {})
+            .get(period_key(period, moment), 0.0)
+        )
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"last": self._last, "totals": self._totals}
+
+    def as_dict(self, key: str | None = None) -> dict[str, Any]:
+        """Return the rollups of a node, device or home, or all of them."""
+        if key is not None:
+            return {key: self._totals[key]} if key in self._totals else {}
+        return dict(self._totals)
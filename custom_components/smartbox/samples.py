@@ -0,0 +1,180 @@
+"""Cache of the recent energy samples of a Smartbox node."""
+
+from array import array
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections.abc import Awaitable, Callable, Iterable
+import logging
+import time
+from typing import Any
+
+from .statistics import HOUR, IMPORT_OVERLAP, Sample
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a cached hour is served before it is fetched again, shorter than
+# the 15 minutes between two updates of the energy sensor or statistics
+SAMPLE_CACHE_TTL = 10 * 60
+# Seconds after the end of an hour from which its samples no longer change
+SAMPLE_SETTLE_TIME = IMPORT_OVERLAP
+# Seconds of samples kept before the current time
+SAMPLE_CACHE_RETENTION = 48 * HOUR
+
+
+class SampleStore:
+    """Samples sorted by timestamp, in parallel arrays of timestamps and counters.
+
+    The samples are stored as machine values rather than dicts, and looked up
+    by bisecting the timestamps. The latest samples are replaced by extending
+    the end of the arrays, and dropped from the start by moving an offset, the
+    arrays being compacted once most of them is dropped, so both are O(1)
+    amortised.
+    """
+
+    __slots__ = ("_counters", "_start", "_times")
+
+    def __init__(self) -> None:
+        """Initialise an empty store."""
+        self._times = array("q")
+        self._counters = array("d")
+        self._start = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples."""
+        return len(self._times) - self._start
+
+    def replace(
+        self, start_time: int, end_time: int, samples: Iterable[Sample]
+    ) -> None:
+        """Replace the samples between two timestamps with sorted samples."""
+        low = bisect_left(self._times, start_time, self._start)
+        high = bisect_right(self._times, end_time, low)
+        times = array("q")
+        counters = array("d")
+        for sample in samples:
+            if start_time <= (t := int(sample["t"])) <= end_time:
+                times.append(t)
+                counters.append(float(sample["counter"]))
+        if high == len(self._times):
+            # most replacements are of the latest samples, only the end moves
+            del self._times[low:], self._counters[low:]
+            self._times.extend(times)
+            self._counters.extend(counters)
+        else:
+            self._times[low:high] = times
+            self._counters[low:high] = counters
+
+    def range(self, start_time: int, end_time: int) -> list[Sample]:
+        """Return the samples between two timestamps."""
+        low = bisect_left(self._times, start_time, self._start)
+        high = bisect_right(self._times, end_time, low)
+        return [
+            {"t": t, "counter": counter}
+            for t, counter in zip(
+                self._times[low:high], self._counters[low:high], strict=True
+            )
+        ]
+
+    def trim(self, oldest_time: int) -> None:
+        """Drop the samples before a timestamp."""
+        self._start = bisect_left(self._times, oldest_time, self._start)
+        if self._start > len(self._times) // 2:
+            del self._times[: self._start], self._counters[: self._start]
+            self._start = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the arrays, in bytes."""
+        return (
+            self._times.buffer_info()[1] * self._times.itemsize
+            + self._counters.buffer_info()[1] * self._counters.itemsize
+        )
+
+
+class SampleCache:
+    """Recent samples of a node, shared by its energy sensor and statistics.
+
+    The samples are kept in a sample store, with the time each hourly bucket
+    was fetched. A request is served from the cache, and only the missing or
+    expired buckets are fetched, merged into contiguous ranges. The buckets
+    fetched well after the end of their hour never expire.
+    """
+
+    def __init__(self, fetch: Callable[[int, int], Awaitable[list[Sample]]]) -> None:
+        """Initialise an empty cache."""
+        self._fetch = fetch
+        self._samples = SampleStore()
+        self._fetched_at: dict[int, float] = {}
+        self._lock = asyncio.Lock()
+        self.hits: int = 0
+        self.fetches: int = 0
+
+    async def get_samples(self, start_time: int, end_time: int) -> list[Sample]:
+        """Return the samples between two timestamps, fetching the missing ones."""
+        first, last = start_time // HOUR, end_time // HOUR
+        # One request at a time, so concurrent overlapping requests share a fetch
+        async with self._lock:
+            now = time.time()
+            self._evict(now)
+            missing = [
+                bucket
+                for bucket in range(first, last + 1)
+                if not self._is_fresh(bucket, now)
+            ]
+            if not missing:
+                self.hits += 1
+            for range_first, range_last in _contiguous_ranges(missing):
+                await self._fetch_buckets(range_first, range_last, now)
+        return self._samples.range(start_time, end_time)
+
+    def cached_samples(self, start_time: int, end_time: int) -> list[Sample]:
+        """Return the cached samples between two timestamps, without fetching."""
+        oldest = int(time.time() - SAMPLE_CACHE_RETENTION) // HOUR * HOUR
+        return self._samples.range(max(start_time, oldest), end_time)
+
+    def _is_fresh(self, bucket: int, now: float) -> bool:
+        if (fetched_at := self._fetched_at.get(bucket)) is None:
+            return False
+        return (
+            fetched_at >= (bucket + 1) * HOUR + SAMPLE_SETTLE_TIME
+            or now - fetched_at < SAMPLE_CACHE_TTL
+        )
+
+    async def _fetch_buckets(self, first: int, last: int, now: float) -> None:
+        _LOGGER.debug("Fetching samples from %d to %d", first * HOUR, (last + 1) * HOUR)
+        samples = await self._fetch(first * HOUR, (last + 1) * HOUR - 1)
+        self.fetches += 1
+        for bucket in range(first, last + 1):
+            self._fetched_at[bucket] = now
+        self._samples.replace(
+            first * HOUR,
+            (last + 1) * HOUR - 1,
+            sorted(samples, key=lambda s: int(s["t"])),
+        )
+
+    def _evict(self, now: float) -> None:
+        oldest = int(now - SAMPLE_CACHE_RETENTION) // HOUR
+        for bucket in [bucket for bucket in self._fetched_at if bucket < oldest]:
+            del self._fetched_at[bucket]
+        self._samples.trim(oldest * HOUR)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the cache usage as a dict."""
+        return {
+            "hours": len(self._fetched_at),
+            "samples": len(self._samples),
+            "bytes": self._samples.nbytes,
+            "hits": self.hits,
+            "fetches": self.fetches,
+        }
+
+
+def _contiguous_ranges(buckets: list[int]) -> list[tuple[int, int]]:
+    """Merge sorted buckets into (first, last) ranges of consecutive buckets."""
+    ranges: list[tuple[int, int]] = []
+    for bucket in buckets:
+        if ranges and ranges[-1][1] == bucket - 1:
+            ranges[-1] = (ranges[-1][0], bucket)
+        else:
+            ranges.append((bucket, bucket))
+    return ranges
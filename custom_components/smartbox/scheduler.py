@@ -0,0 +1,355 @@
+"""Pacing of the requests sent to the Smartbox API."""
+
+import asyncio
+from collections import Counter, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from typing import Any
+
+from .metrics import DurationStats
+
+
+class ApiPriority(IntEnum):
+    """Priority of an API request, lowest value served first."""
+
+    USER = 0
+    RESYNC = 1
+    POLLING = 2
+    BACKFILL = 3
+
+
+_API_PRIORITY: ContextVar[ApiPriority] = ContextVar(
+    "smartbox_api_priority", default=ApiPriority.POLLING
+)
+
+
+@contextmanager
+def api_priority(priority: ApiPriority) -> Iterator[None]:
+    """Send the API reads made within this context with the given priority."""
+    token = _API_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _API_PRIORITY.reset(token)
+
+
+def current_api_priority() -> ApiPriority:
+    """Return the priority of the API reads made in the current context."""
+    return _API_PRIORITY.get()
+
+
+class RequestScheduler:
+    """Token bucket rate limiter serving waiting requests by priority.
+
+    Requests are let through straight away while tokens are available. Once
+    the bucket is empty they wait, and each token refilled goes to the
+    highest priority request that has been waiting the longest.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialise the scheduler with a rate in requests per minute."""
+        self._rate = rate / 60
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.granted: dict[ApiPriority, int] = dict.fromkeys(ApiPriority, 0)
+        self.wait_time: dict[ApiPriority, DurationStats] = {
+            priority: DurationStats() for priority in ApiPriority
+        }
+
+    async def acquire(self, priority: ApiPriority, tokens: int = 1) -> None:
+        """Wait until the request is allowed to be sent."""
+        started_at = time.monotonic()
+        for _ in range(tokens):
+            await self._acquire_token(priority)
+        self.granted[priority] += tokens
+        self.wait_time[priority].record(time.monotonic() - started_at)
+
+    async def _acquire_token(self, priority: ApiPriority) -> None:
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        self._schedule_wakeup()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted just before the request was cancelled
+                self._tokens += 1
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if not self._waiters:
+                self._cancel_wakeup()
+            raise
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    def _schedule_wakeup(self) -> None:
+        if self._wakeup is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self._rate)
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _cancel_wakeup(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+    def _wake(self) -> None:
+        self._wakeup = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # The request was cancelled while waiting
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule_wakeup()
+
+    def cancel(self) -> None:
+        """Cancel the requests waiting for a token."""
+        self._cancel_wakeup()
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the scheduler metrics as a dict."""
+        return {
+            "rate_per_minute": self._rate * 60,
+            "burst": self._burst,
+            "tokens": self._tokens,
+            "waiting": self.waiting,
+            "granted": {p.name.lower(): n for p, n in self.granted.items()},
+            "wait_time": {
+                p.name.lower(): stats.as_dict() for p, stats in self.wait_time.items()
+            },
+        }
+
+
+# Seconds over which a request budget is counted
+BUDGET_WINDOW = 60
+
+
+class RequestBudget:
+    """Requests per minute shared by the config entries of a reseller.
+
+    At most rate requests are let through in any minute, whichever entry
+    sends them. Once the budget is used, the waiting requests are served by
+    priority, then to the entry which sent the fewest requests in the last
+    minute, or was served the longest ago, so that an entry sending many
+    requests cannot starve the others.
+    """
+
+    def __init__(self, rate: int) -> None:
+        """Initialise the budget with a rate in requests per minute."""
+        self.rate = rate
+        # time and entry of the requests sent in the last minute
+        self._sent: deque[tuple[float, str]] = deque()
+        self._sent_by: Counter[str] = Counter()
+        self._waiters: dict[str, list[tuple[int, int, asyncio.Future[None]]]] = {}
+        self._sequence = itertools.count()
+        # order of the last request granted to each entry
+        self._served: dict[str, int] = {}
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.granted: Counter[str] = Counter()
+
+    async def acquire(
+        self, client: str, priority: ApiPriority, tokens: int = 1
+    ) -> None:
+        """Wait until a request of an entry fits in the budget."""
+        for _ in range(tokens):
+            await self._acquire_token(client, priority)
+
+    async def _acquire_token(self, client: str, priority: ApiPriority) -> None:
+        self._expire()
+        if not self.waiting and len(self._sent) < self.rate:
+            self._grant(client)
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), future)
+        heapq.heappush(self._waiters.setdefault(client, []), entry)
+        self._schedule_wakeup()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # a request granted just before it was cancelled still counts
+            waiters = self._waiters.get(client, [])
+            if entry in waiters:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+            raise
+
+    def _grant(self, client: str) -> None:
+        self._sent.append((time.monotonic(), client))
+        self._sent_by[client] += 1
+        self._served[client] = next(self._sequence)
+        self.granted[client] += 1
+
+    def _expire(self) -> None:
+        oldest = time.monotonic() - BUDGET_WINDOW
+        while self._sent and self._sent[0][0] <= oldest:
+            _, client = self._sent.popleft()
+            self._sent_by[client] -= 1
+
+    def _schedule_wakeup(self) -> None:
+        if self._wakeup is not None or not self.waiting:
+            return
+        if len(self._sent) < self.rate:
+            delay = 0.0
+        elif self._sent:
+            delay = max(0.0, self._sent[0][0] + BUDGET_WINDOW - time.monotonic())
+        else:
+            # no budget at all, wait for set_rate
+            return
+        self._wakeup = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._wakeup = None
+        self._expire()
+        while (
+            len(self._sent) < self.rate and (client := self._next_client()) is not None
+        ):
+            _, _, future = heapq.heappop(self._waiters[client])
+            self._grant(client)
+            future.set_result(None)
+        self._schedule_wakeup()
+
+    def _next_client(self) -> str | None:
+        """Return the entry served next, dropping the cancelled requests."""
+        heads: list[tuple[int, int, int, str]] = []
+        for client, waiters in self._waiters.items():
+            while waiters and waiters[0][2].done():
+                heapq.heappop(waiters)
+            if waiters:
+                heads.append(
+                    (
+                        waiters[0][0],
+                        self._sent_by[client],
+                        self._served.get(client, -1),
+                        client,
+                    )
+                )
+        return min(heads)[3] if heads else None
+
+    def set_rate(self, rate: int) -> None:
+        """Change the requests per minute, serving the waiting requests it allows."""
+        self.rate = rate
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._schedule_wakeup()
+
+    def cancel(self, client: str) -> None:
+        """Cancel the requests of an entry waiting for the budget."""
+        for _, _, future in self._waiters.pop(client, []):
+            future.cancel()
+        self._served.pop(client, None)
+        if not self.waiting and self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+    @property
+    def waiting(self) -> int:
+        """Return the number of requests waiting for the budget."""
+        return sum(
+            1
+            for waiters in self._waiters.values()
+            for _, _, future in waiters
+            if not future.done()
+        )
+
+    def used(self, client: str | None = None) -> int:
+        """Return the requests sent in the last minute, by all or an entry."""
+        self._expire()
+        return len(self._sent) if client is None else self._sent_by[client]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the budget metrics as a dict."""
+        return {
+            "rate_per_minute": self.rate,
+            "used": self.used(),
+            "waiting": self.waiting,
+            "used_by": {client: n for client, n in self._sent_by.items() if n},
+            "granted": dict(self.granted),
+        }
+
+
+class BudgetShare:
+    """Access of a config entry to the request budget of its reseller."""
+
+    def __init__(self, budget: RequestBudget, client: str) -> None:
+        """Initialise the share."""
+        self.budget = budget
+        self.client = client
+
+    async def acquire(self, priority: ApiPriority, tokens: int = 1) -> None:
+        """Wait until a request of the entry fits in the budget."""
+        await self.budget.acquire(self.client, priority, tokens)
+
+    def used(self) -> int:
+        """Return the requests sent by the entry in the last minute."""
+        return self.budget.used(self.client)
+
+
+class RequestBudgets:
+    """Request budgets of the resellers, shared by their config entries.
+
+    The budget of a reseller is the smallest one set by its entries, and is
+    dropped once its last entry is unloaded.
+    """
+
+    def __init__(self) -> None:
+        """Initialise the budgets."""
+        self._budgets: dict[str, RequestBudget] = {}
+        # reseller and rate of each entry
+        self._clients: dict[str, tuple[str, int]] = {}
+
+    def share(self, reseller: str, client: str, rate: int) -> BudgetShare:
+        """Return the share of an entry in the budget of its reseller."""
+        self._clients[client] = (reseller, rate)
+        budget = self._budgets.setdefault(reseller, RequestBudget(rate))
+        budget.set_rate(min(budget.rate, rate))
+        return BudgetShare(budget, client)
+
+    def release(self, client: str) -> None:
+        """Remove an entry from the budget of its reseller."""
+        if (registered := self._clients.pop(client, None)) is None:
+            return
+        reseller = registered[0]
+        self._budgets[reseller].cancel(client)
+        rates = [rate for name, rate in self._clients.values() if name == reseller]
+        if rates:
+            self._budgets[reseller].set_rate(min(rates))
+        else:
+            del self._budgets[reseller]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the budgets metrics as a dict."""
+        return {
+            reseller: budget.as_dict() for reseller, budget in self._budgets.items()
+        }
@@ -1,9 +1,14 @@
 """Support for Smartbox sensor entities."""
 
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Awaitable, Callable
 from datetime import datetime, timedelta
+from itertools import pairwise
 import logging
 import math
 import time
+from typing import Any
 from unittest.mock import MagicMock
 
 from dateutil import tz
@@ -13,8 +18,8 @@ from homeassistant.components.recorder.models.statistics import (
     StatisticMetaData,
 )
 from homeassistant.components.recorder.statistics import (
-    async_import_statistics,
     get_last_short_term_statistics,
+    statistics_during_period,
 )
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -29,24 +34,48 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.util import dt
+from smartbox.error import APIUnavailableError, SmartboxError
 
 from . import SmartboxConfigEntry
 from .const import (
+    CONF_ADAPTIVE_POWER,
+    CONF_AVERAGE_POWER_DUTY,
     CONF_HISTORY_CONSUMPTION,
     CONF_TIMEDELTA_POWER,
+    CONF_TIMEDELTA_POWER_MAX,
+    CONF_TIMEDELTA_POWER_MIN,
     DEFAULT_TIMEDELTA_POWER,
+    DEFAULT_TIMEDELTA_POWER_MAX,
+    DEFAULT_TIMEDELTA_POWER_MIN,
+    DOMAIN,
     HistoryConsumptionStatus,
     SmartboxNodeType,
 )
-from .entity import SmartBoxNodeEntity
-from .models import SmartboxNode, get_temperature_unit
+from .energy import EnergyTotal, consumption_nodes, sum_samples
+from .entity import SmartBoxDeviceEntity, SmartBoxNodeEntity
+from .models import SmartboxDevice, SmartboxNode, get_temperature_unit
+from .node_status import HeaterStatus
+from .polling import AdaptiveInterval
+from .rollups import RollupPeriod, period_start
+from .samples import SAMPLE_CACHE_RETENTION
+from .scheduler import ApiPriority, api_priority
+from .statistics import Sample, find_statistics_gaps, samples_to_statistics
 
 _LOGGER = logging.getLogger(__name__)
 SCAN_INTERVAL = timedelta(minutes=15)
+# Seconds between two updates of the API budget use
+BUDGET_SENSOR_INTERVAL = 30
+# Relative change of the PMO power polled again quickly, with the adaptive interval
+ADAPTIVE_POWER_CHANGE = 0.05
 
 
 async def async_setup_entry(
@@ -89,6 +118,52 @@ async def async_setup_entry(
         [TotalConsumptionSensor(node, entry) for node in entry.runtime_data.nodes],
         update_before_add=True,
     )
+    async_add_entities(
+        [AveragePowerSensor(node, entry) for node in entry.runtime_data.nodes],
+        update_before_add=True,
+    )
+    async_add_entities(
+        [HistoryImportSensor(device, entry) for device in entry.runtime_data.devices]
+    )
+    # one for the entry, shown with its first device
+    async_add_entities(
+        [ApiBudgetSensor(device, entry) for device in entry.runtime_data.devices[:1]]
+    )
+    # Energy totals
+    homes: dict[str, list[SmartboxDevice]] = {}
+    for device in entry.runtime_data.devices:
+        homes.setdefault(device.home["id"], []).append(device)
+    async_add_entities(
+        [
+            DeviceTotalConsumptionSensor(device, entry)
+            for device in entry.runtime_data.devices
+        ]
+    )
+    async_add_entities(
+        [HomeTotalConsumptionSensor(devices, entry) for devices in homes.values()]
+    )
+    # Daily and monthly consumption
+    async_add_entities(
+        [
+            sensor
+            for period in RollupPeriod
+            for sensor in (
+                *(
+                    NodeConsumptionRollupSensor(node, entry, period)
+                    for node in entry.runtime_data.nodes
+                ),
+                *(
+                    DeviceConsumptionRollupSensor(device, entry, period)
+                    for device in entry.runtime_data.devices
+                ),
+                *(
+                    HomeConsumptionRollupSensor(devices, entry, period)
+                    for devices in homes.values()
+                ),
+            )
+        ],
+        update_before_add=True,
+    )
 
     # Charge Level
     async_add_entities(
@@ -170,31 +245,77 @@ class PowerSensor(SmartboxSensorBase):
     native_unit_of_measurement = UnitOfPower.WATT
     state_class = SensorStateClass.MEASUREMENT
     entity_category = EntityCategory.DIAGNOSTIC
+    _adaptive_interval: AdaptiveInterval | None = None
+    _last_power: float | None = None
 
     async def async_added_to_hass(self) -> None:
         """When added to hass."""
         await super().async_added_to_hass()
-        if self._node.node_type == SmartboxNodeType.PMO:
-            self._attr_should_poll = True
-            self.async_on_remove(
-                async_track_time_interval(
-                    self.hass,
-                    self._async_update_pmo,
-                    timedelta(
-                        seconds=self.config_entry.options.get(
-                            CONF_TIMEDELTA_POWER, DEFAULT_TIMEDELTA_POWER
+        if self._node.node_type != SmartboxNodeType.PMO:
+            return
+        options = self.config_entry.options
+        interval = options.get(CONF_TIMEDELTA_POWER, DEFAULT_TIMEDELTA_POWER)
+        if options.get(CONF_ADAPTIVE_POWER, False):
+            self._adaptive_interval = AdaptiveInterval(
+                options.get(CONF_TIMEDELTA_POWER_MIN, DEFAULT_TIMEDELTA_POWER_MIN),
+                options.get(CONF_TIMEDELTA_POWER_MAX, DEFAULT_TIMEDELTA_POWER_MAX),
+            )
+            interval = self._adaptive_interval.interval
+            # a heater switching on or off changes the power of the device
+            for node in self._node.device.get_nodes():
+                if node.heater_node:
+                    self.async_on_remove(
+                        async_dispatcher_connect(
+                            self.hass,
+                            f"{DOMAIN}_{node.node_id}_status",
+                            self._heater_status_update(node),
                         )
-                    ),
-                    name=f"Update PMO Power - {self.name}",
-                    cancel_on_shutdown=True,
-                )
+                    )
+        # polled with the other fetches of the device
+        self.async_on_remove(
+            self._node.device.poller.async_add_listener(
+                self._poll_key,
+                interval,
+                self._node.update_power,
+                self._power_update,
+                updated_at=lambda: self._node.updated_at,
             )
+        )
 
-    async def _async_update_pmo(self, _) -> None:  # noqa: ANN001
-        """Get the latest data."""
-        if self._node.node_type == SmartboxNodeType.PMO:
-            await self._node.update_power()
-            self.async_write_ha_state()
+    @property
+    def _poll_key(self) -> str:
+        return f"{self._node.node_id}_power"
+
+    @callback
+    def _power_update(self) -> None:
+        if self._adaptive_interval is not None:
+            power = self._node.parsed_status.power or 0.0
+            last, self._last_power = self._last_power, power
+            if last is not None and abs(power - last) > ADAPTIVE_POWER_CHANGE * max(
+                power, last
+            ):
+                interval = self._adaptive_interval.changed()
+            else:
+                interval = self._adaptive_interval.stable()
+            self._node.device.poller.async_set_interval(self._poll_key, interval)
+        self.async_write_ha_state()
+
+    def _heater_status_update(
+        self, node: SmartboxNode
+    ) -> Callable[[dict[str, Any]], None]:
+        heating = node.is_heating(node.status)
+
+        @callback
+        def _update(status: dict[str, Any]) -> None:
+            nonlocal heating
+            if (new_heating := node.is_heating(status)) != heating:
+                heating = new_heating
+                if self._adaptive_interval is not None:
+                    self._node.device.poller.async_set_interval(
+                        self._poll_key, self._adaptive_interval.changed()
+                    )
+
+        return _update
 
     @property
     def native_value(self) -> float:
@@ -223,14 +344,190 @@ class DutyCycleSensor(SmartboxSensorBase):
         return self._status["duty"]
 
 
-class TotalConsumptionSensor(SmartboxSensorBase):
+class AveragePowerSensor(SmartboxSensorBase):
+    """Smartbox average power sensor.
+
+    The average power drawn between the last two energy samples, so it
+    follows the real consumption with the delay of the samples. For 'htr'
+    nodes it can be estimated from the duty cycle and rated power instead.
+    """
+
+    _attr_key = "average_power"
+    device_class = SensorDeviceClass.POWER
+    native_unit_of_measurement = UnitOfPower.WATT
+    state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        node: SmartboxNode | MagicMock,
+        entry: SmartboxConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(node, entry)
+        self._attr_websocket_event = "samples"
+        self._from_duty = node.node_type == SmartboxNodeType.HTR and entry.options.get(
+            CONF_AVERAGE_POWER_DUTY, False
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        await super().async_added_to_hass()
+        if self._from_duty:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    f"{DOMAIN}_{self._node.node_id}_status",
+                    self._async_update,
+                )
+            )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the native value of the sensor."""
+        status = self._node.parsed_status
+        if (
+            self._from_duty
+            and isinstance(status, HeaterStatus)
+            and status.duty is not None
+            and status.power is not None
+        ):
+            return status.power * status.duty / 100
+        if (average_power := self._node.average_power) is None:
+            return None
+        return round(average_power, 1)
+
+
+class EnergyStatisticsMixin(ABC):
+    """Import the hourly consumption of an energy sensor into its statistics."""
+
+    _entry: SmartboxConfigEntry
+    hass: HomeAssistant
+    entity_id: str
+    unique_id: str
+    native_unit_of_measurement: str
+    async_on_remove: Callable[[Callable[[], None]], None]
+
+    async def _async_import_recent(
+        self, get_samples: Callable[[int, int], Awaitable[list[Sample]]]
+    ) -> None:
+        """Import the samples since the last import, within the last day."""
+        statistics_state = self._entry.runtime_data.statistics_state
+        samples_data = await get_samples(
+            statistics_state.import_start(
+                self.unique_id, int(time.time() - (24 * 60 * 60))
+            ),
+            int(time.time() + 3600),
+        )
+        self._import_samples(statistics_state.new_samples(self.unique_id, samples_data))
+
+    def _import_samples(self, samples_data: list[Sample]) -> None:
+        """Import samples into the statistics of the sensor."""
+        self._queue_statistics(samples_to_statistics(samples_data))
+        self._entry.runtime_data.statistics_state.set_imported(
+            self.unique_id, samples_data
+        )
+
+    def _queue_statistics(self, statistics: list[StatisticData]) -> None:
+        """Queue statistics of the sensor with the statistics coordinator."""
+        if not statistics:
+            return
+        statistic_id = f"{self.entity_id}"
+        metadata: StatisticMetaData = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            source=RECORDER_DOMAIN,
+            name=statistic_id,
+            statistic_id=statistic_id,
+            unit_of_measurement=self.native_unit_of_measurement,
+        )
+        self._entry.runtime_data.statistics_coordinator.async_queue(
+            metadata, statistics
+        )
+
+    def _add_statistics_repair(self) -> None:
+        """Add the sensor to the index used by the repair_statistics service."""
+        statistics_repairs = self._entry.runtime_data.statistics_repairs
+        statistics_repairs[self.entity_id] = self.async_repair_statistics
+        self.async_on_remove(lambda: statistics_repairs.pop(self.entity_id, None))
+
+    @abstractmethod
+    async def _async_history_samples(
+        self, start_time: int, end_time: int
+    ) -> list[Sample]:
+        """Return the samples between two timestamps, fetched from the API."""
+
+    async def async_repair_statistics(self, days: int) -> dict[str, int]:
+        """Import again the hours around the gaps in the statistics of the last days.
+
+        The hours are fetched again only around the gaps found, and only the
+        statistics differing from the recorded ones are imported. A counter
+        going down in the samples as well is a reset of the node, which cannot
+        be repaired, and is only reported.
+        """
+        end = dt.utcnow()
+        start = end - timedelta(days=days)
+        recorded = (
+            await get_instance(self.hass).async_add_executor_job(
+                statistics_during_period,
+                self.hass,
+                start,
+                end,
+                {self.entity_id},
+                "hour",
+                None,
+                {"sum", "state"},
+            )
+        ).get(self.entity_id, [])
+        gaps = find_statistics_gaps(recorded, start.timestamp(), end.timestamp())
+        recorded_values = {
+            statistic["start"]: (statistic["sum"], statistic["state"])
+            for statistic in recorded
+        }
+        repaired = resets = 0
+        for start_time, end_time in gaps:
+            with api_priority(ApiPriority.BACKFILL):
+                samples = await self._async_history_samples(start_time, end_time)
+            statistics = samples_to_statistics(samples)
+            resets += sum(
+                1
+                for previous, statistic in pairwise(statistics)
+                if statistic["state"] < previous["state"]
+            )
+            changed = [
+                statistic
+                for statistic in statistics
+                if recorded_values.get(statistic["start"].timestamp())
+                != (statistic["sum"], statistic["state"])
+            ]
+            self._queue_statistics(changed)
+            repaired += len(changed)
+        _LOGGER.debug(
+            "Repaired %d statistics in %d gaps of %s",
+            repaired,
+            len(gaps),
+            self.entity_id,
+        )
+        return {"gaps": len(gaps), "repaired": repaired, "resets": resets}
+
+
+class TotalConsumptionSensor(EnergyStatisticsMixin, SmartboxSensorBase):
     """Smartbox heater energy sensor: Represents the energy consumed by the heater in total."""
 
     _attr_key = "total_consumption"
     device_class = SensorDeviceClass.ENERGY
     native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
     state_class = SensorStateClass.TOTAL_INCREASING
-    _attr_should_poll = True
+
+    def __init__(
+        self,
+        node: SmartboxNode | MagicMock,
+        entry: SmartboxConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(node, entry)
+        # counter at the last check, the recorder is only queried again once
+        # unknown or after the counter went down
+        self._last_counter: float | None = None
 
     @property
     def native_value(self) -> float | None:
@@ -240,30 +537,94 @@ class TotalConsumptionSensor(SmartboxSensorBase):
     async def async_update(self) -> None:
         """Get the latest data."""
         await self._node.update_samples()
+        await self._async_samples_updated()
+
+    @callback
+    def _samples_update(self) -> None:
+        """Handle the samples polled for the node."""
+        self.config_entry.async_create_task(
+            self.hass, self._async_polled_update(), name=f"Samples - {self.name}"
+        )
+
+    async def _async_polled_update(self) -> None:
+        await self._async_samples_updated()
+        self.async_write_ha_state()
+
+    async def _async_samples_updated(self) -> None:
+        """Update the consumption derived from the samples of the node."""
         self._attr_state = self._node.total_energy
+        rollups = self._entry.runtime_data.rollups
+        now = int(time.time())
+        rollups.add_samples(
+            self._node,
+            await self._node.sample_cache.get_samples(
+                max(rollups.start_time(self._node), now - SAMPLE_CACHE_RETENTION), now
+            ),
+        )
+        # for the average power, the energy totals and the daily and monthly
+        # consumption of the node, device and home
+        async_dispatcher_send(
+            self.hass, f"{DOMAIN}_{self._node.node_id}_samples", self._node
+        )
         await self._adjust_short_term_statistics()
 
     async def async_added_to_hass(self) -> None:
         """When added to hass."""
-        # perform initial statistics import when sensor is added, otherwise it would take
-        # 1 day when _handle_coordinator_update is triggered for the first time.
         self._available = True
-        await self.update_statistics()
-        await self._adjust_short_term_statistics()
         await super().async_added_to_hass()
+        # perform initial statistics import when sensor is added, otherwise it would take
+        # 15 minutes for the first update. It may download years of history, so
+        # it runs in the background, and is cancelled when the entry is unloaded.
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_initial_statistics(),
+            name=f"Initial statistics - {self.name}",
+        )
+        # the samples are polled with the other fetches of the device
         self.async_on_remove(
-            async_track_time_interval(
-                self.hass,
-                self.update_statistics,
-                timedelta(minutes=15),
-                name=f"Update statistics - {self.name}",
-                cancel_on_shutdown=True,
+            self._node.device.poller.async_add_listener(
+                f"{self._node.node_id}_samples",
+                SCAN_INTERVAL.total_seconds(),
+                self._node.update_samples,
+                self._samples_update,
+            )
+        )
+        # then every 15 minutes, with the other sensors of the entry
+        self.async_on_remove(
+            self.config_entry.runtime_data.statistics_coordinator.async_add_update(
+                self.entity_id, self.update_statistics
             )
         )
+        self._add_statistics_repair()
+        # for the export_consumption service
+        consumption_entities = self._entry.runtime_data.consumption_entities
+        consumption_entities[self.entity_id] = self._node
+        self.async_on_remove(lambda: consumption_entities.pop(self.entity_id, None))
+
+    async def _async_initial_statistics(self) -> None:
+        """Import the statistics for the first time."""
+        try:
+            await self.update_statistics()
+        except (SmartboxError, APIUnavailableError) as ex:
+            _LOGGER.warning(
+                "Failed to import the statistics of %s, retrying on the next update: %s",
+                self.name,
+                ex,
+            )
+        await self._adjust_short_term_statistics()
 
     async def _adjust_short_term_statistics(self) -> None:
         """Adjust the short term statistics for the sensor."""
+        total_energy = self._node.total_energy
         if (
+            self._last_counter is not None
+            and total_energy is not None
+            and float(total_energy) >= self._last_counter
+        ):
+            # the recorder keeps the sum in step with an increasing counter
+            self._last_counter = float(total_energy)
+            return
+        if not (
             last_stat := await get_instance(self.hass).async_add_executor_job(
                 get_last_short_term_statistics,
                 self.hass,
@@ -272,72 +633,368 @@ class TotalConsumptionSensor(SmartboxSensorBase):
                 True,  # noqa: FBT003
                 {"sum", "state"},
             )
-        ) and (
-            last_stat[self.entity_id][0]["sum"] != last_stat[self.entity_id][0]["state"]
         ):
+            return
+        last_sum = last_stat[self.entity_id][0]["sum"]
+        last_state = last_stat[self.entity_id][0]["state"]
+        if last_sum != last_state:
             get_instance(self.hass).async_adjust_statistics(
                 statistic_id=self.entity_id,
                 start_time=datetime.fromtimestamp(
                     last_stat[self.entity_id][0]["start"], tz.tzlocal()
                 ),
-                sum_adjustment=last_stat[self.entity_id][0]["state"]
-                - last_stat[self.entity_id][0]["sum"],
+                sum_adjustment=last_state - last_sum,
                 adjustment_unit=self.native_unit_of_measurement,
             )
+        self._last_counter = (
+            float(total_energy) if total_energy is not None else last_state
+        )
 
-    async def update_statistics(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003, ARG002
+    async def update_statistics(self) -> None:
         """Update statistics from samples."""
         history_status = HistoryConsumptionStatus(
             self.config_entry.options.get(
                 CONF_HISTORY_CONSUMPTION, HistoryConsumptionStatus.START
             )
         )
-        statistic_id = f"{self.entity_id}"
-        samples_data = []
+        runtime_data = self.config_entry.runtime_data
         if history_status == HistoryConsumptionStatus.START:
             # last 3 years
-            for year in (3, 2, 1):
-                year_sample = await self._node.get_samples(
-                    int(time.time() - (year * 365 * 24 * 60 * 60)),
-                    int(time.time() - ((year - 1) * 365 * 24 * 60 * 60 - 3600)),
+            await runtime_data.backfill.async_backfill(self._node, self._import_samples)
+            if runtime_data.backfill.complete(runtime_data.nodes):
+                runtime_data.statistics_state.clear_backfill()
+                self.hass.config_entries.async_update_entry(
+                    entry=self.config_entry,
+                    options={
+                        **self.config_entry.options,
+                        CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
+                    },
                 )
-                samples_data.extend(year_sample)
-            self.hass.config_entries.async_update_entry(
-                entry=self.config_entry,
-                options={
-                    **self.config_entry.options,
-                    CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
-                },
-            )
         elif history_status == HistoryConsumptionStatus.AUTO:
-            # last day
-            samples_data = await self._node.get_samples(
-                int(time.time() - (24 * 60 * 60)),
-                int(time.time() + 3600),
+            # shared with the energy sensor through the sample cache
+            await self._async_import_recent(self._node.sample_cache.get_samples)
+
+    async def _async_history_samples(
+        self, start_time: int, end_time: int
+    ) -> list[Sample]:
+        """Return the samples of the node between two timestamps."""
+        return await self._node.get_samples(start_time, end_time)
+
+
+class EnergyTotalSensor(EnergyStatisticsMixin, SmartBoxDeviceEntity, SensorEntity):
+    """Base class for the energy consumed by a group of nodes in total."""
+
+    _attr_websocket_event = "samples"
+    device_class = SensorDeviceClass.ENERGY
+    native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
+    state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(
+        self,
+        devices: list[SmartboxDevice],
+        nodes: list[SmartboxNode],
+        entry: SmartboxConfigEntry,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(devices[0], entry)
+        self._total = EnergyTotal(nodes)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the native value of the sensor."""
+        return self._total.total
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        for node in self._total.nodes:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    f"{DOMAIN}_{node.node_id}_{self._attr_websocket_event}",
+                    self._async_update,
+                )
+            )
+        self.async_on_remove(
+            self._entry.runtime_data.statistics_coordinator.async_add_update(
+                self.entity_id, self.update_statistics
             )
+        )
+        self._add_statistics_repair()
+
+    @callback
+    def _async_update(self, node: SmartboxNode) -> None:
+        """Update the total with the counter of a node."""
+        if self._total.update(node):
+            self.async_write_ha_state()
+
+    async def update_statistics(self) -> None:
+        """Update the statistics from the samples of the nodes."""
+        # the history is backfilled for each node
+        if (
+            self._entry.options.get(CONF_HISTORY_CONSUMPTION)
+            == HistoryConsumptionStatus.AUTO
+        ):
+            await self._async_import_recent(self._async_get_samples)
 
-        samples_data = sorted(samples_data, key=lambda x: x["t"])
-        statistics: list[StatisticData] = []
-        for entry in samples_data:
-            counter = float(entry["counter"])
-            start = datetime.fromtimestamp(entry["t"], tz.tzlocal()) - timedelta(
-                hours=1
+    async def _async_get_samples(self, start_time: int, end_time: int) -> list[Sample]:
+        """Return the total of the cached samples of the nodes.
+
+        The samples are fetched by the energy sensor of each node, the hours
+        not cached yet for all the nodes are imported on a later update.
+        """
+        return sum_samples(
+            [
+                node.sample_cache.cached_samples(start_time, end_time)
+                for node in self._total.nodes
+            ]
+        )
+
+    async def _async_history_samples(
+        self, start_time: int, end_time: int
+    ) -> list[Sample]:
+        """Return the total of the samples of the nodes between two timestamps."""
+        return sum_samples(
+            await asyncio.gather(
+                *(node.get_samples(start_time, end_time) for node in self._total.nodes)
             )
-            if start.minute == 0:
-                statistics.append(
-                    StatisticData(start=start, sum=counter, state=counter)
+        )
+
+
+class DeviceTotalConsumptionSensor(EnergyTotalSensor):
+    """Smartbox energy consumed by the heaters of a device in total."""
+
+    _attr_key = "device_total_consumption"
+
+    def __init__(self, device: SmartboxDevice, entry: SmartboxConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__([device], consumption_nodes(device.get_nodes()), entry)
+
+
+class HomeEntityMixin:
+    """Entity of a home, the devices of the home being grouped under it."""
+
+    _attr_key: str
+    _home: dict[str, Any]
+    _reseller: Any
+
+    @property
+    def unique_id(self) -> str:
+        """Return Unique ID string."""
+        return f"{self._home['id']}_{self._attr_key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info of the home."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._home["id"])},
+            name=self._home["name"],
+            manufacturer=self._reseller.name,
+        )
+
+
+class HomeTotalConsumptionSensor(HomeEntityMixin, EnergyTotalSensor):
+    """Smartbox energy consumed by all the nodes of a home in total."""
+
+    _attr_key = "home_total_consumption"
+
+    def __init__(
+        self, devices: list[SmartboxDevice], entry: SmartboxConfigEntry
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(
+            devices,
+            consumption_nodes(
+                [node for device in devices for node in device.get_nodes()]
+            ),
+            entry,
+        )
+        self._home = devices[0].home
+
+
+ROLLUP_KEYS = {
+    RollupPeriod.DAY: "daily_consumption",
+    RollupPeriod.MONTH: "monthly_consumption",
+}
+
+
+class ConsumptionRollupMixin:
+    """Consumption of a node, device or home in the current day or month."""
+
+    _entry: SmartboxConfigEntry
+    _rollup_key: str
+    _period: RollupPeriod
+    device_class = SensorDeviceClass.ENERGY
+    native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
+    state_class = SensorStateClass.TOTAL
+    suggested_display_precision = 0
+
+    @property
+    def native_value(self) -> float:
+        """Return the consumption of the current day or month."""
+        return self._entry.runtime_data.rollups.value(
+            self._rollup_key, self._period, dt.now()
+        )
+
+    @property
+    def last_reset(self) -> datetime:
+        """Return the start of the current day or month."""
+        return period_start(self._period, dt.now())
+
+
+class NodeConsumptionRollupSensor(ConsumptionRollupMixin, SmartboxSensorBase):
+    """Smartbox energy consumed by a node in the current day or month."""
+
+    def __init__(
+        self,
+        node: SmartboxNode | MagicMock,
+        entry: SmartboxConfigEntry,
+        period: RollupPeriod,
+    ) -> None:
+        """Initialize the sensor."""
+        self._attr_key = ROLLUP_KEYS[period]
+        super().__init__(node, entry)
+        self._attr_websocket_event = "samples"
+        self._period = period
+        self._rollup_key = node.node_id
+
+
+class GroupConsumptionRollupSensor(
+    ConsumptionRollupMixin, SmartBoxDeviceEntity, SensorEntity
+):
+    """Base class for the energy consumed by a group of nodes in a day or month."""
+
+    _attr_websocket_event = "samples"
+    _attr_key_prefix: str
+
+    def __init__(
+        self,
+        devices: list[SmartboxDevice],
+        nodes: list[SmartboxNode],
+        entry: SmartboxConfigEntry,
+        period: RollupPeriod,
+    ) -> None:
+        """Initialize the sensor."""
+        self._attr_key = f"{self._attr_key_prefix}_{ROLLUP_KEYS[period]}"
+        super().__init__(devices[0], entry)
+        self._nodes = nodes
+        self._period = period
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks."""
+        for node in self._nodes:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass,
+                    f"{DOMAIN}_{node.node_id}_{self._attr_websocket_event}",
+                    self._async_update,
                 )
-        if statistics and history_status != HistoryConsumptionStatus.OFF:
-            metadata: StatisticMetaData = StatisticMetaData(
-                has_mean=False,
-                has_sum=True,
-                source=RECORDER_DOMAIN,
-                name=statistic_id,
-                statistic_id=statistic_id,
-                unit_of_measurement=self.native_unit_of_measurement,
             )
-            _LOGGER.debug("Insert statistics: %s %s", metadata, statistics)
-            async_import_statistics(self.hass, metadata, statistics)
+
+    @callback
+    def _async_update(self, _node: SmartboxNode) -> None:
+        """Update the consumption."""
+        self.async_write_ha_state()
+
+
+class DeviceConsumptionRollupSensor(GroupConsumptionRollupSensor):
+    """Smartbox energy consumed by all the nodes of a device in a day or month."""
+
+    _attr_key_prefix = "device"
+
+    def __init__(
+        self, device: SmartboxDevice, entry: SmartboxConfigEntry, period: RollupPeriod
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__([device], consumption_nodes(device.get_nodes()), entry, period)
+        self._rollup_key = device.dev_id
+
+
+class HomeConsumptionRollupSensor(HomeEntityMixin, GroupConsumptionRollupSensor):
+    """Smartbox energy consumed by all the nodes of a home in a day or month."""
+
+    _attr_key_prefix = "home"
+
+    def __init__(
+        self,
+        devices: list[SmartboxDevice],
+        entry: SmartboxConfigEntry,
+        period: RollupPeriod,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(
+            devices,
+            consumption_nodes(
+                [node for device in devices for node in device.get_nodes()]
+            ),
+            entry,
+            period,
+        )
+        self._home = devices[0].home
+        self._rollup_key = self._home["id"]
+
+
+class HistoryImportSensor(SmartBoxDeviceEntity, SensorEntity):
+    """Smartbox consumption history import progress."""
+
+    _attr_key = "history_import"
+    _attr_websocket_event = "backfill"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = PERCENTAGE
+
+    @property
+    def native_value(self) -> int:
+        """Return the percentage of the consumption history imported."""
+        return self._entry.runtime_data.backfill.progress(self._device.get_nodes())
+
+    @callback
+    def _async_update(self) -> None:  # type: ignore[override]
+        """Update the progress."""
+        self.async_write_ha_state()
+
+
+class ApiBudgetSensor(SmartBoxDeviceEntity, SensorEntity):
+    """Smartbox share of the request budget of the reseller used in the last minute."""
+
+    _attr_key = "api_budget"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    async def async_added_to_hass(self) -> None:
+        """Refresh the budget use periodically, it is not sent by the socket."""
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass,
+                self._async_refresh,
+                timedelta(seconds=BUDGET_SENSOR_INTERVAL),
+                name=f"Update API budget - {self.name}",
+                cancel_on_shutdown=True,
+            )
+        )
+
+    @callback
+    def _async_refresh(self, _now: datetime) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the percentage of the budget used by all the entries."""
+        share = self._entry.runtime_data.client.budget
+        if share is None or share.budget.rate <= 0:
+            return None
+        return round(100 * share.budget.used() / share.budget.rate, 1)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, int]:
+        """Return the budget and the requests sent in the last minute."""
+        if (share := self._entry.runtime_data.client.budget) is None:
+            return {}
+        return {
+            "budget": share.budget.rate,
+            "requests": share.budget.used(),
+            "entry_requests": share.used(),
+            "waiting": share.budget.waiting,
+        }
 
 
 class ChargeLevelSensor(SmartboxSensorBase):
@@ -0,0 +1,397 @@
+"""Services for the Smartbox integration."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from functools import partial
+import logging
+from typing import Any
+
+from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    PRESET_ACTIVITY,
+    PRESET_BOOST,
+    PRESET_COMFORT,
+    PRESET_ECO,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_TEMPERATURE
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, Unauthorized, UnknownUser
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .const import (
+    ATTR_DAYS,
+    ATTR_DURATION,
+    ATTR_END,
+    ATTR_FILENAME,
+    ATTR_FORMAT,
+    ATTR_OVERWRITE,
+    ATTR_SETUP,
+    ATTR_START,
+    ATTR_STATUS,
+    DOMAIN,
+    PRESET_FROST,
+    PRESET_SCHEDULE,
+    PRESET_SELF_LEARN,
+    SERVICE_BULK_APPLY,
+    SERVICE_EXPORT_CONSUMPTION,
+    SERVICE_REPAIR_STATISTICS,
+    SERVICE_SET_BOOST_PARAMS,
+)
+from .export import ExportFormat, async_export_consumption, export_path
+from .models import (
+    SmartboxNode,
+    StatusDict,
+    set_hvac_mode_args,
+    set_preset_mode_status_update,
+    set_temperature_args,
+)
+from .statistics import REPAIR_DAYS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Nodes updated at the same time by a service call
+MAX_CONCURRENT_NODES = 10
+
+SET_BOOST_PARAMS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+            vol.Optional(ATTR_DURATION): vol.Coerce(int),
+            **(cv.ENTITY_SERVICE_FIELDS),
+        },
+    ),
+    cv.has_at_least_one_key(ATTR_TEMPERATURE, ATTR_DURATION),
+)
+
+BULK_APPLY_PRESETS = [
+    PRESET_ACTIVITY,
+    PRESET_BOOST,
+    PRESET_COMFORT,
+    PRESET_ECO,
+    PRESET_FROST,
+    PRESET_SCHEDULE,
+    PRESET_SELF_LEARN,
+]
+BULK_APPLY_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_PRESET_MODE): vol.In(BULK_APPLY_PRESETS),
+            vol.Optional(ATTR_HVAC_MODE): vol.In(
+                [HVACMode.AUTO, HVACMode.HEAT, HVACMode.OFF]
+            ),
+            vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+            vol.Optional(ATTR_STATUS): dict,
+            vol.Optional(ATTR_SETUP): dict,
+            **(cv.ENTITY_SERVICE_FIELDS),
+        },
+    ),
+    cv.has_at_least_one_key(
+        ATTR_PRESET_MODE, ATTR_HVAC_MODE, ATTR_TEMPERATURE, ATTR_STATUS, ATTR_SETUP
+    ),
+)
+
+REPAIR_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DAYS, default=REPAIR_DAYS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=3 * 365)
+        ),
+        **(cv.ENTITY_SERVICE_FIELDS),
+    },
+)
+
+EXPORT_CONSUMPTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FORMAT, default=ExportFormat.CSV): vol.Coerce(ExportFormat),
+        vol.Optional(ATTR_FILENAME): cv.string,
+        vol.Optional(ATTR_OVERWRITE, default=False): cv.boolean,
+        **(cv.ENTITY_SERVICE_FIELDS),
+    },
+)
+
+type StatisticsRepair = Callable[[int], Awaitable[dict[str, int]]]
+
+
+def _boost_entities(hass: HomeAssistant) -> dict[str, tuple[SmartboxNode, str]]:
+    """Return the node and extra option of each boost entity, by entity_id."""
+    index: dict[str, tuple[SmartboxNode, str]] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            index.update(entry.runtime_data.boost_entities)
+    return index
+
+
+def _climate_entities(hass: HomeAssistant) -> dict[str, SmartboxNode]:
+    """Return the node of each climate entity, by entity_id."""
+    index: dict[str, SmartboxNode] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            index.update(entry.runtime_data.climate_entities)
+    return index
+
+
+def _statistics_repairs(hass: HomeAssistant) -> dict[str, StatisticsRepair]:
+    """Return the statistics repair of each energy sensor, by entity_id."""
+    index: dict[str, StatisticsRepair] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            index.update(entry.runtime_data.statistics_repairs)
+    return index
+
+
+def _consumption_entities(hass: HomeAssistant) -> dict[str, SmartboxNode]:
+    """Return the node of each total consumption sensor, by entity_id."""
+    index: dict[str, SmartboxNode] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            index.update(entry.runtime_data.consumption_entities)
+    return index
+
+
+def _selected_entity_ids(hass: HomeAssistant, call: ServiceCall) -> set[str]:
+    """Return the entities targeted by a service call, including areas and devices."""
+    selected = async_extract_referenced_entity_ids(hass, call)
+    return selected.referenced | selected.indirectly_referenced
+
+
+async def run_concurrently[T](
+    items: Iterable[T],
+    action: Callable[[T], Awaitable[Any]],
+) -> list[Any]:
+    """Run an action on each item, a few at a time, returning results or errors."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_NODES)
+
+    async def _run(item: T) -> Any:  # noqa: ANN401
+        async with semaphore:
+            return await action(item)
+
+    return await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
+
+
+async def handle_set_boost_params(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Set the boost temperature and duration of the targeted nodes."""
+    values = {
+        "boost_temp": (
+            str(call.data[ATTR_TEMPERATURE]) if ATTR_TEMPERATURE in call.data else None
+        ),
+        "boost_time": call.data.get(ATTR_DURATION),
+    }
+    index = _boost_entities(hass)
+    options: dict[SmartboxNode, dict[str, Any]] = {}
+    for entity_id in _selected_entity_ids(hass, call):
+        if (boost_entity := index.get(entity_id)) is None:
+            continue
+        node, option = boost_entity
+        if (value := values[option]) is not None:
+            options.setdefault(node, {})[option] = value
+
+    results = await run_concurrently(
+        options.items(), lambda item: item[0].set_extra_options(item[1])
+    )
+    failed = []
+    for node, result in zip(options, results, strict=True):
+        if isinstance(result, Exception):
+            _LOGGER.error(
+                "Failed to set the boost parameters of %s: %s", node.name, result
+            )
+            failed.append(node.name)
+    if failed:
+        msg = f"Failed to set the boost parameters of {', '.join(failed)}"
+        raise HomeAssistantError(msg)
+
+
+def bulk_status_args(node: SmartboxNode, data: dict[str, Any]) -> StatusDict:
+    """Return the status update of a node for a bulk_apply service call."""
+    status_args: dict[str, Any] = {}
+    if (hvac_mode := data.get(ATTR_HVAC_MODE)) is not None:
+        status_args |= set_hvac_mode_args(node.node_type, node.status, hvac_mode)
+        if node.boost:
+            status_args["boost"] = False
+    if (preset_mode := data.get(ATTR_PRESET_MODE)) is not None:
+        if preset_mode == PRESET_BOOST:
+            status_args["boost"] = True
+        else:
+            status_args |= set_preset_mode_status_update(
+                node.node_type, node.status | status_args, preset_mode
+            )
+    if (temperature := data.get(ATTR_TEMPERATURE)) is not None:
+        # The temperature depends on the preset selected above
+        status_args |= set_temperature_args(
+            node.node_type, node.status | status_args, temperature
+        )
+    return status_args | data.get(ATTR_STATUS, {})
+
+
+async def handle_bulk_apply(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Apply the same settings to all the targeted heaters."""
+    index = _climate_entities(hass)
+    targets = {
+        entity_id: index[entity_id]
+        for entity_id in sorted(_selected_entity_ids(hass, call))
+        if entity_id in index
+    }
+
+    async def _apply(node: SmartboxNode) -> None:
+        if status_args := bulk_status_args(node, call.data):
+            await node.set_status(**status_args)
+        if setup_args := call.data.get(ATTR_SETUP):
+            await node.set_setup(**setup_args)
+
+    results = await run_concurrently(targets.values(), _apply)
+    report: dict[str, Any] = {}
+    for (entity_id, node), result in zip(targets.items(), results, strict=True):
+        if isinstance(result, Exception):
+            _LOGGER.error("Failed to apply settings to %s: %s", node.name, result)
+            report[entity_id] = {"success": False, "error": str(result)}
+        else:
+            report[entity_id] = {"success": True}
+    return {
+        "succeeded": sum(1 for r in report.values() if r["success"]),
+        "failed": sum(1 for r in report.values() if not r["success"]),
+        "nodes": report,
+    }
+
+
+async def repair_statistics(
+    repairs: dict[str, StatisticsRepair], days: int
+) -> dict[str, Any]:
+    """Repair the statistics of energy sensors and report the result of each one."""
+    results = await run_concurrently(repairs.values(), lambda repair: repair(days))
+    report: dict[str, Any] = {}
+    for entity_id, result in zip(repairs, results, strict=True):
+        if isinstance(result, Exception):
+            _LOGGER.error(
+                "Failed to repair the statistics of %s: %s", entity_id, result
+            )
+            report[entity_id] = {"success": False, "error": str(result)}
+        else:
+            report[entity_id] = {"success": True, **result}
+    return report
+
+
+async def handle_repair_statistics(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Repair the statistics of the targeted energy sensors, or all of them."""
+    index = _statistics_repairs(hass)
+    if any(str(key) in call.data for key in cv.ENTITY_SERVICE_FIELDS):
+        selected = _selected_entity_ids(hass, call)
+        index = {
+            entity_id: repair
+            for entity_id, repair in index.items()
+            if entity_id in selected
+        }
+    repairs = dict(sorted(index.items()))
+    return {"sensors": await repair_statistics(repairs, call.data[ATTR_DAYS])}
+
+
+async def _async_check_admin(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Refuse the calls of the users who are not administrators.
+
+    As async_register_admin_service does, which cannot return a response.
+    """
+    if call.context.user_id:
+        user = await hass.auth.async_get_user(call.context.user_id)
+        if user is None:
+            raise UnknownUser(context=call.context)
+        if not user.is_admin:
+            raise Unauthorized(context=call.context)
+
+
+async def handle_export_consumption(
+    hass: HomeAssistant, call: ServiceCall
+) -> ServiceResponse:
+    """Export the hourly consumption of the targeted nodes, or all of them."""
+    await _async_check_admin(hass, call)
+    index = _consumption_entities(hass)
+    if any(str(key) in call.data for key in cv.ENTITY_SERVICE_FIELDS):
+        selected = _selected_entity_ids(hass, call)
+        index = {
+            entity_id: node
+            for entity_id, node in index.items()
+            if entity_id in selected
+        }
+    nodes = [index[entity_id] for entity_id in sorted(index)]
+    file_format: ExportFormat = call.data[ATTR_FORMAT]
+    start = dt_util.as_utc(call.data[ATTR_START])
+    end = dt_util.as_utc(call.data.get(ATTR_END) or dt_util.utcnow())
+    if end <= start:
+        msg = "The end of the export must be after its start"
+        raise HomeAssistantError(msg)
+    path = await hass.async_add_executor_job(
+        partial(
+            export_path,
+            hass,
+            call.data.get(ATTR_FILENAME, f"smartbox_consumption.{file_format}"),
+            overwrite=call.data[ATTR_OVERWRITE],
+        )
+    )
+    return await async_export_consumption(
+        hass,
+        nodes,
+        int(start.timestamp()),
+        int(end.timestamp()),
+        path=path,
+        file_format=file_format,
+    )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Smartbox services."""
+
+    async def _async_set_boost_params(call: ServiceCall) -> None:
+        await handle_set_boost_params(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        _async_set_boost_params,
+        schema=SET_BOOST_PARAMS_SCHEMA,
+    )
+
+    async def _async_bulk_apply(call: ServiceCall) -> ServiceResponse:
+        return await handle_bulk_apply(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_APPLY,
+        _async_bulk_apply,
+        schema=BULK_APPLY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_repair_statistics(call: ServiceCall) -> ServiceResponse:
+        return await handle_repair_statistics(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPAIR_STATISTICS,
+        _async_repair_statistics,
+        schema=REPAIR_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_export_consumption(call: ServiceCall) -> ServiceResponse:
+        return await handle_export_consumption(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_CONSUMPTION,
+        _async_export_consumption,
+        schema=EXPORT_CONSUMPTION_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
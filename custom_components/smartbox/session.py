@@ -0,0 +1,125 @@
+"""Smartbox API session with request pacing."""
+
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Mapping
+from functools import partial
+from typing import Any
+from unittest.mock import MagicMock
+
+from smartbox import AsyncSmartboxSession
+
+from .retry import (
+    NO_RETRY,
+    READ_RETRY_POLICIES,
+    RetryPolicy,
+    RetryStats,
+    call_with_retry,
+)
+from .scheduler import ApiPriority, BudgetShare, RequestScheduler, current_api_priority
+
+_READ_METHODS = frozenset(
+    {
+        "get_device_away_status",
+        "get_device_connected",
+        "get_device_power_limit",
+        "get_devices",
+        "get_homes",
+        "get_node_samples",
+        "get_node_setup",
+        "get_node_status",
+        "get_nodes",
+    }
+)
+_WRITE_METHODS = frozenset(
+    {
+        "set_device_away_status",
+        "set_device_power_limit",
+        "set_node_setup",
+        "set_node_status",
+    }
+)
+# set_node_setup reads the current setup before posting the new one
+_REQUEST_COUNT = {"set_node_setup": 2}
+
+
+class SmartboxApiSession:
+    """Wrap an AsyncSmartboxSession to pace the requests sent to the API.
+
+    Writes are always sent with the user priority, reads with the priority
+    of the context they are made from. Once let through by the scheduler of
+    the entry, they also wait for the budget of the reseller when given.
+    Failed requests are retried as set by the retry policy of their endpoint.
+    Anything else is passed through to the wrapped session.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSmartboxSession | MagicMock,
+        scheduler: RequestScheduler,
+        retry_policies: Mapping[str, RetryPolicy] = READ_RETRY_POLICIES,
+        budget: BudgetShare | None = None,
+    ) -> None:
+        """Initialise the session."""
+        self._session = session
+        self._scheduler = scheduler
+        self._budget = budget
+        self._retry_policies = retry_policies
+        self.retry_stats: defaultdict[str, RetryStats] = defaultdict(RetryStats)
+
+    @property
+    def session(self) -> AsyncSmartboxSession | MagicMock:
+        """Return the wrapped session."""
+        return self._session
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Return the request scheduler."""
+        return self._scheduler
+
+    @property
+    def budget(self) -> BudgetShare | None:
+        """Return the share of the entry in the budget of its reseller."""
+        return self._budget
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        """Return the attribute of the wrapped session, paced if it is a request."""
+        attr = getattr(self._session, name)
+        if name in _WRITE_METHODS:
+            return partial(self._request, name, attr, ApiPriority.USER)
+        if name in _READ_METHODS:
+            return partial(self._request, name, attr, None)
+        return attr
+
+    async def _request(
+        self,
+        name: str,
+        method: Callable[..., Awaitable[Any]],
+        priority: ApiPriority | None,
+        *args: Any,  # noqa: ANN401
+        **kwargs: Any,  # noqa: ANN401
+    ) -> Any:  # noqa: ANN401
+        if priority is None:
+            priority = current_api_priority()
+
+        async def _send() -> Any:  # noqa: ANN401
+            # Each attempt waits for its own turn
+            await self._scheduler.acquire(priority, _REQUEST_COUNT.get(name, 1))
+            if self._budget is not None:
+                await self._budget.acquire(priority, _REQUEST_COUNT.get(name, 1))
+            return await method(*args, **kwargs)
+
+        return await call_with_retry(
+            name,
+            _send,
+            self._retry_policies.get(name, NO_RETRY),
+            self.retry_stats[name],
+        )
+
+
+def unwrap_session(
+    session: SmartboxApiSession | AsyncSmartboxSession | MagicMock,
+) -> AsyncSmartboxSession | MagicMock:
+    """Return the underlying AsyncSmartboxSession."""
+    if isinstance(session, SmartboxApiSession):
+        return session.session
+    return session
@@ -0,0 +1,362 @@
+"""Statistics import of the Smartbox energy counters."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timedelta, tzinfo
+import logging
+import math
+from typing import Any
+
+from homeassistant.components.recorder.models.statistics import (
+    StatisticData,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import async_import_statistics
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from smartbox.error import APIUnavailableError, SmartboxError
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+STORAGE_VERSION = 1
+# Seconds to wait before writing the statistics state to disk
+STORAGE_SAVE_DELAY = 30
+# Seconds fetched again before the last imported sample, for the hours the
+# API provides late or corrects afterwards
+IMPORT_OVERLAP = 2 * HOUR
+# Minutes of each hour the statistics of all the sensors are updated at
+UPDATE_MINUTES = (0, 15, 30, 45)
+# Seconds the statistics queued outside of an update wait for others
+FLUSH_DELAY = 10
+# Statistics queued above which they are imported straight away
+MAX_PENDING_STATISTICS = 50_000
+# Days of statistics scanned for gaps by default, and by the scheduled repair
+REPAIR_DAYS = 7
+# Time of the day the scheduled repair runs at, away from the updates
+REPAIR_HOUR = 3
+REPAIR_MINUTE = 5
+
+type Sample = dict[str, Any]
+
+
+def samples_to_statistics(
+    samples: Iterable[Sample], time_zone: tzinfo | None = None
+) -> list[StatisticData]:
+    """Convert the samples at the start of a local hour to hourly statistics.
+
+    A sample holds the counter at its timestamp, so it is the sum at the end of
+    the hour before. The samples are filtered on their epoch seconds, and the
+    datetimes are only built for the ones kept.
+    """
+    if time_zone is None:
+        time_zone = dt_util.get_default_time_zone()
+    # Only the part of the UTC offset below an hour moves the local hours
+    utc_offset = datetime.now(time_zone).utcoffset() or timedelta(0)
+    offset = int(utc_offset.total_seconds()) % HOUR
+    hourly = sorted(
+        (int(sample["t"]), float(sample["counter"]))
+        for sample in samples
+        if (int(sample["t"]) + offset) % HOUR == 0
+    )
+    fromtimestamp = datetime.fromtimestamp
+    return [
+        {"start": fromtimestamp(t - HOUR, time_zone), "sum": counter, "state": counter}
+        for t, counter in hourly
+    ]
+
+
+def find_statistics_gaps(
+    statistics: list[dict[str, Any]], start: float, end: float
+) -> list[tuple[int, int]]:
+    """Return the (start, end) timestamps of the anomalies of hourly statistics.
+
+    The statistics are imported with the counter as both the sum and the
+    state, so an anomaly is a missing hour, a sum or counter going down, or a
+    sum different from the counter. The hours missing between the start of the
+    window and the first statistic, or between the last statistic and the end
+    of the window, are gaps as well. Each range covers the hours on both sides
+    of the anomaly, and overlapping ranges are merged.
+    """
+    gaps: list[tuple[int, int]] = []
+
+    def _add(gap_start: float, gap_end: float) -> None:
+        if gaps and gap_start <= gaps[-1][1]:
+            gaps[-1] = (gaps[-1][0], max(gaps[-1][1], int(gap_end)))
+        else:
+            gaps.append((int(gap_start), int(gap_end)))
+
+    statistics = sorted(statistics, key=lambda s: s["start"])
+    if not statistics:
+        return [(int(start), int(end))]
+    if statistics[0]["start"] - start >= HOUR:
+        _add(start, statistics[0]["start"] + 2 * HOUR)
+    previous: dict[str, Any] | None = None
+    for statistic in statistics:
+        hour = statistic["start"]
+        if statistic["sum"] is None or statistic["sum"] != statistic["state"]:
+            _add(hour - HOUR, hour + 2 * HOUR)
+            # the hour after is covered, but not the ones missing after it
+            previous = statistic | {"sum": -math.inf, "state": -math.inf}
+            continue
+        if previous is not None and (
+            hour - previous["start"] > HOUR
+            or statistic["sum"] < previous["sum"]
+            or statistic["state"] < previous["state"]
+        ):
+            _add(previous["start"], hour + 2 * HOUR)
+        previous = statistic
+    # the hour after the last statistic is complete before the end
+    if end - statistics[-1]["start"] >= 2 * HOUR:
+        _add(statistics[-1]["start"], end)
+    return gaps
+
+
+class StatisticsState:
+    """Statistics import progress of a config entry, persisted across restarts.
+
+    For each energy sensor, the timestamp of the last imported sample is kept
+    with the counters of the samples in the overlap window before it, so that
+    only the new and changed samples are imported again. For each node being
+    backfilled, the history chunks to download and the ones already imported
+    are kept so that the backfill resumes after a restart.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialise the statistics state."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.statistics"
+        )
+        self._imported: dict[str, dict[str, Any]] = {}
+        self._backfill: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load the state from storage."""
+        if (data := await self._store.async_load()) is not None:
+            self._imported = data.get("imported", {})
+            self._backfill = data.get("backfill", {})
+
+    async def async_remove(self) -> None:
+        """Remove the state from storage."""
+        await self._store.async_remove()
+
+    def last_imported(self, key: str) -> int | None:
+        """Return the timestamp of the last sample imported for a sensor."""
+        if (imported := self._imported.get(key)) is None:
+            return None
+        return imported["t"]
+
+    def import_start(self, key: str, default: int) -> int:
+        """Return the timestamp to fetch the samples of a sensor from."""
+        if (last_imported := self.last_imported(key)) is None:
+            return default
+        return max(default, last_imported - IMPORT_OVERLAP)
+
+    def new_samples(self, key: str, samples: list[Sample]) -> list[Sample]:
+        """Return the samples not imported yet, or imported with another counter."""
+        if (imported := self._imported.get(key)) is None:
+            return samples
+        last_imported: int = imported["t"]
+        counters: dict[str, float] = imported["counters"]
+        return [
+            sample
+            for sample in samples
+            if sample["t"] > last_imported
+            or counters.get(str(int(sample["t"]))) != float(sample["counter"])
+        ]
+
+    def set_imported(self, key: str, samples: list[Sample]) -> None:
+        """Record the samples imported for a sensor."""
+        if not samples:
+            return
+        imported = self._imported.setdefault(key, {"t": 0, "counters": {}})
+        imported["t"] = max([imported["t"], *(int(s["t"]) for s in samples)])
+        window_start = imported["t"] - IMPORT_OVERLAP
+        imported["counters"] = {
+            t: counter
+            for t, counter in (
+                imported["counters"]
+                | {str(int(s["t"])): float(s["counter"]) for s in samples}
+            ).items()
+            if int(t) >= window_start
+        }
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def backfill_chunks(
+        self, key: str, chunks: list[tuple[int, int]]
+    ) -> list[tuple[int, int]]:
+        """Return the history chunks of a node still to import.
+
+        The chunks are recorded the first time, so that a resumed backfill
+        covers the same period.
+        """
+        backfill = self._backfill.setdefault(
+            key, {"chunks": [list(chunk) for chunk in chunks], "done": []}
+        )
+        done = set(backfill["done"])
+        return [(start, end) for start, end in backfill["chunks"] if start not in done]
+
+    def set_backfill_done(self, key: str, chunk: tuple[int, int]) -> None:
+        """Record a history chunk of a node as imported."""
+        self._backfill[key]["done"].append(chunk[0])
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def backfill_progress(self, keys: list[str]) -> tuple[int, int]:
+        """Return the number of history chunks imported and to import of nodes."""
+        done = total = 0
+        for key in keys:
+            if (backfill := self._backfill.get(key)) is not None:
+                done += len(backfill["done"])
+                total += len(backfill["chunks"])
+        return done, total
+
+    def backfill_complete(self, keys: list[str]) -> bool:
+        """Return whether the history of all the nodes has been imported."""
+        return all(
+            (backfill := self._backfill.get(key)) is not None
+            and len(backfill["done"]) == len(backfill["chunks"])
+            for key in keys
+        )
+
+    def clear_backfill(self) -> None:
+        """Forget the backfill progress, so the next backfill starts over."""
+        self._backfill = {}
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"imported": self._imported, "backfill": self._backfill}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the import progress as a dict."""
+        return {
+            "imported": {
+                key: imported["t"] for key, imported in self._imported.items()
+            },
+            "backfill": {
+                key: {"done": len(backfill["done"]), "total": len(backfill["chunks"])}
+                for key, backfill in self._backfill.items()
+            },
+        }
+
+
+class StatisticsCoordinator:
+    """Update and import the statistics of all the energy sensors of an entry.
+
+    The sensors are updated together at fixed minutes of the hour, and the
+    statistics they queue are sent to the recorder together once all of them
+    are done. The statistics queued outside of an update, by the initial
+    import or the backfill, are merged and sent shortly after.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialise the coordinator."""
+        self._hass = hass
+        self._updates: dict[str, Callable[[], Awaitable[None]]] = {}
+        self._pending: dict[
+            str, tuple[StatisticMetaData, dict[datetime, StatisticData]]
+        ] = {}
+        self._unsub_schedule: CALLBACK_TYPE | None = None
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.imports: int = 0
+        self.flushes: int = 0
+
+    @callback
+    def async_add_update(
+        self, statistic_id: str, update: Callable[[], Awaitable[None]]
+    ) -> CALLBACK_TYPE:
+        """Update the statistics of a sensor with the others, until removed."""
+        self._updates[statistic_id] = update
+        if self._unsub_schedule is None:
+            self._unsub_schedule = async_track_time_change(
+                self._hass, self._async_update, minute=UPDATE_MINUTES, second=0
+            )
+
+        @callback
+        def _remove() -> None:
+            self._updates.pop(statistic_id, None)
+            if not self._updates and self._unsub_schedule is not None:
+                self._unsub_schedule()
+                self._unsub_schedule = None
+
+        return _remove
+
+    async def _async_update(self, _now: datetime) -> None:
+        updates = dict(self._updates)
+        results = await asyncio.gather(
+            *(update() for update in updates.values()), return_exceptions=True
+        )
+        for statistic_id, result in zip(updates, results, strict=True):
+            if isinstance(result, SmartboxError | APIUnavailableError):
+                _LOGGER.warning(
+                    "Failed to update the statistics of %s: %s", statistic_id, result
+                )
+            elif isinstance(result, BaseException):
+                _LOGGER.error(
+                    "Error updating the statistics of %s",
+                    statistic_id,
+                    exc_info=result,
+                )
+        self.async_flush()
+
+    @callback
+    def async_queue(
+        self, metadata: StatisticMetaData, statistics: list[StatisticData]
+    ) -> None:
+        """Queue statistics to import with the others."""
+        _, queued = self._pending.setdefault(metadata["statistic_id"], (metadata, {}))
+        for statistic in statistics:
+            queued[statistic["start"]] = statistic
+        if self.pending >= MAX_PENDING_STATISTICS:
+            self.async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self._hass, FLUSH_DELAY, self._async_delayed_flush
+            )
+
+    @property
+    def pending(self) -> int:
+        """Return the number of statistics waiting to be imported."""
+        return sum(len(queued) for _, queued in self._pending.values())
+
+    @callback
+    def _async_delayed_flush(self, _now: datetime) -> None:
+        self._unsub_flush = None
+        self.async_flush()
+
+    @callback
+    def async_flush(self) -> None:
+        """Send the queued statistics to the recorder."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for metadata, queued in pending.values():
+            statistics = sorted(queued.values(), key=lambda s: s["start"])
+            _LOGGER.debug("Insert statistics: %s %s", metadata, statistics)
+            async_import_statistics(self._hass, metadata, statistics)
+            self.imports += 1
+        self.flushes += 1
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Import the queued statistics and stop updating them."""
+        self.async_flush()
+        if self._unsub_schedule is not None:
+            self._unsub_schedule()
+            self._unsub_schedule = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the import counters as a dict."""
+        return {
+            "sensors": len(self._updates),
+            "pending": self.pending,
+            "imports": self.imports,
+            "flushes": self.flushes,
+        }
@@ -0,0 +1,36 @@
+"""Websocket API of the Smartbox integration."""
+
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+import voluptuous as vol
+
+from .const import DOMAIN
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the Smartbox websocket commands."""
+    websocket_api.async_register_command(hass, websocket_consumption_rollups)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/consumption_rollups",
+        vol.Optional("key"): str,
+    }
+)
+@callback
+def websocket_consumption_rollups(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Return the daily and monthly consumption of a node, device or home, or all."""
+    rollups: dict[str, Any] = {}
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            rollups.update(entry.runtime_data.rollups.as_dict(msg.get("key")))
+    connection.send_result(msg["id"], rollups)
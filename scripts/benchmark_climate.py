@@ -0,0 +1,189 @@
+# ruff: noqa: INP001
+"""Benchmark the state of the climate entities.
+
+Run from the repository root with `python -m scripts.benchmark_climate`.
+"""
+
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from homeassistant.components.climate import (
+    PRESET_ACTIVITY,
+    PRESET_AWAY,
+    PRESET_BOOST,
+    PRESET_COMFORT,
+    PRESET_ECO,
+    PRESET_HOME,
+    HVACAction,
+    HVACMode,
+)
+from homeassistant.const import UnitOfTemperature
+from homeassistant.util.unit_system import METRIC_SYSTEM
+
+from custom_components.smartbox.climate import SmartboxHeater
+from custom_components.smartbox.const import (
+    PRESET_FROST,
+    PRESET_SCHEDULE,
+    PRESET_SELF_LEARN,
+    SmartboxNodeType,
+)
+from custom_components.smartbox.models import (
+    SmartboxNode,
+    _check_status_key,
+    get_hvac_mode,
+    get_target_temperature,
+    get_temperature_unit,
+)
+
+ENTITIES = 50
+UPDATES = 1000
+ROUNDS = 7
+# State writes of an entity for each status update: the socket update, and
+# the writes of the setup, away status and availability updates in between
+WRITES = (1, 3)
+
+
+class _LegacyHeater(SmartboxHeater):
+    """Heater with the properties from before the derived status was cached.
+
+    The bodies are those of the properties before the change, parsing the raw
+    status on each read.
+    """
+
+    @property
+    def temperature_unit(self) -> str:
+        unit = get_temperature_unit(self._status)
+        if unit is not None:
+            return unit
+        return UnitOfTemperature.CELSIUS
+
+    @property
+    def current_temperature(self) -> float:
+        return float(self._status["mtemp"])
+
+    @property
+    def target_temperature(self) -> float:
+        return get_target_temperature(self._node.node_type, self._status)
+
+    @property
+    def hvac_action(self) -> HVACAction | None:
+        if self._node.is_heating(self._status):
+            return HVACAction.HEATING
+        if (
+            self._node.status["mode"] == "off"
+            or (
+                self._node.node_type == SmartboxNodeType.HTR_MOD
+                and not self._node.status["on"]
+            )
+        ) and not self._node.boost:
+            return HVACAction.OFF
+        return HVACAction.IDLE
+
+    @property
+    def hvac_mode(self) -> HVACMode | None:
+        return get_hvac_mode(self._node.node_type, self._status)
+
+    @property
+    def preset_mode(self) -> str:  # noqa: PLR0911
+        if self._node.away:
+            return PRESET_AWAY
+        if self._node.boost:
+            return PRESET_BOOST
+        if self._node.node_type == SmartboxNodeType.HTR_MOD:
+            _check_status_key("mode", self._node.node_type, self._status)
+            mode = self._status["mode"]
+            if mode == "auto":
+                return PRESET_SCHEDULE
+            if mode == "presence":
+                return PRESET_ACTIVITY
+            if mode == "self_learn":
+                return PRESET_SELF_LEARN
+            if mode == "manual":
+                _check_status_key("selected_temp", self._node.node_type, self._status)
+                selected_temp = self._status["selected_temp"]
+                if selected_temp == "comfort":
+                    return PRESET_COMFORT
+                if selected_temp == "eco":
+                    return PRESET_ECO
+                if selected_temp == "ice":
+                    return PRESET_FROST
+                msg = f"Unexpected 'selected_temp' value {selected_temp}"
+                raise ValueError(msg)
+            msg = f"Unknown smartbox node mode {mode}"
+            raise ValueError(msg)
+        return PRESET_HOME
+
+
+def _heater(cls: type[SmartboxHeater]) -> SmartboxHeater:
+    node = SmartboxNode(
+        MagicMock(),
+        {"addr": 1, "name": "Heater", "type": SmartboxNodeType.HTR_MOD},
+        MagicMock(),
+        {
+            "mode": "manual",
+            "on": True,
+            "selected_temp": "eco",
+            "comfort_temp": "21.0",
+            "eco_offset": "3.5",
+            "ice_temp": "7.0",
+            "mtemp": "19.5",
+            "units": "C",
+            "active": True,
+            "locked": False,
+        },
+        {},
+        [],
+    )
+    node.device.away = False
+    heater = cls(node, MagicMock())
+    heater._status = node.status
+    heater.hass = SimpleNamespace(config=SimpleNamespace(units=METRIC_SYSTEM))
+    return heater
+
+
+def _write_state(heater: SmartboxHeater) -> None:
+    """Read the state and attributes, as a state write does."""
+    _ = (
+        heater.state,
+        heater.capability_attributes,
+        heater.state_attributes,
+        heater.extra_state_attributes,
+    )
+
+
+def _time(cls: type[SmartboxHeater], writes: int) -> float:
+    """Return the microseconds of the state writes of an entity per update."""
+    heaters = [_heater(cls) for _ in range(ENTITIES)]
+    elapsed = 0.0
+    for update in range(UPDATES):
+        mtemp = f"{19 + update % 20 / 10}"
+        for heater in heaters:
+            heater._node.update_status({"mtemp": mtemp})  # noqa: SLF001
+        started_at = time.perf_counter()
+        for heater in heaters:
+            for _ in range(writes):
+                _write_state(heater)
+        elapsed += time.perf_counter() - started_at
+    return elapsed / (ENTITIES * UPDATES) * 1e6
+
+
+def main() -> None:
+    """Time the state writes of the entities across status updates."""
+    for writes in WRITES:
+        print(f"{ENTITIES} entities x {UPDATES} updates x {writes} writes")  # noqa: T201
+        timings: dict[str, list[float]] = {"legacy": [], "cached": []}
+        # alternate the two, and keep the best round of each against the noise
+        for _ in range(ROUNDS):
+            timings["legacy"].append(_time(_LegacyHeater, writes))
+            timings["cached"].append(_time(SmartboxHeater, writes))
+        for name, rounds in timings.items():
+            print(  # noqa: T201
+                f"{name:>7}: best {min(rounds):.1f}us, median"
+                f" {statistics.median(rounds):.1f}us per update"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# ruff: noqa: INP001
+"""Benchmark the parsed status of the nodes against their raw status.
+
+Run from the repository root with `python -m scripts.benchmark_node_status`.
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Any
+
+from smartbox import SmartboxNodeType
+
+from custom_components.smartbox.node_status import parse_status
+
+NODES = 1000
+READS = 100
+
+STATUSES: dict[str, dict[str, Any]] = {
+    SmartboxNodeType.HTR: {
+        "mtemp": "19.2",
+        "stemp": "21.0",
+        "units": "C",
+        "sync_status": "ok",
+        "locked": False,
+        "active": True,
+        "power": "510",
+        "duty": 50,
+        "mode": "auto",
+        "boost": False,
+        "boost_end_min": 0,
+    },
+    SmartboxNodeType.HTR_MOD: {
+        "on": True,
+        "mtemp": "18.2",
+        "selected_temp": "comfort",
+        "comfort_temp": "20.3",
+        "eco_offset": "4",
+        "ice_temp": "7",
+        "units": "C",
+        "sync_status": "ok",
+        "locked": False,
+        "active": True,
+        "mode": "manual",
+        "power": "510",
+    },
+    SmartboxNodeType.ACM: {
+        "mtemp": "19.2",
+        "stemp": "21",
+        "units": "C",
+        "sync_status": "ok",
+        "locked": False,
+        "charging": True,
+        "charge_level": 2,
+        "power": "620",
+        "mode": "auto",
+    },
+    SmartboxNodeType.PMO: {"sync_status": "ok", "locked": False, "power": 2500},
+}
+
+
+def _size(build: Any) -> float:  # noqa: ANN401
+    """Return the bytes allocated by each of the objects built."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(i) for i in range(NODES)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return size / NODES
+
+
+def _time(read: Any) -> float:  # noqa: ANN401
+    """Return the microseconds of a read."""
+    started_at = time.perf_counter()
+    for _ in range(NODES * READS):
+        read()
+    return (time.perf_counter() - started_at) / (NODES * READS) * 1e6
+
+
+def main() -> None:
+    """Compare the size, parse and read times of each node type."""
+    for node_type, raw in STATUSES.items():
+        # as received from the socket or the API, a new dict each time
+        payload = json.dumps(raw)
+
+        def _raw(_: int, payload: str = payload) -> dict[str, Any]:
+            return json.loads(payload)
+
+        status = _raw(0)
+        parsed = parse_status(node_type, status)
+        raw_size = _size(_raw)
+        parsed_size = _size(
+            lambda i, node_type=node_type: parse_status(node_type, _raw(i))
+        )
+        parse = _time(
+            lambda node_type=node_type, status=status: parse_status(node_type, status)
+        )
+        raw_read = _time(lambda status=status: float(status["power"]))
+        parsed_read = _time(lambda parsed=parsed: parsed.power)
+        print(  # noqa: T201
+            f"{node_type:>7}: {raw_size:.0f} -> {parsed_size:.0f} bytes,"
+            f" parse {parse:.2f}us,"
+            f" power read {raw_read:.3f}us -> {parsed_read:.3f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
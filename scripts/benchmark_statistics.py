@@ -0,0 +1,57 @@
+# ruff: noqa: INP001
+"""Benchmark the conversion of the samples to statistics.
+
+Run from the repository root with `python -m scripts.benchmark_statistics`,
+with TZ set to the time zone to convert to.
+"""
+
+from datetime import datetime, timedelta
+import os
+import time
+from typing import Any
+
+from dateutil import tz
+from homeassistant.components.recorder.models.statistics import StatisticData
+from homeassistant.util import dt as dt_util
+
+from custom_components.smartbox.backfill import BACKFILL_YEARS
+from custom_components.smartbox.statistics import samples_to_statistics
+
+NODES = 50
+HOUR = 3600
+
+
+def legacy_samples_to_statistics(samples: list[dict[str, Any]]) -> list[StatisticData]:
+    """Convert the samples as the sensor did before samples_to_statistics."""
+    statistics = []
+    for entry in sorted(samples, key=lambda x: x["t"]):
+        counter = float(entry["counter"])
+        start = datetime.fromtimestamp(entry["t"], tz.tzlocal()) - timedelta(hours=1)
+        if start.minute == 0:
+            statistics.append(StatisticData(start=start, sum=counter, state=counter))
+    return statistics
+
+
+def main() -> None:
+    """Time both conversions on the history of a large installation."""
+    end = int(time.time()) // HOUR * HOUR
+    hours = BACKFILL_YEARS * 365 * 24
+    samples = [
+        {"t": end - (hours - h) * HOUR, "counter": f"{h * 150}"} for h in range(hours)
+    ]
+    # Home Assistant resolves its time zone with zoneinfo
+    time_zone = dt_util.get_time_zone(os.environ.get("TZ", "UTC"))
+    print(f"{NODES} nodes x {len(samples)} samples")  # noqa: T201
+    for name, convert in (
+        ("legacy", legacy_samples_to_statistics),
+        ("samples_to_statistics", lambda s: samples_to_statistics(s, time_zone)),
+    ):
+        started_at = time.perf_counter()
+        for _ in range(NODES):
+            statistics = convert(samples)
+        elapsed = time.perf_counter() - started_at
+        print(f"{name:>22}: {elapsed:.2f}s, {len(statistics)} statistics")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -50,6 +50,19 @@ def skip_notifications_fixture():
         yield
 
 
+# The consumption history backfill sends many requests when an entry is set
+# up, don't let the API rate limit slow the tests down.
+@pytest.fixture(name="no_api_rate_limit", autouse=True)
+def no_api_rate_limit_fixture():
+    """Lift the API rate limit."""
+    with (
+        patch("custom_components.smartbox.DEFAULT_API_RATE_LIMIT", 1_000_000),
+        patch("custom_components.smartbox.DEFAULT_API_BURST", 1_000_000),
+        patch("custom_components.smartbox.DEFAULT_API_BUDGET", 1_000_000),
+    ):
+        yield
+
+
 def _get_node_status(units: str) -> dict[str, Any]:
     data = deepcopy(MOCK_SMARTBOX_NODE_STATUS)
     if units == "F":
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import UTC, datetime
+from itertools import pairwise
+from unittest.mock import MagicMock
+
+from custom_components.smartbox.backfill import (
+    BACKFILL_CONCURRENCY,
+    HistoryBackfill,
+    history_chunks,
+)
+from custom_components.smartbox.statistics import StatisticsState
+
+
+def test_history_chunks():
+    now = datetime(2025, 2, 19, 12, 30, tzinfo=UTC)
+    chunks = history_chunks(now)
+    assert chunks[0] == (
+        int(datetime(2022, 2, 20, 12, 30, tzinfo=UTC).timestamp()),
+        int(datetime(2022, 3, 1, tzinfo=UTC).timestamp()),
+    )
+    assert chunks[1][0] == int(datetime(2022, 3, 1, tzinfo=UTC).timestamp())
+    assert chunks[-1] == (
+        int(datetime(2025, 2, 1, tzinfo=UTC).timestamp()),
+        int(now.timestamp()),
+    )
+    assert len(chunks) == 37
+    # contiguous
+    for (_, end), (start, _) in pairwise(chunks):
+        assert end == start
+
+
+async def test_history_backfill(hass, hass_storage):
+    state = StatisticsState(hass, "entry_1")
+    backfill = HistoryBackfill(hass, state)
+    running = 0
+    max_running = 0
+
+    async def get_samples(start, end):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return [{"t": end, "counter": 1}]
+
+    node = MagicMock(node_id="device_1_1")
+    node.get_samples = get_samples
+    imported = []
+
+    assert backfill.progress([node]) == 100
+    await backfill.async_backfill(node, imported.extend)
+    assert len(imported) == len(history_chunks(datetime.now(UTC)))
+    assert 1 < max_running <= BACKFILL_CONCURRENCY
+    assert backfill.complete([node])
+    assert backfill.progress([node]) == 100
+
+    # nothing left to download
+    imported.clear()
+    await backfill.async_backfill(node, imported.extend)
+    assert imported == []
+
+    # until the backfill is started over
+    state.clear_backfill()
+    assert not backfill.complete([node])
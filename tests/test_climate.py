@@ -1,5 +1,5 @@
 import logging
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, PropertyMock
 
 from homeassistant.components.climate import HVACAction, HVACMode
 from homeassistant.components.climate.const import (
@@ -31,7 +31,7 @@ from homeassistant.helpers.entity_component import async_update_entity
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.smartbox.climate import SmartboxHeater, get_hvac_mode
+from custom_components.smartbox.climate import SmartboxHeater
 from custom_components.smartbox.const import (
     DOMAIN,
     PRESET_FROST,
@@ -39,6 +39,8 @@ from custom_components.smartbox.const import (
     PRESET_SELF_LEARN,
     SmartboxNodeType,
 )
+from custom_components.smartbox.models import get_hvac_mode
+from custom_components.smartbox.node_status import parse_status
 
 from .mocks import (
     get_climate_entity_id,
@@ -912,6 +914,7 @@ def test_preset_mode(node_attributes, expected_preset):
 
     heater = SmartboxHeater(mock_node, MagicMock())
     heater._status = mock_node.status
+    mock_node.parsed_status = parse_status(mock_node.node_type, mock_node.status)
 
     assert heater.preset_mode == expected_preset
 
@@ -926,6 +929,7 @@ def test_preset_mode_invalid_selected_temp():
 
     heater = SmartboxHeater(mock_node, MagicMock())
     heater._status = mock_node.status
+    mock_node.parsed_status = parse_status(mock_node.node_type, mock_node.status)
     with pytest.raises(ValueError, match="Unexpected 'selected_temp' value"):
         _ = heater.preset_mode
 
@@ -940,6 +944,7 @@ def test_preset_mode_invalid_mode():
 
     heater = SmartboxHeater(mock_node, MagicMock())
     heater._status = mock_node.status
+    mock_node.parsed_status = parse_status(mock_node.node_type, mock_node.status)
 
     with pytest.raises(ValueError, match="Unknown smartbox node mode"):
         _ = heater.preset_mode
@@ -948,7 +953,14 @@ def test_preset_mode_invalid_mode():
 @pytest.mark.parametrize(
     ("node_attributes", "expected_action"),
     [
-        ({"is_heating": True}, HVACAction.HEATING),
+        ({"status": {"mode": "manual", "active": True}}, HVACAction.HEATING),
+        (
+            {
+                "status": {"mode": "manual", "charging": True},
+                "node_type": SmartboxNodeType.ACM,
+            },
+            HVACAction.HEATING,
+        ),
         (
             {
                 "status": {"mode": "off"},
@@ -986,14 +998,43 @@ def test_preset_mode_invalid_mode():
 def test_hvac_action(node_attributes, expected_action):
     """Test the hvac_action property."""
     mock_node = MagicMock()
-    mock_node.is_heating = MagicMock(
-        return_value=node_attributes.get("is_heating", False)
-    )
     mock_node.status = node_attributes.get("status", {})
     mock_node.node_type = node_attributes.get("node_type", SmartboxNodeType.HTR_MOD)
     mock_node.boost = node_attributes.get("boost", False)
 
     heater = SmartboxHeater(mock_node, MagicMock())
     heater._status = mock_node.status
+    mock_node.parsed_status = parse_status(mock_node.node_type, mock_node.status)
 
     assert heater.hvac_action == expected_action
+
+
+def test_derived_state_cached_per_version():
+    """Test the values derived from the status are computed once per version."""
+    mock_node = MagicMock()
+    mock_node.node_type = SmartboxNodeType.HTR
+    mock_node.status = {"mode": "manual", "stemp": "20.0", "units": "C"}
+    mock_node.status_version = 1
+    mock_node.away = False
+    mock_node.boost = False
+    parsed_status = PropertyMock(
+        side_effect=lambda: parse_status(mock_node.node_type, mock_node.status)
+    )
+    type(mock_node).parsed_status = parsed_status
+
+    heater = SmartboxHeater(mock_node, MagicMock())
+    heater._status = mock_node.status
+    assert heater.hvac_mode == HVACMode.HEAT
+    assert heater.target_temperature == 20.0
+    assert parsed_status.call_count == 1
+
+    # until the status changes
+    mock_node.status["mode"] = "auto"
+    mock_node.status_version = 2
+    assert heater.hvac_mode == HVACMode.AUTO
+    assert parsed_status.call_count == 2
+
+    assert heater.preset_mode == PRESET_HOME
+    mock_node.away = True
+    mock_node.status_version = 3
+    assert heater.preset_mode == PRESET_AWAY
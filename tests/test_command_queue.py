@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from custom_components.smartbox.command_queue import CommandQueue
+
+
+async def test_command_queue_runs_in_order():
+    queue = CommandQueue("device_1")
+    calls = []
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def command(name: str) -> str:
+        calls.append(f"start {name}")
+        if name == "first":
+            started.set()
+            await release.wait()
+        calls.append(f"end {name}")
+        return name
+
+    first = asyncio.create_task(queue.run(command, "first"))
+    second = asyncio.create_task(queue.run(command, "second"))
+    await started.wait()
+    assert len(queue) == 1
+    release.set()
+
+    assert await first == "first"
+    assert await second == "second"
+    assert calls == ["start first", "end first", "start second", "end second"]
+    assert len(queue) == 0
+    assert queue.processed == 2
+    assert queue.wait_time.count == 2
+
+
+async def test_command_queues_run_in_parallel():
+    queue_1 = CommandQueue("device_1")
+    queue_2 = CommandQueue("device_2")
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def blocking() -> None:
+        started.set()
+        await release.wait()
+
+    async def quick() -> str:
+        return "done"
+
+    blocked = asyncio.create_task(queue_1.run(blocking))
+    await started.wait()
+    # the other device isn't held up by the first one
+    assert await queue_2.run(quick) == "done"
+    release.set()
+    await blocked
+
+
+async def test_command_queue_error():
+    queue = CommandQueue("device_1")
+
+    async def failing() -> None:
+        msg = "boom"
+        raise ValueError(msg)
+
+    async def working() -> int:
+        return 1
+
+    with pytest.raises(ValueError, match="boom"):
+        await queue.run(failing)
+    assert await queue.run(working) == 1
+    assert queue.as_dict()["processed"] == 2
+
+
+async def test_command_queue_cancel():
+    queue = CommandQueue("device_1")
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def blocking() -> None:
+        started.set()
+        await release.wait()
+
+    running = asyncio.create_task(queue.run(blocking))
+    waiting = asyncio.create_task(queue.run(blocking))
+    await started.wait()
+    await queue.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert len(queue) == 0
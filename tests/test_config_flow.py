@@ -2,7 +2,8 @@ from unittest.mock import patch
 
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
-from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.data_entry_flow import FlowResultType, InvalidData
+import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.smartbox import (
@@ -11,6 +12,13 @@ from custom_components.smartbox import (
     SmartboxError,
 )
 from custom_components.smartbox.config_flow import SmartboxConfigFlow
+from custom_components.smartbox.const import (
+    CONF_API_BUDGET,
+    CONF_API_BURST,
+    CONF_API_RATE_LIMIT,
+    CONF_TIMEDELTA_POWER_MAX,
+    CONF_TIMEDELTA_POWER_MIN,
+)
 
 from .const import (
     CONF_PASSWORD,
@@ -66,6 +74,44 @@ async def test_option_flow(hass: HomeAssistant, config_entry) -> None:
         assert config_entry.options[k] == v
 
 
+async def test_option_flow_power_interval_range(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Test the minimum power update delta must not exceed the maximum."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            "history_consumption": "off",
+            CONF_TIMEDELTA_POWER_MIN: 600,
+            CONF_TIMEDELTA_POWER_MAX: 60,
+        },
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_TIMEDELTA_POWER_MIN: "power_interval_range"}
+
+
+@pytest.mark.parametrize(
+    "option",
+    [
+        CONF_API_RATE_LIMIT,
+        CONF_API_BURST,
+        CONF_API_BUDGET,
+        CONF_TIMEDELTA_POWER_MIN,
+        CONF_TIMEDELTA_POWER_MAX,
+    ],
+)
+async def test_option_flow_rejects_zero(
+    hass: HomeAssistant, config_entry, option
+) -> None:
+    """Test the API limits and the power update deltas must be at least 1."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    with pytest.raises(InvalidData):
+        await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={"history_consumption": "off", option: 0}
+        )
+
+
 async def test_step_reauth(hass: HomeAssistant, mock_smartbox, reseller) -> None:
     """Test the reauth flow."""
     entry = MockConfigEntry(
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+from smartbox import SmartboxNodeType
+
+from custom_components.smartbox.energy import (
+    EnergyTotal,
+    consumption_nodes,
+    sum_samples,
+)
+
+
+def _node(node_id, total_energy, node_type=SmartboxNodeType.HTR):
+    node = MagicMock()
+    node.node_id = node_id
+    node.node_type = node_type
+    node.total_energy = total_energy
+    return node
+
+
+def test_consumption_nodes():
+    heater = _node("device_1_1", 100)
+    pmo = _node("device_1_0", 100, SmartboxNodeType.PMO)
+    assert consumption_nodes([pmo, heater]) == [heater]
+
+
+def test_energy_total():
+    node_1 = _node("device_1_1", 100)
+    node_2 = _node("device_1_2", None)
+    node_3 = _node("device_1_3", None)
+    assert EnergyTotal([node_2, node_3]).total is None
+    total = EnergyTotal([node_1, node_2])
+    # the nodes without a counter are left out
+    assert total.total == 100
+
+    node_2.total_energy = "50"
+    assert total.update(node_2)
+    assert total.total == 150
+
+    node_1.total_energy = 120
+    assert total.update(node_1)
+    assert not total.update(node_1)
+    assert total.total == 170
+
+    node_1.total_energy = None
+    assert not total.update(node_1)
+    assert total.total == 170
+
+
+def test_sum_samples():
+    assert sum_samples([]) == []
+    assert sum_samples(
+        [
+            [{"t": 3600, "counter": "10"}, {"t": 7200, "counter": "12"}],
+            [{"t": 7200, "counter": 5}, {"t": 10800, "counter": 6}],
+            [{"t": 0, "counter": 1}, {"t": 7200, "counter": 2}],
+        ]
+    ) == [{"t": 7200, "counter": 19.0}]
+    # a node without samples is left out
+    assert sum_samples([[{"t": 3600, "counter": "10"}], []]) == [
+        {"t": 3600, "counter": 10.0}
+    ]
@@ -0,0 +1,274 @@
+import asyncio
+import csv
+from unittest.mock import MagicMock
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import Context
+from homeassistant.exceptions import HomeAssistantError, Unauthorized
+import pytest
+from smartbox.error import SmartboxError
+
+from custom_components.smartbox.const import (
+    ATTR_FORMAT,
+    ATTR_OVERWRITE,
+    ATTR_START,
+    DOMAIN,
+    EXPORT_DIRECTORY,
+    SERVICE_EXPORT_CONSUMPTION,
+)
+from custom_components.smartbox.export import (
+    EXPORT_CHUNK,
+    EXPORT_CONCURRENCY,
+    ExportFormat,
+    async_export_consumption,
+    consumption_rows,
+    export_chunks,
+    export_path,
+)
+
+from .mocks import get_sensor_entity_id
+
+HOUR = 3600
+NOW = 1739966400
+
+
+def _node(node_id="dev_1", samples=None):
+    node = MagicMock()
+    node.node_id = node_id
+    node.name = f"Node {node_id}"
+    running = 0
+    node.max_running = 0
+
+    async def get_samples(start_time, end_time):
+        nonlocal running
+        running += 1
+        node.max_running = max(node.max_running, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return [
+            sample for sample in samples or [] if start_time <= sample["t"] <= end_time
+        ]
+
+    node.get_samples = MagicMock(side_effect=get_samples)
+    return node
+
+
+def test_export_chunks():
+    assert export_chunks(0, 2 * EXPORT_CHUNK + 10) == [
+        (0, EXPORT_CHUNK - 1),
+        (EXPORT_CHUNK, 2 * EXPORT_CHUNK - 1),
+        (2 * EXPORT_CHUNK, 2 * EXPORT_CHUNK + 10),
+    ]
+
+
+def test_consumption_rows():
+    node = _node()
+    samples = [
+        {"t": NOW + 900, "counter": "5"},
+        {"t": NOW + HOUR, "counter": "10"},
+        {"t": NOW, "counter": "0"},
+        {"t": NOW + 3 * HOUR, "counter": "40"},
+    ]
+    rows, previous = consumption_rows(node, samples, None)
+    assert [(row[2].timestamp(), row[4], row[5]) for row in rows] == [
+        (NOW, 10.0, 10.0),
+        # the hour before is missing
+        (NOW + 2 * HOUR, None, 40.0),
+    ]
+    assert previous == (NOW + 3 * HOUR, 40.0)
+
+    # carried over to the next chunk
+    rows, _ = consumption_rows(node, [{"t": NOW + 4 * HOUR, "counter": 45}], previous)
+    assert [(row[2].timestamp(), row[4]) for row in rows] == [(NOW + 3 * HOUR, 5.0)]
+
+
+async def test_export_consumption(hass, tmp_path):
+    hours = 3 * EXPORT_CHUNK // HOUR
+    nodes = [
+        _node(
+            node_id,
+            [{"t": NOW + h * HOUR, "counter": h * factor} for h in range(hours + 1)],
+        )
+        for node_id, factor in (("dev_1", 1), ("dev_2", 2))
+    ]
+    path = tmp_path / "export.csv"
+    result = await async_export_consumption(
+        hass, nodes, NOW, NOW + hours * HOUR, path=path, file_format=ExportFormat.CSV
+    )
+    assert result["rows"] == 2 * hours
+    assert result["path"] == str(path)
+    assert result["elapsed"] >= 0
+
+    with path.open(encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert len(rows) == 2 * hours
+    # in order, across the chunks
+    assert [row["node_id"] for row in rows] == ["dev_1"] * hours + ["dev_2"] * hours
+    assert {float(row["energy"]) for row in rows[:hours]} == {1.0}
+    assert {float(row["energy"]) for row in rows[hours:]} == {2.0}
+    assert rows[0]["start"] == "2025-02-19T12:00:00+00:00"
+    # a few chunks at a time
+    assert sum(node.get_samples.call_count for node in nodes) == 2 * 4
+    assert max(node.max_running for node in nodes) <= EXPORT_CONCURRENCY
+
+
+async def test_export_consumption_failed(hass, tmp_path):
+    cancelled = 0
+    failed = asyncio.Event()
+
+    async def get_samples(start_time, end_time):
+        nonlocal cancelled
+        if start_time == NOW:
+            msg = "first chunk"
+            raise SmartboxError(msg)
+        if start_time == NOW + EXPORT_CHUNK:
+            failed.set()
+            msg = "second chunk"
+            raise SmartboxError(msg)
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+
+    node = _node()
+    node.get_samples = MagicMock(side_effect=get_samples)
+    path = tmp_path / "export.csv"
+    path.write_text("previous export", encoding="utf-8")
+
+    with pytest.raises(SmartboxError, match="first chunk"):
+        await async_export_consumption(
+            hass,
+            [node],
+            NOW,
+            NOW + 4 * EXPORT_CHUNK,
+            path=path,
+            file_format=ExportFormat.CSV,
+        )
+    # the pending fetches are cancelled and awaited
+    assert failed.is_set()
+    assert cancelled == EXPORT_CONCURRENCY - 2
+    # and the file is only replaced once the export succeeds
+    assert list(tmp_path.iterdir()) == [path]
+    assert path.read_text(encoding="utf-8") == "previous export"
+
+
+async def test_export_consumption_parquet_unavailable(hass, tmp_path):
+    with pytest.raises(HomeAssistantError, match="pyarrow"):
+        await async_export_consumption(
+            hass,
+            [_node()],
+            NOW,
+            NOW + HOUR,
+            path=tmp_path / "export.parquet",
+            file_format=ExportFormat.PARQUET,
+        )
+
+
+async def test_export_path(hass, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    export_dir = tmp_path / EXPORT_DIRECTORY
+    assert export_path(hass, "export.csv", overwrite=False) == export_dir / "export.csv"
+    assert export_dir.is_dir()
+    for filename in (
+        "../configuration.yaml",
+        "../.storage/core.config_entries",
+        str(tmp_path / "secrets.yaml"),
+        ".",
+    ):
+        with pytest.raises(HomeAssistantError):
+            export_path(hass, filename, overwrite=True)
+
+    # an existing file is only replaced on request
+    (export_dir / "export.csv").touch()
+    with pytest.raises(HomeAssistantError, match="overwrite"):
+        export_path(hass, "export.csv", overwrite=False)
+    assert export_path(hass, "export.csv", overwrite=True) == export_dir / "export.csv"
+
+    # or in an allowed external directory
+    (tmp_path / "media").mkdir()
+    hass.config.allowlist_external_dirs = {str(tmp_path / "media")}
+    path = str(tmp_path / "media" / "export.csv")
+    assert export_path(hass, path, overwrite=False) == tmp_path / "media" / "export.csv"
+
+
+async def test_export_consumption_service(
+    hass, mock_smartbox, config_entry, recorder_mock, tmp_path
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    hass.config.config_dir = str(tmp_path)
+
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    mock_smartbox.session.get_node_samples.side_effect = None
+    mock_smartbox.session.get_node_samples.return_value = {
+        "samples": [{"t": NOW + h * HOUR, "counter": h} for h in range(4)]
+    }
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT_CONSUMPTION,
+        {
+            ATTR_ENTITY_ID: get_sensor_entity_id(mock_node, "total_consumption"),
+            ATTR_START: "2025-02-19 12:00:00",
+            "end": "2025-02-19 15:00:00",
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response["rows"] == 3
+    path = tmp_path / EXPORT_DIRECTORY / "smartbox_consumption.csv"
+    assert response["path"] == str(path)
+    assert path.exists()
+
+    # not replaced by default
+    with pytest.raises(HomeAssistantError, match="overwrite"):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT_CONSUMPTION,
+            {ATTR_START: "2025-02-19 12:00:00", "end": "2025-02-19 15:00:00"},
+            blocking=True,
+            return_response=True,
+        )
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT_CONSUMPTION,
+        {
+            ATTR_START: "2025-02-19 12:00:00",
+            "end": "2025-02-19 15:00:00",
+            ATTR_OVERWRITE: True,
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response["path"] == str(path)
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT_CONSUMPTION,
+            {
+                ATTR_START: "2025-02-19 12:00:00",
+                "end": "2025-02-19 11:00:00",
+                ATTR_FORMAT: "csv",
+            },
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_export_consumption_service_admin_only(
+    hass, mock_smartbox, config_entry, recorder_mock, hass_read_only_user
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    with pytest.raises(Unauthorized):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT_CONSUMPTION,
+            {ATTR_START: "2025-02-19 12:00:00", "end": "2025-02-19 15:00:00"},
+            blocking=True,
+            return_response=True,
+            context=Context(user_id=hass_read_only_user.id),
+        )
@@ -1,7 +1,10 @@
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.util import dt as dt_util
 import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
 from custom_components.smartbox import (
     APIUnavailableError,
@@ -11,6 +14,12 @@ from custom_components.smartbox import (
     create_smartbox_session_from_entry,
     update_listener,
 )
+from custom_components.smartbox.const import CONF_STATISTICS_REPAIR
+from custom_components.smartbox.statistics import (
+    REPAIR_DAYS,
+    REPAIR_HOUR,
+    REPAIR_MINUTE,
+)
 
 
 @pytest.mark.asyncio
@@ -106,3 +115,33 @@ async def test_update_listener(hass, config_entry):
     with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
         await update_listener(hass, config_entry)
         mock_reload.assert_called_once_with(config_entry.entry_id)
+
+
+async def test_scheduled_statistics_repair(hass, mock_smartbox, config_entry, freezer):
+    freezer.move_to(
+        datetime(2025, 2, 19, REPAIR_HOUR, 0, tzinfo=dt_util.get_default_time_zone())
+    )
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={**config_entry.options, CONF_STATISTICS_REPAIR: True},
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    repair = AsyncMock(return_value={"gaps": 0, "repaired": 0, "resets": 0})
+    config_entry.runtime_data.statistics_repairs = {"sensor.test": repair}
+
+    freezer.move_to(
+        datetime(
+            2025,
+            2,
+            19,
+            REPAIR_HOUR,
+            REPAIR_MINUTE,
+            1,
+            tzinfo=dt_util.get_default_time_zone(),
+        )
+    )
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    repair.assert_awaited_once_with(REPAIR_DAYS)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
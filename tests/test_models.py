@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 import logging
+import time
 from unittest.mock import AsyncMock, MagicMock, NonCallableMock, patch
 
 from dateutil import tz
@@ -12,12 +13,17 @@ from homeassistant.components.climate import (
     HVACMode,
     UnitOfTemperature,
 )
+from homeassistant.util import dt as dt_util
 import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from smartbox.error import SmartboxError
 
+from custom_components.smartbox.command_queue import CommandQueue
 from custom_components.smartbox.const import (
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    WRITE_CONFIRMATION_TIMEOUT,
     SmartboxNodeType,
 )
 from custom_components.smartbox.models import (
@@ -30,6 +36,7 @@ from custom_components.smartbox.models import (
     set_preset_mode_status_update,
     set_temperature_args,
 )
+from custom_components.smartbox.samples import SAMPLE_CACHE_TTL
 
 from .const import MOCK_SMARTBOX_DEVICE_INFO
 from .test_utils import assert_log_message
@@ -127,6 +134,10 @@ async def test_smartbox_device_node_status_update(hass, caplog):
         mock_node_1.update_status.assert_not_called()
         mock_node_2.update_status.assert_not_called()
 
+        # but the power of the energy monitors is
+        device._node_status_update(SmartboxNodeType.PMO, 3, {"power": 800})
+        mock_node_3.update_status.assert_called_with({"power": 800})
+
         # test unknown node
         mock_node_1.reset_mock()
         mock_node_2.reset_mock()
@@ -187,6 +198,8 @@ async def test_smartbox_node(hass):
     dev_id = "test_device_id_1"
     mock_device = AsyncMock()
     mock_device.dev_id = dev_id
+    mock_device.hass = hass
+    mock_device.command_queue = CommandQueue(dev_id)
     mock_device.away = False
     node_addr = 3
     node_type = SmartboxNodeType.HTR
@@ -218,9 +231,14 @@ async def test_smartbox_node(hass):
     new_status = {"mtemp": "21.6", "stemp": "22.5"}
     node.update_status(new_status)
     assert node.status == new_status
+    assert node.status_version == 1
 
     await node.set_status(stemp=23.5)
+    assert node.status_version == 2
     mock_session.set_node_status.assert_called_with(dev_id, node_info, {"stemp": 23.5})
+    assert len(node.pending_writes) == 1
+    node.update_status({"stemp": "23.5"})
+    assert node.pending_writes == []
 
     assert not node.away
     mock_device.away = True
@@ -233,6 +251,7 @@ async def test_smartbox_node(hass):
     assert not node.window_mode
     node.update_setup({"window_mode_enabled": True})
     assert node.window_mode
+    assert node.status_version == 4
     node.update_setup({})
     with pytest.raises(KeyError):
         node.window_mode
@@ -246,6 +265,82 @@ async def test_smartbox_node(hass):
         node.true_radiant
 
 
+def _optimistic_node(hass, mock_session) -> SmartboxNode:
+    mock_device = AsyncMock()
+    mock_device.dev_id = "test_device_id_1"
+    mock_device.hass = hass
+    mock_device.command_queue = CommandQueue(mock_device.dev_id)
+    node_info = {"addr": 3, "name": "Bathroom Heater", "type": SmartboxNodeType.HTR}
+    return SmartboxNode(
+        mock_device,
+        node_info,
+        mock_session,
+        {"mtemp": "21.4", "stemp": "22.5", "units": "C"},
+        {},
+        [],
+    )
+
+
+async def test_set_status_confirmed(hass):
+    mock_session = AsyncMock()
+    node = _optimistic_node(hass, mock_session)
+
+    await node.set_status(stemp="23.5", units="C")
+    assert node.status["stemp"] == "23.5"
+    assert len(node.pending_writes) == 1
+
+    # an unrelated update doesn't confirm the write
+    node.update_status({"mtemp": "21.5"})
+    assert len(node.pending_writes) == 1
+
+    node.update_status({"stemp": "23.50", "units": "C"})
+    assert node.pending_writes == []
+    assert node.write_confirmation_latency.count == 1
+
+    # nothing is rolled back once confirmed
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=WRITE_CONFIRMATION_TIMEOUT + 1)
+    )
+    await hass.async_block_till_done()
+    assert node.status["stemp"] == "23.50"
+    assert node.write_timeouts == 0
+
+
+async def test_set_status_rollback_on_error(hass):
+    mock_session = AsyncMock()
+    mock_session.set_node_status.side_effect = SmartboxError("boom")
+    node = _optimistic_node(hass, mock_session)
+
+    with pytest.raises(SmartboxError):
+        await node.set_status(stemp="23.5", mode="manual")
+    assert node.status == {"mtemp": "21.4", "stemp": "22.5", "units": "C"}
+    assert node.pending_writes == []
+    assert node.write_failures == 1
+
+
+async def test_set_status_rollback_on_timeout(hass):
+    mock_session = AsyncMock()
+    node = _optimistic_node(hass, mock_session)
+
+    await node.set_status(stemp="23.5", mode="manual")
+    # the device reported another mode in the meantime, keep it
+    node.update_status({"mode": "auto"})
+    assert len(node.pending_writes) == 1
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=WRITE_CONFIRMATION_TIMEOUT + 1)
+    )
+    await hass.async_block_till_done()
+    assert node.status == {
+        "mtemp": "21.4",
+        "stemp": "22.5",
+        "units": "C",
+        "mode": "auto",
+    }
+    assert node.pending_writes == []
+    assert node.write_timeouts == 1
+
+
 def test_get_target_temperature():
     assert get_target_temperature(SmartboxNodeType.HTR, {"stemp": "22.5"}) == 22.5
     assert get_target_temperature(SmartboxNodeType.ACM, {"stemp": "12.6"}) == 12.6
@@ -563,7 +658,7 @@ def test_get_temperature_unit():
     assert "Unknown temp unit K" in exc_info.exconly()
 
 
-async def test_update_samples(hass):
+async def test_update_samples(hass, freezer):
     dev_id = "test_device_id_1"
     mock_device = AsyncMock()
     mock_device.dev_id = dev_id
@@ -592,31 +687,47 @@ async def test_update_samples(hass):
         node_sample,
     )
     assert node.total_energy == 247426
+    now = int(time.time())
     # Test case where get_samples returns less than 2 samples
-    mock_session.get_node_samples.return_value = {"samples": [{"counter": 100}]}
+    mock_session.get_node_samples.return_value = {
+        "samples": [{"t": now - 600, "counter": 100}]
+    }
     await node.update_samples()
     assert node._samples == node_sample
 
     # Test case where get_samples returns 2 or more samples
+    freezer.tick(SAMPLE_CACHE_TTL)
     mock_session.get_node_samples.return_value = {
         "samples": [
-            {"counter": 100},
-            {"counter": 200},
+            {"t": now - 600, "counter": 100},
+            {"t": now - 300, "counter": 200},
         ]
     }
     await node.update_samples()
-    assert node._samples == [{"counter": 100}, {"counter": 200}]
+    assert node._samples == [
+        {"t": now - 600, "counter": 100},
+        {"t": now - 300, "counter": 200},
+    ]
 
     # Test case where get_samples returns more than 2 samples
+    freezer.tick(SAMPLE_CACHE_TTL)
     mock_session.get_node_samples.return_value = {
         "samples": [
-            {"counter": 100},
-            {"counter": 200},
-            {"counter": 300},
+            {"t": now - 600, "counter": 100},
+            {"t": now - 300, "counter": 200},
+            {"t": now, "counter": 300},
         ]
     }
     await node.update_samples()
-    assert node._samples == [{"counter": 200}, {"counter": 300}]
+    assert node._samples == [
+        {"t": now - 300, "counter": 200},
+        {"t": now, "counter": 300},
+    ]
+
+    # served from the sample cache until it expires
+    mock_session.get_node_samples.reset_mock()
+    await node.update_samples()
+    mock_session.get_node_samples.assert_not_called()
     node = SmartboxNode(
         mock_device,
         node_info,
@@ -628,6 +739,41 @@ async def test_update_samples(hass):
     assert node.total_energy is None
 
 
+def test_average_power():
+    mock_device = MagicMock()
+    node_info = {"addr": 1, "name": "Heater", "type": SmartboxNodeType.HTR}
+    node = SmartboxNode(
+        mock_device,
+        node_info,
+        MagicMock(),
+        {},
+        {},
+        [{"t": 1735686000, "counter": "1000"}],
+    )
+    assert node.average_power is None
+    node._samples = [
+        {"t": 1735686000, "counter": "1000"},
+        {"t": 1735689600, "counter": "1750"},
+    ]
+    assert node.average_power == 750
+    node._samples = [
+        {"t": 1735686000, "counter": "1000"},
+        {"t": 1735687800, "counter": "1250"},
+    ]
+    assert node.average_power == 500
+    # counter reset
+    node._samples = [
+        {"t": 1735686000, "counter": "1000"},
+        {"t": 1735689600, "counter": "10"},
+    ]
+    assert node.average_power is None
+    node._samples = [
+        {"t": 1735686000, "counter": "1000"},
+        {"t": 1735686000, "counter": "1000"},
+    ]
+    assert node.average_power is None
+
+
 async def test_update_power(hass):
     dev_id = "test_device_id_1"
     mock_device = AsyncMock()
@@ -708,19 +854,19 @@ async def test_remaining_boost_time(hass):
 
     assert node.boost_end_min == 90
     # Test case when boost is not active
-    node._status["boost"] = False
+    node.update_status({"boost": False})
     assert node.remaining_boost_time == 0
 
     # Test case when boost is active
-    node._status["boost"] = True
-    node._status["boost_end_min"] = 90  # 1 hour 30 minutes from midnight
+    # 1 hour 30 minutes from midnight
+    node.update_status({"boost": True, "boost_end_min": 90})
     today = datetime.now(tz.tzutc()) + timedelta(hours=1)
     boost_end_datetime = today.replace(hour=1, minute=30).astimezone(tz.tzlocal())
     expected_remaining_time = (boost_end_datetime - today).total_seconds()
     assert node.remaining_boost_time == expected_remaining_time
 
     # Test case when boost end time is in the past
-    node._status["boost_end_min"] = 30  # 30 minutes from midnight
+    node.update_status({"boost_end_min": 30})  # 30 minutes from midnight
     boost_end_datetime = today.replace(hour=0, minute=30).astimezone(tz.tzlocal())
     expected_remaining_time = (boost_end_datetime - today).total_seconds()
     assert node.remaining_boost_time == expected_remaining_time
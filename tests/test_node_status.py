@@ -0,0 +1,104 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from smartbox import SmartboxNodeType
+
+from custom_components.smartbox.command_queue import CommandQueue
+from custom_components.smartbox.models import SmartboxNode
+from custom_components.smartbox.node_status import (
+    AccumulatorStatus,
+    HeaterModStatus,
+    HeaterStatus,
+    NodeStatus,
+    PowerMeterStatus,
+    parse_setup,
+    parse_status,
+)
+
+
+def test_parse_status():
+    status = parse_status(
+        SmartboxNodeType.HTR_MOD,
+        {
+            "mtemp": "19.2",
+            "comfort_temp": "20.3",
+            "eco_offset": "4",
+            "selected_temp": "eco",
+            "on": True,
+            "locked": 0,
+            "power": "510",
+            "new_key": "value",
+        },
+    )
+    assert isinstance(status, HeaterModStatus)
+    assert status.mtemp == 19.2
+    assert status.comfort_temp == 20.3
+    assert status.eco_offset == 4.0
+    assert status.selected_temp == "eco"
+    assert status.on is True
+    assert status.locked is False
+    assert status.power == 510.0
+    # missing keys keep their default
+    assert status.stemp is None
+    assert status.boost is False
+    # unknown keys are kept
+    assert status.extra == {"new_key": "value"}
+    with pytest.raises(AttributeError):
+        status.new_key = "value"
+
+
+def test_parse_status_types():
+    status = parse_status(
+        SmartboxNodeType.ACM, {"charging": True, "charge_level": "2", "mtemp": ""}
+    )
+    assert isinstance(status, AccumulatorStatus)
+    assert status.charge_level == 2
+    # a value that failed to parse is kept as received
+    assert status.mtemp is None
+    assert status.extra == {"mtemp": ""}
+
+    assert isinstance(parse_status(SmartboxNodeType.PMO, {}), PowerMeterStatus)
+    assert parse_status(SmartboxNodeType.PMO, {"power": 1500}).power == 1500.0
+    assert type(parse_status("unknown", {"mtemp": "19"})) is NodeStatus
+
+
+def test_parse_setup():
+    setup = parse_setup(
+        {
+            "window_mode_enabled": False,
+            "factory_options": {"boost_config": 1},
+            "extra_options": {"boost_time": 60},
+            "boost_enabled": False,
+        }
+    )
+    assert setup.window_mode_enabled is False
+    assert setup.true_radiant_enabled is None
+    assert setup.factory_options == {"boost_config": 1}
+    assert setup.extra_options == {"boost_time": 60}
+    assert setup.extra == {"boost_enabled": False}
+
+
+async def test_node_parsed_status(hass):
+    mock_device = AsyncMock()
+    mock_device.dev_id = "test_device_id_1"
+    mock_device.hass = hass
+    mock_device.command_queue = CommandQueue(mock_device.dev_id)
+    node = SmartboxNode(
+        mock_device,
+        {"addr": 3, "name": "Bathroom Heater", "type": SmartboxNodeType.HTR},
+        AsyncMock(),
+        {"mtemp": "21.4", "stemp": "22.5"},
+        {},
+        [],
+    )
+    assert isinstance(node.parsed_status, HeaterStatus)
+    assert node.parsed_status.mtemp == 21.4
+
+    node.update_status({"mtemp": "21.6", "stemp": "22.5"})
+    assert node.parsed_status.mtemp == 21.6
+
+    # parsed again on the optimistic write
+    await node.set_status(stemp=23.5)
+    assert node.parsed_status.stemp == 23.5
+    node.update_status({"stemp": "23.5"})
+    assert node.pending_writes == []
@@ -0,0 +1,137 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from smartbox.error import SmartboxError
+
+from custom_components.smartbox.polling import (
+    POLL_ALIGN,
+    AdaptiveInterval,
+    DevicePoller,
+)
+
+
+async def _tick(hass, freezer, seconds):
+    freezer.tick(seconds)
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+
+async def test_device_poller_shares_requests(hass, freezer):
+    with patch("custom_components.smartbox.polling.random.uniform", return_value=0):
+        poller = DevicePoller(hass, "device_1")
+    fetch_power, fetch_samples = AsyncMock(), AsyncMock()
+    listeners = [MagicMock() for _ in range(3)]
+
+    remove_1 = poller.async_add_listener("power", 60, fetch_power, listeners[0])
+    remove_2 = poller.async_add_listener("power", 30, fetch_power, listeners[1])
+    # due a bit after the other, so run in the same tick
+    remove_3 = poller.async_add_listener(
+        "samples", 30 + POLL_ALIGN - 1, fetch_samples, listeners[2]
+    )
+    assert poller.as_dict()["requests"] == {"power": 30, "samples": 30 + POLL_ALIGN - 1}
+
+    await _tick(hass, freezer, 31)
+    assert fetch_power.await_count == 1
+    assert fetch_samples.await_count == 1
+    assert all(listener.call_count == 1 for listener in listeners)
+    assert poller.as_dict()["ticks"] == 1
+    assert poller.as_dict()["fetches"] == 2
+
+    remove_2()
+    remove_3()
+    await _tick(hass, freezer, 31)
+    assert fetch_power.await_count == 2
+    assert fetch_samples.await_count == 1
+    assert listeners[0].call_count == 2
+    assert listeners[1].call_count == 1
+
+    # no timer left once the last listener is removed
+    remove_1()
+    await _tick(hass, freezer, 120)
+    assert fetch_power.await_count == 2
+    assert poller.as_dict()["requests"] == {}
+
+
+async def test_device_poller_errors(hass, freezer, caplog):
+    with patch("custom_components.smartbox.polling.random.uniform", return_value=0):
+        poller = DevicePoller(hass, "device_1")
+    listener = MagicMock()
+    fetch = AsyncMock(side_effect=[SmartboxError("unavailable"), ValueError, None])
+    poller.async_add_listener("power", 60, fetch, listener)
+
+    await _tick(hass, freezer, 61)
+    assert "Failed to poll power of device_1" in caplog.text
+    await _tick(hass, freezer, 61)
+    assert "Error polling power of device_1" in caplog.text
+    listener.assert_not_called()
+
+    # still polled after the errors
+    await _tick(hass, freezer, 61)
+    listener.assert_called_once()
+    poller.async_shutdown()
+
+
+def test_adaptive_interval():
+    interval = AdaptiveInterval(10, 35)
+    assert interval.interval == 10
+    assert [interval.stable() for _ in range(3)] == [20, 35, 35]
+    assert interval.changed() == 10
+    # the maximum is never below the minimum
+    assert AdaptiveInterval(10, 5).stable() == 10
+
+
+async def test_device_poller_set_interval(hass, freezer):
+    with patch("custom_components.smartbox.polling.random.uniform", return_value=0):
+        poller = DevicePoller(hass, "device_1")
+    fetch = AsyncMock()
+    poller.async_add_listener("power", 60, fetch, MagicMock())
+    await _tick(hass, freezer, 61)
+    assert fetch.await_count == 1
+
+    # from the last run
+    poller.async_set_interval("power", 20)
+    await _tick(hass, freezer, 15)
+    assert fetch.await_count == 1
+    await _tick(hass, freezer, 6)
+    assert fetch.await_count == 2
+    # due already
+    await _tick(hass, freezer, 15)
+    poller.async_set_interval("power", 10)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    await _tick(hass, freezer, 0)
+    assert fetch.await_count == 3
+    poller.async_set_interval("unknown", 10)
+    poller.async_shutdown()
+
+
+async def test_device_poller_skips_fresh_data(hass, freezer):
+    with patch("custom_components.smartbox.polling.random.uniform", return_value=0):
+        poller = DevicePoller(hass, "device_1")
+    updated_at = time.time()
+    listener = MagicMock()
+
+    async def fetch():
+        nonlocal updated_at
+        updated_at = time.time()
+
+    poller.async_add_listener(
+        "power", 60, fetch, listener, updated_at=lambda: updated_at
+    )
+    await _tick(hass, freezer, 61)
+    listener.assert_called_once()
+
+    # updated by the socket 30s after the fetch, so fresh at the next one
+    freezer.tick(30)
+    updated_at = time.time()
+    await _tick(hass, freezer, 31)
+    listener.assert_called_once()
+    assert poller.as_dict()["suppressed"] == {"power": 1}
+    assert poller.as_dict()["fetches"] == 1
+
+    # polled once the data is as old as the interval
+    await _tick(hass, freezer, 30)
+    assert listener.call_count == 2
+    assert poller.as_dict()["fetches"] == 2
+    poller.async_shutdown()
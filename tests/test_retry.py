@@ -0,0 +1,71 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from smartbox.error import APIUnavailableError, InvalidAuthError, SmartboxError
+
+from custom_components.smartbox.retry import (
+    READ_RETRY_POLICIES,
+    RetryPolicy,
+    RetryStats,
+    call_with_retry,
+    retry_policies,
+)
+
+FAST_POLICY = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.02)
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0.5)
+    for attempt, expected in ((1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)):
+        assert expected / 2 <= policy.delay(attempt) <= expected
+    assert RetryPolicy(jitter=0).delay(2) == 2.0
+
+
+def test_retry_policies():
+    assert retry_policies(retry_writes=False) == READ_RETRY_POLICIES
+    assert "set_node_status" not in retry_policies(retry_writes=False)
+    assert "set_node_status" in retry_policies(retry_writes=True)
+    assert "get_node_samples" in retry_policies(retry_writes=True)
+
+
+async def test_call_with_retry_recovers():
+    request = AsyncMock(
+        side_effect=[SmartboxError("boom"), APIUnavailableError("down"), "ok"]
+    )
+    stats = RetryStats()
+    assert await call_with_retry("get_node_status", request, FAST_POLICY, stats) == "ok"
+    assert request.await_count == 3
+    assert stats.as_dict() == {"calls": 1, "retries": 2, "recovered": 1, "failures": 0}
+
+
+async def test_call_with_retry_gives_up():
+    request = AsyncMock(side_effect=SmartboxError("boom"))
+    stats = RetryStats()
+    with pytest.raises(SmartboxError):
+        await call_with_retry("get_node_status", request, FAST_POLICY, stats)
+    assert request.await_count == 3
+    assert stats.as_dict() == {"calls": 1, "retries": 2, "recovered": 0, "failures": 1}
+
+
+async def test_call_with_retry_max_elapsed():
+    request = AsyncMock(side_effect=SmartboxError("boom"))
+    stats = RetryStats()
+    policy = RetryPolicy(max_attempts=10, base_delay=5.0, max_elapsed=1.0)
+    with (
+        patch("custom_components.smartbox.retry.asyncio.sleep") as mock_sleep,
+        pytest.raises(SmartboxError),
+    ):
+        await call_with_retry("get_node_samples", request, policy, stats)
+    # the first backoff would already exceed the budget
+    assert request.await_count == 1
+    mock_sleep.assert_not_called()
+    assert stats.failures == 1
+
+
+async def test_call_with_retry_not_retryable():
+    request = AsyncMock(side_effect=InvalidAuthError("auth"))
+    stats = RetryStats()
+    with pytest.raises(InvalidAuthError):
+        await call_with_retry("get_node_status", request, FAST_POLICY, stats)
+    assert request.await_count == 1
+    assert stats.retries == 0
@@ -0,0 +1,159 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.util import dt as dt_util
+from smartbox import SmartboxNodeType
+
+from custom_components.smartbox.rollups import (
+    ROLLUP_DAYS,
+    ConsumptionRollups,
+    RollupPeriod,
+    period_start,
+)
+
+HOUR = 3600
+
+
+def _node(node_id, dev_id="device_1", node_type=SmartboxNodeType.HTR):
+    node = MagicMock()
+    node.node_id = node_id
+    node.node_type = node_type
+    node.device.dev_id = dev_id
+    node.device.home = {"id": "home_1"}
+    return node
+
+
+def _local(*args):
+    return datetime(*args, tzinfo=dt_util.get_default_time_zone())
+
+
+async def test_consumption_rollups(hass, hass_storage):
+    rollups = ConsumptionRollups(hass, "entry_1")
+    await rollups.async_load()
+    node_1, node_2 = _node("device_1_1"), _node("device_2_1", "device_2")
+    midnight = int(_local(2025, 3, 1).timestamp())
+
+    # the first sample of a node is its starting point
+    assert rollups.add_samples(node_1, [{"t": midnight - 2 * HOUR, "counter": "100"}])
+    assert rollups.value("device_1_1", RollupPeriod.DAY, _local(2025, 2, 28)) == 0
+    assert rollups.start_time(node_1) == midnight - 2 * HOUR
+
+    # the consumption of an hour goes to the day and month it started in
+    rollups.add_samples(
+        node_1,
+        [
+            {"t": midnight - 2 * HOUR, "counter": "100"},
+            {"t": midnight - HOUR, "counter": "110"},
+            {"t": midnight, "counter": "130"},
+            {"t": midnight + HOUR, "counter": "160"},
+        ],
+    )
+    rollups.add_samples(node_2, [{"t": midnight, "counter": 10}])
+    rollups.add_samples(node_2, [{"t": midnight + HOUR, "counter": 15}])
+    # already added, or a reset
+    assert not rollups.add_samples(node_1, [{"t": midnight, "counter": 1000}])
+    rollups.add_samples(node_1, [{"t": midnight + 2 * HOUR, "counter": 0}])
+
+    feb, mar = _local(2025, 2, 28, 12), _local(2025, 3, 1, 12)
+    assert rollups.value("device_1_1", RollupPeriod.DAY, feb) == 30
+    assert rollups.value("device_1_1", RollupPeriod.DAY, mar) == 30
+    assert rollups.value("device_1_1", RollupPeriod.MONTH, feb) == 30
+    assert rollups.value("device_2", RollupPeriod.MONTH, mar) == 5
+    assert rollups.value("home_1", RollupPeriod.DAY, mar) == 35
+    assert rollups.value("home_1", RollupPeriod.MONTH, mar) == 35
+    assert rollups.value("home_2", RollupPeriod.MONTH, mar) == 0
+    assert rollups.as_dict("device_2") == {
+        "device_2": {"day": {"2025-03-01": 5.0}, "month": {"2025-03": 5.0}}
+    }
+
+    # persisted across restarts
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    restored = ConsumptionRollups(hass, "entry_1")
+    await restored.async_load()
+    assert restored.as_dict() == rollups.as_dict()
+    assert restored.start_time(node_1) == midnight + 2 * HOUR
+
+    await restored.async_remove()
+    assert "smartbox.entry_1.rollups" not in hass_storage
+
+
+async def test_consumption_rollups_retention(hass):
+    rollups = ConsumptionRollups(hass, "entry_1")
+    node = _node("device_1_1")
+    start = int(_local(2024, 1, 1, 12).timestamp())
+    rollups.add_samples(
+        node,
+        [
+            {"t": start + day * 24 * HOUR, "counter": day}
+            for day in range(ROLLUP_DAYS + 11)
+        ],
+    )
+    days = rollups.as_dict("device_1_1")["device_1_1"]["day"]
+    assert len(days) == ROLLUP_DAYS
+    # the last day is split across two days, noon to noon
+    assert min(days) == "2024-01-12"
+
+
+async def test_websocket_consumption_rollups(
+    hass, mock_smartbox, config_entry, recorder_mock, hass_ws_client
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    rollups = config_entry.runtime_data.rollups
+    node = config_entry.runtime_data.nodes[0]
+    now = int(dt_util.utcnow().timestamp())
+    rollups.add_samples(
+        node, [{"t": now - HOUR, "counter": 10}, {"t": now, "counter": 12}]
+    )
+
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "smartbox/consumption_rollups", "key": node.node_id}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert list(response["result"]) == [node.node_id]
+    assert sum(response["result"][node.node_id]["day"].values()) == 2
+
+    await client.send_json_auto_id({"type": "smartbox/consumption_rollups"})
+    response = await client.receive_json()
+    assert {node.node_id, node.device.dev_id, node.device.home["id"]} <= set(
+        response["result"]
+    )
+
+
+async def test_consumption_rollups_gap(hass):
+    rollups = ConsumptionRollups(hass, "entry_1")
+    node = _node("device_1_1")
+    midnight = int(_local(2025, 3, 1).timestamp())
+    rollups.add_samples(node, [{"t": midnight - 2 * HOUR, "counter": 0}])
+    # a day without samples, its consumption is spread over its hours
+    rollups.add_samples(node, [{"t": midnight + 22 * HOUR, "counter": 240}])
+    assert rollups.value("device_1_1", RollupPeriod.DAY, _local(2025, 2, 28)) == 20
+    assert rollups.value("device_1_1", RollupPeriod.DAY, _local(2025, 3, 1)) == 220
+    assert rollups.value("device_1_1", RollupPeriod.MONTH, _local(2025, 2, 1)) == 20
+
+
+async def test_consumption_rollups_power_monitor(hass):
+    rollups = ConsumptionRollups(hass, "entry_1")
+    heater = _node("device_1_1")
+    pmo = _node("device_1_0", node_type=SmartboxNodeType.PMO)
+    midnight = int(_local(2025, 3, 1).timestamp())
+    for node in (heater, pmo):
+        rollups.add_samples(
+            node,
+            [{"t": midnight, "counter": 0}, {"t": midnight + HOUR, "counter": 10}],
+        )
+    day = _local(2025, 3, 1)
+    assert rollups.value("device_1_0", RollupPeriod.DAY, day) == 10
+    # the power monitor measures the heater, it is not counted twice
+    assert rollups.value("device_1", RollupPeriod.DAY, day) == 10
+    assert rollups.value("home_1", RollupPeriod.DAY, day) == 10
+
+
+def test_period_start():
+    moment = _local(2025, 3, 14, 15, 30)
+    assert period_start(RollupPeriod.DAY, moment) == _local(2025, 3, 14)
+    assert period_start(RollupPeriod.MONTH, moment) == _local(2025, 3, 1)
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+from custom_components.smartbox.samples import (
+    SAMPLE_CACHE_RETENTION,
+    SAMPLE_CACHE_TTL,
+    SAMPLE_SETTLE_TIME,
+    SampleCache,
+    SampleStore,
+)
+
+HOUR = 3600
+
+
+def _samples(start, end):
+    """Return a sample every 15 minutes between two timestamps."""
+    return [{"t": t, "counter": t // 900} for t in range(start, end + 1, 900)]
+
+
+def _fetch():
+    return AsyncMock(side_effect=_samples)
+
+
+async def test_sample_cache_overlapping_ranges(freezer):
+    now = int(time.time()) // HOUR * HOUR + 1800
+    hour = now // HOUR * HOUR
+    fetch = _fetch()
+    cache = SampleCache(fetch)
+
+    # the energy sensor fetches the last 3 hours
+    assert await cache.get_samples(now - 3 * HOUR, now) == _samples(now - 3 * HOUR, now)
+    fetch.assert_awaited_once_with(hour - 3 * HOUR, hour + HOUR - 1)
+
+    # the statistics only fetch the hours not cached yet
+    fetch.reset_mock()
+    assert await cache.get_samples(now - 24 * HOUR, now) == _samples(
+        now - 24 * HOUR, now
+    )
+    fetch.assert_awaited_once_with(hour - 24 * HOUR, hour - 3 * HOUR - 1)
+
+    # then from the cache
+    fetch.reset_mock()
+    await cache.get_samples(now - 12 * HOUR, now - HOUR)
+    fetch.assert_not_awaited()
+    assert cache.as_dict() == {
+        "hours": 25,
+        "samples": 100,
+        "bytes": 100 * 16,
+        "hits": 1,
+        "fetches": 2,
+    }
+
+    # the recent hours expire, the settled ones stay
+    freezer.tick(SAMPLE_CACHE_TTL)
+    fetch.reset_mock()
+    await cache.get_samples(now - 24 * HOUR, now)
+    fetch.assert_awaited_once_with(hour - SAMPLE_SETTLE_TIME, hour + HOUR - 1)
+
+
+async def test_sample_cache_concurrent_requests():
+    now = int(time.time())
+    release = asyncio.Event()
+
+    async def fetch(start, end):
+        await release.wait()
+        return _samples(start, end)
+
+    mock_fetch = AsyncMock(side_effect=fetch)
+    cache = SampleCache(mock_fetch)
+    first = asyncio.create_task(cache.get_samples(now - 3 * HOUR, now))
+    second = asyncio.create_task(cache.get_samples(now - 2 * HOUR, now))
+    await asyncio.sleep(0)
+    release.set()
+    assert (await second) == (await first)[-len(await second) :]
+    assert mock_fetch.await_count == 1
+
+
+async def test_sample_cache_retention(freezer):
+    now = int(time.time())
+    fetch = _fetch()
+    cache = SampleCache(fetch)
+    await cache.get_samples(now - 3 * HOUR, now)
+    freezer.tick(SAMPLE_CACHE_RETENTION + 4 * HOUR)
+    await cache.get_samples(int(time.time()) - HOUR, int(time.time()))
+    assert cache.as_dict()["hours"] == 2
+
+
+async def test_sample_cache_cached_samples(freezer):
+    freezer.move_to("2025-02-19 12:00:00+00:00")
+    now = int(time.time())
+    fetch = _fetch()
+    cache = SampleCache(fetch)
+    assert cache.cached_samples(now - HOUR, now) == []
+    await cache.get_samples(now - 3 * HOUR, now - 1)
+    fetch.reset_mock()
+    # the hours not fetched are left out
+    assert cache.cached_samples(now - HOUR, now + HOUR) == _samples(now - HOUR, now - 1)
+    # never fetched, even once expired
+    freezer.tick(SAMPLE_CACHE_TTL)
+    assert cache.cached_samples(now - HOUR, now) == _samples(now - HOUR, now - 1)
+    fetch.assert_not_awaited()
+    # and within the retention window
+    freezer.tick(SAMPLE_CACHE_RETENTION - HOUR)
+    assert cache.cached_samples(now - 3 * HOUR, now) == _samples(now - HOUR, now - 1)
+
+
+def test_sample_store_range():
+    store = SampleStore()
+    store.replace(0, 10 * HOUR - 1, _samples(0, 10 * HOUR - 1))
+    assert len(store) == 40
+    assert store.range(HOUR, 2 * HOUR) == _samples(HOUR, 2 * HOUR)
+    assert store.range(HOUR + 1, HOUR + 899) == []
+
+
+def test_sample_store_replace():
+    store = SampleStore()
+    store.replace(0, 10 * HOUR - 1, _samples(0, 10 * HOUR - 1))
+    # replace the middle, with a changed counter
+    store.replace(HOUR, 2 * HOUR - 1, [{"t": HOUR, "counter": "42.5"}])
+    assert store.range(0, 2 * HOUR) == [
+        *_samples(0, HOUR - 1),
+        {"t": HOUR, "counter": 42.5},
+        *_samples(2 * HOUR, 2 * HOUR),
+    ]
+    # replace the end, ignoring the samples outside of the range
+    store.replace(9 * HOUR, 11 * HOUR - 1, _samples(8 * HOUR, 11 * HOUR - 1))
+    assert store.range(8 * HOUR, 11 * HOUR) == _samples(8 * HOUR, 11 * HOUR - 1)
+    assert len(store) == 4 + 1 + 7 * 4 + 2 * 4
+
+
+def test_sample_store_trim_keeps_memory_flat():
+    store = SampleStore()
+    store.replace(0, 2 * HOUR - 1, _samples(0, 2 * HOUR - 1))
+    size = store.nbytes
+    # a year of samples through a two hour window
+    for t in range(2 * HOUR, 365 * 24 * HOUR, 900):
+        store.replace(t, t + 899, [{"t": t, "counter": t}])
+        store.trim(t - 2 * HOUR + 1)
+    assert len(store) == 8
+    assert store.range(0, 365 * 24 * HOUR)[0]["t"] == 365 * 24 * HOUR - 2 * HOUR
+    assert store.nbytes <= 4 * size
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.smartbox.scheduler import (
+    ApiPriority,
+    RequestBudget,
+    RequestBudgets,
+    RequestScheduler,
+    api_priority,
+    current_api_priority,
+)
+
+
+def test_api_priority_context():
+    assert current_api_priority() == ApiPriority.POLLING
+    with api_priority(ApiPriority.BACKFILL):
+        assert current_api_priority() == ApiPriority.BACKFILL
+        with api_priority(ApiPriority.RESYNC):
+            assert current_api_priority() == ApiPriority.RESYNC
+        assert current_api_priority() == ApiPriority.BACKFILL
+    assert current_api_priority() == ApiPriority.POLLING
+
+
+async def test_scheduler_burst():
+    scheduler = RequestScheduler(rate=60, burst=3)
+    for _ in range(3):
+        await scheduler.acquire(ApiPriority.POLLING)
+    assert scheduler.granted[ApiPriority.POLLING] == 3
+    assert scheduler.waiting == 0
+
+
+async def test_scheduler_priority():
+    # one token every 100ms
+    scheduler = RequestScheduler(rate=600, burst=1)
+    await scheduler.acquire(ApiPriority.POLLING)
+
+    order = []
+
+    async def request(priority: ApiPriority, name: str) -> None:
+        await scheduler.acquire(priority)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(request(ApiPriority.BACKFILL, "backfill")),
+        asyncio.create_task(request(ApiPriority.POLLING, "polling")),
+        asyncio.create_task(request(ApiPriority.USER, "user")),
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.waiting == 3
+    await asyncio.gather(*tasks)
+
+    assert order == ["user", "polling", "backfill"]
+    assert scheduler.granted[ApiPriority.USER] == 1
+    assert scheduler.as_dict()["granted"]["backfill"] == 1
+    assert scheduler.wait_time[ApiPriority.BACKFILL].last >= 0.2
+
+
+async def test_scheduler_cancelled_request():
+    scheduler = RequestScheduler(rate=600, burst=1)
+    await scheduler.acquire(ApiPriority.POLLING)
+    waiting = asyncio.create_task(scheduler.acquire(ApiPriority.BACKFILL))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.waiting == 0
+    # the next request gets the refilled token
+    await scheduler.acquire(ApiPriority.USER)
+    assert scheduler.granted[ApiPriority.USER] == 1
+
+
+async def test_scheduler_cancel():
+    scheduler = RequestScheduler(rate=600, burst=1)
+    await scheduler.acquire(ApiPriority.POLLING)
+    waiting = asyncio.create_task(scheduler.acquire(ApiPriority.POLLING))
+    await asyncio.sleep(0)
+    scheduler.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.waiting == 0
+
+
+@patch("custom_components.smartbox.scheduler.BUDGET_WINDOW", 0.2)
+async def test_budget_rate():
+    budget = RequestBudget(rate=2)
+    await budget.acquire("entry_1", ApiPriority.POLLING)
+    await budget.acquire("entry_2", ApiPriority.POLLING)
+    assert budget.used() == 2
+    assert budget.used("entry_1") == 1
+
+    started_at = time.monotonic()
+    await budget.acquire("entry_1", ApiPriority.POLLING)
+    # waited for the first request to leave the window
+    assert time.monotonic() - started_at >= 0.15
+    assert budget.as_dict()["granted"] == {"entry_1": 2, "entry_2": 1}
+
+
+@patch("custom_components.smartbox.scheduler.BUDGET_WINDOW", 0.05)
+async def test_budget_fair_share():
+    budget = RequestBudget(rate=1)
+    await budget.acquire("busy", ApiPriority.POLLING)
+    order = []
+
+    async def request(client: str, priority: ApiPriority) -> None:
+        await budget.acquire(client, priority)
+        order.append((client, priority))
+
+    tasks = [
+        asyncio.create_task(request("busy", ApiPriority.POLLING)) for _ in range(3)
+    ]
+    tasks.append(asyncio.create_task(request("idle", ApiPriority.BACKFILL)))
+    tasks.append(asyncio.create_task(request("idle", ApiPriority.POLLING)))
+    await asyncio.sleep(0)
+    assert budget.waiting == 5
+    await asyncio.gather(*tasks)
+
+    # by priority, then to the entry which sent the fewest requests
+    assert order == [
+        ("idle", ApiPriority.POLLING),
+        ("busy", ApiPriority.POLLING),
+        ("busy", ApiPriority.POLLING),
+        ("busy", ApiPriority.POLLING),
+        ("idle", ApiPriority.BACKFILL),
+    ]
+
+
+async def test_budgets_shared_by_reseller():
+    budgets = RequestBudgets()
+    share_1 = budgets.share("reseller_1", "entry_1", 300)
+    share_2 = budgets.share("reseller_1", "entry_2", 120)
+    share_3 = budgets.share("reseller_2", "entry_3", 300)
+    assert share_1.budget is share_2.budget
+    assert share_1.budget is not share_3.budget
+    # the smallest budget of the entries applies
+    assert share_1.budget.rate == 120
+
+    await share_1.acquire(ApiPriority.USER)
+    await share_2.acquire(ApiPriority.POLLING, 2)
+    assert share_1.used() == 1
+    assert budgets.as_dict()["reseller_1"]["used"] == 3
+
+    budgets.release("entry_2")
+    assert share_1.budget.rate == 300
+    budgets.release("entry_3")
+    budgets.release("entry_3")
+    assert list(budgets.as_dict()) == ["reseller_1"]
+
+
+async def test_budget_cancel():
+    budget = RequestBudget(rate=1)
+    await budget.acquire("entry_1", ApiPriority.POLLING)
+    waiting = [
+        asyncio.create_task(budget.acquire(client, ApiPriority.POLLING))
+        for client in ("entry_1", "entry_2")
+    ]
+    await asyncio.sleep(0)
+    waiting[1].cancel()
+    await asyncio.sleep(0)
+    assert budget.waiting == 1
+    budget.cancel("entry_1")
+    with pytest.raises(asyncio.CancelledError):
+        await waiting[0]
+    assert budget.waiting == 0
+
+
+async def test_budget_without_rate():
+    budget = RequestBudget(rate=0)
+    request = asyncio.create_task(budget.acquire("entry_1", ApiPriority.POLLING))
+    await asyncio.sleep(0)
+    # waits for a budget rather than failing
+    assert budget.waiting == 1
+    budget.set_rate(1)
+    await request
+    assert budget.used() == 1
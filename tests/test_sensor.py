@@ -1,26 +1,50 @@
+import asyncio
 from datetime import datetime
 import logging
 import time
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from dateutil import tz
-from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.components.sensor import (
+    ATTR_LAST_RESET,
+    ATTR_STATE_CLASS,
+    DOMAIN as SENSOR_DOMAIN,
+    SensorStateClass,
+)
 from homeassistant.const import ATTR_FRIENDLY_NAME, ATTR_LOCKED, STATE_UNAVAILABLE
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_component import async_update_entity
+from homeassistant.util import dt as dt_util
 import pytest
-from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+from smartbox.error import SmartboxError
 
+from custom_components.smartbox.backfill import history_chunks
 from custom_components.smartbox.const import (
+    CONF_ADAPTIVE_POWER,
+    CONF_API_BUDGET,
+    CONF_API_NAME,
+    CONF_AVERAGE_POWER_DUTY,
     CONF_HISTORY_CONSUMPTION,
+    CONF_TIMEDELTA_POWER_MAX,
+    CONF_TIMEDELTA_POWER_MIN,
     DOMAIN,
     HistoryConsumptionStatus,
     SmartboxNodeType,
 )
+from custom_components.smartbox.node_status import parse_status
+from custom_components.smartbox.rollups import RollupPeriod, period_start
 from custom_components.smartbox.sensor import (
+    BUDGET_SENSOR_INTERVAL,
+    AveragePowerSensor,
     BoostEndTimeSensor,
-    PowerSensor,
+    DeviceTotalConsumptionSensor,
     TotalConsumptionSensor,
 )
+from custom_components.smartbox.statistics import IMPORT_OVERLAP
 
 from .mocks import (
     active_or_charging_update,
@@ -47,7 +71,7 @@ def _check_temp_state(hass, mock_node_status, state):
 async def test_basic_temp(hass, mock_smartbox, config_entry, recorder_mock):
     assert await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
-    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 30
+    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 66
     entries = hass.config_entries.async_entries(DOMAIN)
     assert len(entries) == 1
 
@@ -114,7 +138,7 @@ async def test_basic_temp(hass, mock_smartbox, config_entry, recorder_mock):
 async def test_basic_power(hass, mock_smartbox, config_entry, recorder_mock):
     assert await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
-    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 30
+    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 66
     entries = hass.config_entries.async_entries(DOMAIN)
     assert len(entries) == 1
 
@@ -195,7 +219,7 @@ async def test_unavailable(hass, mock_smartbox_unavailable, recorder_mock):
     entry.add_to_hass(hass)
     assert await hass.config_entries.async_setup(entry.entry_id)
     await hass.async_block_till_done()
-    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 23
+    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 59
     entries = hass.config_entries.async_entries(DOMAIN)
     assert len(entries) == 1
 
@@ -223,7 +247,7 @@ async def test_unavailable(hass, mock_smartbox_unavailable, recorder_mock):
 async def test_basic_charge_level(hass, mock_smartbox, recorder_mock, config_entry):
     assert await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
-    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 30
+    assert len(hass.states.async_entity_ids(SENSOR_DOMAIN)) == 66
     entries = hass.config_entries.async_entries(DOMAIN)
     assert len(entries) == 1
 
@@ -298,29 +322,218 @@ async def test_basic_charge_level(hass, mock_smartbox, recorder_mock, config_ent
             assert state.state != STATE_UNAVAILABLE
 
 
+async def test_backfill_in_background(hass, mock_smartbox, config_entry, recorder_mock):
+    # the history download never completes
+    history_requested = asyncio.Event()
+
+    async def get_node_samples(dev_id, node, start_time, end_time):
+        if end_time - start_time > 24 * 3600:
+            history_requested.set()
+            await asyncio.Event().wait()
+        return {"samples": []}
+
+    mock_smartbox.session.get_node_samples = get_node_samples
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    await asyncio.wait_for(history_requested.wait(), 5)
+
+    # the energy sensors are available without waiting for the history
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    state = hass.states.get(get_sensor_entity_id(mock_node, "total_consumption"))
+    assert state.state != STATE_UNAVAILABLE
+    assert config_entry.options.get(CONF_HISTORY_CONSUMPTION) is None
+
+    # and the download is cancelled with the entry
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_energy_totals_samples(hass, mock_smartbox, config_entry):
+    now = int(time.time()) // 3600 * 3600
+    nodes = [MagicMock(node_id=f"node_{i}", total_energy=None) for i in range(2)]
+    for i, node in enumerate(nodes):
+        node.get_samples = AsyncMock()
+        node.sample_cache.get_samples = AsyncMock()
+        node.sample_cache.cached_samples.return_value = [
+            {"t": now - 3600, "counter": 100 * i},
+            {"t": now, "counter": 100 * i + 10},
+        ]
+    device = MagicMock()
+    device.get_nodes.return_value = nodes
+    sensor = DeviceTotalConsumptionSensor(device, config_entry)
+
+    # the statistics of the totals are imported from the cached samples only
+    assert await sensor._async_get_samples(now - 3600, now + 3600) == [
+        {"t": now - 3600, "counter": 100.0},
+        {"t": now, "counter": 120.0},
+    ]
+    for node in nodes:
+        node.sample_cache.cached_samples.assert_called_once_with(now - 3600, now + 3600)
+        node.sample_cache.get_samples.assert_not_awaited()
+        node.get_samples.assert_not_awaited()
+
+
+async def test_energy_totals(hass, mock_smartbox, config_entry, recorder_mock, freezer):
+    freezer.move_to("2025-02-19 12:00:00+00:00")
+    counters = {}
+
+    async def get_node_samples(dev_id, node, start_time, end_time):
+        counter = counters.get((dev_id, node["addr"]), 100)
+        return {"samples": [{"t": end_time - 3600, "counter": counter}] * 2}
+
+    mock_smartbox.session.get_node_samples = get_node_samples
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    device_entity_id = registry.async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "device_1_0_device_total_consumption"
+    )
+    home_entity_id = registry.async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "home_1_home_total_consumption"
+    )
+    # the power monitor measures the heaters, it is left out of the totals
+    nodes = [
+        node
+        for node in config_entry.runtime_data.nodes
+        if node.node_type != SmartboxNodeType.PMO
+    ]
+    device_1_nodes = [node for node in nodes if node.device.dev_id == "device_1"]
+    assert float(hass.states.get(device_entity_id).state) == 100 * len(device_1_nodes)
+    assert float(hass.states.get(home_entity_id).state) == 100 * len(nodes)
+
+    # a node update only changes the totals it is part of
+    counters["device_1", 0] = 150
+    # the next hour, for a new sample
+    freezer.tick(3600)
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    await async_update_entity(
+        hass, get_sensor_entity_id(mock_node, "total_consumption")
+    )
+    await hass.async_block_till_done()
+    assert float(hass.states.get(device_entity_id).state) == (
+        100 * len(device_1_nodes) + 50
+    )
+    assert float(hass.states.get(home_entity_id).state) == 100 * len(nodes) + 50
+
+    # and is added to the consumption of the day and month
+    for unique_id in (
+        "device_1_0_daily_consumption",
+        "device_1_0_monthly_consumption",
+        "device_1_0_device_daily_consumption",
+        "home_1_home_monthly_consumption",
+    ):
+        entity_id = registry.async_get_entity_id(SENSOR_DOMAIN, DOMAIN, unique_id)
+        state = hass.states.get(entity_id)
+        assert float(state.state) == 50
+        # a meter reset at the start of each day or month
+        assert state.attributes[ATTR_STATE_CLASS] == SensorStateClass.TOTAL
+        assert dt_util.parse_datetime(state.attributes[ATTR_LAST_RESET]) == (
+            period_start(
+                RollupPeriod.MONTH if "monthly" in unique_id else RollupPeriod.DAY,
+                dt_util.now(),
+            )
+        )
+    entity_id = registry.async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "device_2_0_device_daily_consumption"
+    )
+    assert float(hass.states.get(entity_id).state) == 0
+
+
+async def test_energy_totals_silent_node(
+    hass, mock_smartbox, config_entry, recorder_mock, freezer
+):
+    freezer.move_to("2025-02-19 12:00:00+00:00")
+
+    async def get_node_samples(dev_id, node, start_time, end_time):
+        # the first heater of the first device never reports
+        if (dev_id, node["addr"]) == ("device_1", 0):
+            return {"samples": []}
+        return {"samples": [{"t": end_time - 3600, "counter": 100}] * 2}
+
+    mock_smartbox.session.get_node_samples = get_node_samples
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    registry = er.async_get(hass)
+    device_entity_id = registry.async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "device_1_0_device_total_consumption"
+    )
+    home_entity_id = registry.async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "home_1_home_total_consumption"
+    )
+    heaters = [
+        node
+        for node in config_entry.runtime_data.nodes
+        if node.node_type != SmartboxNodeType.PMO
+    ]
+    # the totals of the other heaters are known
+    assert float(hass.states.get(device_entity_id).state) == 100
+    assert float(hass.states.get(home_entity_id).state) == 100 * (len(heaters) - 1)
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
 @pytest.mark.asyncio
 async def test_update_statistics_start(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
     mock_node = AsyncMock()
+    mock_node.node_id = "device_3_1"
+    mock_node.device.dev_id = "device_3"
     mock_node.get_samples.return_value = [{"t": 1739966400, "counter": 100}]
     sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
-    hass.config_entries.async_update_entry(
-        entry=config_entry,
-        options={
-            **config_entry.options,
-            CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.START,
-        },
-    )
+    chunks = history_chunks(dt_util.utcnow())
+    # one chunk per month
+    assert 36 <= len(chunks) <= 37
+
+    with (
+        patch.object(hass.config_entries, "async_reload"),
+        patch.object(config_entry.runtime_data, "nodes", [mock_node]),
+    ):
+        hass.config_entries.async_update_entry(
+            entry=config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.START,
+            },
+        )
+        await _test_update_statistics_start(hass, config_entry, sensor, chunks)
+
 
+async def _test_update_statistics_start(hass, config_entry, sensor, chunks):
+    mock_node = sensor._node
+    coordinator = config_entry.runtime_data.statistics_coordinator
     with (
         patch.object(hass.config_entries, "async_update_entry") as mock_update_entry,
         patch(
-            "custom_components.smartbox.sensor.async_import_statistics"
+            "custom_components.smartbox.statistics.async_import_statistics"
         ) as mock_import_statistics,
     ):
+        # the backfill stops on an error
+        mock_node.get_samples.side_effect = [
+            SmartboxError("boom"),
+            *([[{"t": 1739966400, "counter": 100}]] * (len(chunks) - 1)),
+        ]
+        with pytest.raises(SmartboxError):
+            await sensor.update_statistics()
+        coordinator.async_flush()
+        assert mock_node.get_samples.call_count == len(chunks)
+        # the chunks are merged into a single import
+        mock_import_statistics.assert_called_once()
+        assert config_entry.runtime_data.backfill.progress([mock_node]) < 100
+        mock_update_entry.assert_not_called()
+
+        # and resumes with the missing chunk
+        mock_node.get_samples.reset_mock(side_effect=True)
         await sensor.update_statistics()
-
-        assert mock_node.get_samples.call_count == 3
+        coordinator.async_flush()
+        mock_node.get_samples.assert_called_once_with(*chunks[0])
         mock_update_entry.assert_called_once_with(
             entry=config_entry,
             options={
@@ -336,76 +549,227 @@ async def test_update_statistics_auto(hass, mock_smartbox, config_entry):
     await hass.async_block_till_done()
 
     mock_node = AsyncMock()
-    mock_node.get_samples.return_value = [{"t": 1739966400, "counter": 100}]
+    mock_node.sample_cache.get_samples.return_value = [
+        {"t": 1739966400, "counter": 100}
+    ]
     sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
-    hass.config_entries.async_update_entry(
-        entry=config_entry,
-        options={
-            **config_entry.options,
-            CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
-        },
-    )
+    with patch.object(hass.config_entries, "async_reload"):
+        hass.config_entries.async_update_entry(
+            entry=config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
+            },
+        )
+    coordinator = config_entry.runtime_data.statistics_coordinator
 
     with patch(
-        "custom_components.smartbox.sensor.async_import_statistics"
+        "custom_components.smartbox.statistics.async_import_statistics"
     ) as mock_import_statistics:
         await sensor.update_statistics()
+        coordinator.async_flush()
 
-        mock_node.get_samples.assert_called_once()
+        mock_node.sample_cache.get_samples.assert_called_once()
         assert mock_import_statistics.called
 
 
-@pytest.mark.asyncio
-async def test_update_statistics_off(hass, mock_smartbox, config_entry):
+async def test_update_statistics_incremental(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    with patch.object(hass.config_entries, "async_reload"):
+        hass.config_entries.async_update_entry(
+            entry=config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
+            },
+        )
+    coordinator = config_entry.runtime_data.statistics_coordinator
+
+    now = int(time.time()) // 3600 * 3600
+    day = [{"t": now - h * 3600, "counter": 1000 - h} for h in range(24, 0, -1)]
     mock_node = AsyncMock()
-    mock_node.get_samples = AsyncMock(return_value=[{"t": time.time(), "counter": 100}])
+    mock_node.sample_cache.get_samples.return_value = day
     sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
-    hass.config_entries.async_update_entry(
-        entry=config_entry,
-        options={
-            **config_entry.options,
-            CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.OFF,
-        },
-    )
+    sensor.entity_id = "sensor.test_total_consumption"
 
     with patch(
-        "custom_components.smartbox.sensor.async_import_statistics"
+        "custom_components.smartbox.statistics.async_import_statistics"
     ) as mock_import_statistics:
         await sensor.update_statistics()
+        coordinator.async_flush()
+        assert len(mock_import_statistics.call_args.args[2]) == 24
+
+        # the next update only fetches and imports the new hour
+        mock_import_statistics.reset_mock()
+        mock_node.sample_cache.get_samples.reset_mock()
+        mock_node.sample_cache.get_samples.return_value = [
+            *day[-2:],
+            {"t": now, "counter": 1000},
+        ]
+        await sensor.update_statistics()
+        coordinator.async_flush()
+        assert (
+            mock_node.sample_cache.get_samples.call_args.args[0]
+            == now - 3600 - IMPORT_OVERLAP
+        )
+        statistics = mock_import_statistics.call_args.args[2]
+        assert [s["sum"] for s in statistics] == [1000.0]
+
+        # a corrected sample is imported again
+        mock_import_statistics.reset_mock()
+        mock_node.sample_cache.get_samples.return_value = [
+            day[-1],
+            {"t": now, "counter": 1001},
+        ]
+        await sensor.update_statistics()
+        coordinator.async_flush()
+        statistics = mock_import_statistics.call_args.args[2]
+        assert [s["sum"] for s in statistics] == [1001.0]
 
+        # nothing new
+        mock_import_statistics.reset_mock()
+        await sensor.update_statistics()
+        coordinator.async_flush()
         mock_import_statistics.assert_not_called()
 
 
 @pytest.mark.asyncio
-async def test_async_update_pmo(hass, mock_smartbox, config_entry):
+async def test_update_statistics_off(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
     mock_node = AsyncMock()
-    mock_node.node_type = SmartboxNodeType.PMO
-    mock_node.update_power = AsyncMock()
-    sensor = PowerSensor(mock_node, config_entry)
+    mock_node.get_samples = AsyncMock(return_value=[{"t": time.time(), "counter": 100}])
+    sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
+    with patch.object(hass.config_entries, "async_reload"):
+        hass.config_entries.async_update_entry(
+            entry=config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.OFF,
+            },
+        )
+    coordinator = config_entry.runtime_data.statistics_coordinator
+
+    with patch(
+        "custom_components.smartbox.statistics.async_import_statistics"
+    ) as mock_import_statistics:
+        await sensor.update_statistics()
+        coordinator.async_flush()
+
+        mock_import_statistics.assert_not_called()
+
 
-    with patch.object(sensor, "async_write_ha_state") as mock_write_ha_state:
-        await sensor._async_update_pmo(None)
+async def test_pmo_power_polled_by_device(
+    hass, mock_smartbox, config_entry, recorder_mock
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
 
-        mock_node.update_power.assert_called_once()
-        mock_write_ha_state.assert_called_once()
+    for device in config_entry.runtime_data.devices:
+        requests = device.poller.as_dict()["requests"]
+        for node in config_entry.runtime_data.nodes:
+            if node.device is not device:
+                continue
+            # the power of PMO nodes only, with the samples of all nodes
+            assert (f"{node.node_id}_power" in requests) == (
+                node.node_type == SmartboxNodeType.PMO
+            )
+            assert f"{node.node_id}_samples" in requests
 
 
-@pytest.mark.asyncio
-async def test_async_update_pmo_non_pmo_node(hass, mock_smartbox, config_entry):
+async def test_samples_polled_by_device(
+    hass, mock_smartbox, config_entry, recorder_mock, freezer
+):
+    freezer.move_to("2025-02-19 12:05:00+00:00")
+    counters = {}
+
+    async def get_node_samples(dev_id, node, start_time, end_time):
+        counter = counters.get((dev_id, node["addr"]), 100)
+        # hourly samples of the last hours only, not of the whole history
+        first = -(-max(start_time, end_time - 6 * 3600) // 3600) * 3600
+        return {
+            "samples": [
+                {"t": t, "counter": counter} for t in range(first, end_time + 1, 3600)
+            ]
+        }
+
+    mock_smartbox.session.get_node_samples = get_node_samples
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    entity_id = get_sensor_entity_id(mock_node, "total_consumption")
+    device_entity_id = er.async_get(hass).async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, "device_1_0_device_total_consumption"
+    )
+    total = float(hass.states.get(device_entity_id).state)
+
+    # the node fetches its samples, and the sensor updates what depends on them
+    counters["device_1", 0] = 150
+    freezer.tick(3600)
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert float(hass.states.get(entity_id).state) == 150
+    assert float(hass.states.get(device_entity_id).state) == total + 50
+
+
+async def test_repair_statistics(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.statistics_coordinator
+
+    now = int(time.time()) // 3600 * 3600
+    start = now - 24 * 3600
+    counters = {start + h * 3600: 1000 + h for h in range(25)}
+    # a reset of the node in the hour before last
+    counters[now] = 0
     mock_node = AsyncMock()
-    mock_node.node_type = SmartboxNodeType.HTR
-    mock_node.update_power = AsyncMock()
-    sensor = PowerSensor(mock_node, config_entry)
+    mock_node.get_samples.side_effect = lambda start_time, end_time: [
+        {"t": t, "counter": counter}
+        for t, counter in counters.items()
+        if start_time <= t <= end_time
+    ]
+    sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
+    sensor.entity_id = "sensor.test_total_consumption"
+    # statistics start an hour before their sample, the fifth one is missing
+    recorded = [
+        {"start": t - 3600, "sum": counter, "state": counter}
+        for t, counter in counters.items()
+        if t not in {start, start + 5 * 3600}
+    ]
 
-    with patch.object(sensor, "async_write_ha_state") as mock_write_ha_state:
-        await sensor._async_update_pmo(None)
-
-        mock_node.update_power.assert_not_called()
-        mock_write_ha_state.assert_not_called()
+    with (
+        patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance,
+        patch(
+            "custom_components.smartbox.statistics.async_import_statistics"
+        ) as mock_import_statistics,
+    ):
+        mock_get_instance.return_value.async_add_executor_job = AsyncMock(
+            return_value={sensor.entity_id: recorded}
+        )
+        assert await sensor.async_repair_statistics(1) == {
+            "gaps": 2,
+            "repaired": 1,
+            "resets": 1,
+        }
+        coordinator.async_flush()
+
+    # only the hours around the gaps are fetched
+    assert [call.args for call in mock_node.get_samples.await_args_list] == [
+        (start + 3 * 3600, start + 7 * 3600),
+        (now - 2 * 3600, now + 3600),
+    ]
+    # and only the missing hour is imported
+    statistics = mock_import_statistics.call_args.args[2]
+    assert [(s["start"].timestamp(), s["sum"]) for s in statistics] == [
+        (start + 4 * 3600, 1005.0)
+    ]
 
 
 @pytest.mark.asyncio
@@ -480,6 +844,72 @@ async def test_adjust_short_term_statistics_no_adjustment(
         mock_instance.async_adjust_statistics.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_adjust_short_term_statistics_cached(hass, mock_smartbox, config_entry):
+    mock_node = AsyncMock()
+    mock_node.total_energy = None
+    sensor = TotalConsumptionSensor(mock_node, config_entry)
+    sensor.hass = hass
+    sensor.entity_id = "sensor.test_total_consumption"
+    sensor.native_unit_of_measurement = "kWh"
+
+    last_stat = {sensor.entity_id: [{"start": 1739966400, "sum": 50, "state": 100}]}
+    with patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance:
+        mock_instance = mock_get_instance.return_value
+        mock_instance.async_add_executor_job = AsyncMock(return_value={})
+        # no short term statistics yet
+        await sensor._adjust_short_term_statistics()
+        await sensor._adjust_short_term_statistics()
+        assert mock_instance.async_add_executor_job.await_count == 2
+
+        mock_instance.async_add_executor_job = AsyncMock(return_value=last_stat)
+        await sensor._adjust_short_term_statistics()
+        mock_instance.async_adjust_statistics.assert_called_once()
+
+        # the counter increases, the recorder is not queried again
+        mock_instance.async_add_executor_job.reset_mock()
+        mock_node.total_energy = 120
+        await sensor._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_not_awaited()
+
+        # the counter went up, then was reset above the first cached value
+        mock_node.total_energy = 500
+        await sensor._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_not_awaited()
+        mock_node.total_energy = 200
+        await sensor._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_awaited_once()
+
+        # and below it
+        mock_instance.async_add_executor_job.reset_mock()
+        mock_node.total_energy = 10
+        await sensor._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_awaited_once()
+
+
+async def test_average_power_sensor(hass, mock_smartbox, config_entry):
+    mock_node = AsyncMock()
+    mock_node.node_type = SmartboxNodeType.HTR
+    mock_node.parsed_status = parse_status(
+        SmartboxNodeType.HTR, {"power": "1000", "duty": 30}
+    )
+    mock_node.average_power = 512.345
+    sensor = AveragePowerSensor(mock_node, config_entry)
+    assert sensor.native_value == 512.3
+    mock_node.average_power = None
+    assert sensor.native_value is None
+
+    # estimated from the duty cycle when enabled
+    duty_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=config_entry.data,
+        options={CONF_AVERAGE_POWER_DUTY: True},
+    )
+    assert AveragePowerSensor(mock_node, duty_entry).native_value == 300
+    mock_node.node_type = SmartboxNodeType.ACM
+    assert AveragePowerSensor(mock_node, duty_entry).native_value is None
+
+
 @pytest.mark.asyncio
 async def test_native_value_boost_end_time_sensor(hass, mock_smartbox, config_entry):
     mock_node = AsyncMock()
@@ -502,3 +932,85 @@ async def test_native_value_boost_end_time_sensor(hass, mock_smartbox, config_en
         # Test no boost
         mock_node.boost = False
         assert sensor.native_value is None
+
+
+async def test_adaptive_pmo_power_interval(
+    hass, mock_smartbox, config_entry, recorder_mock, freezer
+):
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            **config_entry.options,
+            CONF_ADAPTIVE_POWER: True,
+            CONF_TIMEDELTA_POWER_MIN: 15,
+            CONF_TIMEDELTA_POWER_MAX: 60,
+        },
+    )
+    with patch("custom_components.smartbox.polling.random.uniform", return_value=0):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+    pmo = next(
+        node
+        for node in config_entry.runtime_data.nodes
+        if node.node_type == SmartboxNodeType.PMO
+    )
+    heater = next(node for node in pmo.device.get_nodes() if node.heater_node)
+    poller = pmo.device.poller
+    powers = iter([100, 100, 100, 300, 300])
+    mock_smartbox.session.get_device_power_limit = AsyncMock(
+        side_effect=lambda *_: next(powers)
+    )
+
+    async def _interval(seconds):
+        freezer.tick(seconds)
+        async_fire_time_changed(hass, dt_util.utcnow())
+        await hass.async_block_till_done(wait_background_tasks=True)
+        return poller.as_dict()["requests"][f"{pmo.node_id}_power"]
+
+    assert poller.as_dict()["requests"][f"{pmo.node_id}_power"] == 15
+    # backs off while the power is stable, up to the maximum
+    assert await _interval(16) == 30
+    assert await _interval(31) == 60
+    assert await _interval(61) == 60
+    # polled quickly again once it changes
+    assert await _interval(61) == 15
+    assert await _interval(16) == 30
+    assert pmo.status["power"] == 300
+
+    # or when a heater switches
+    pmo.device._node_status_update(
+        heater.node_type,
+        heater.addr,
+        {**heater.status, "active": not heater.is_heating(heater.status)},
+    )
+    assert poller.as_dict()["requests"][f"{pmo.node_id}_power"] == 15
+
+
+async def test_api_budget_sensor(
+    hass, mock_smartbox, config_entry, recorder_mock, freezer
+):
+    # away from the statistics updates, which send requests of their own
+    freezer.move_to("2025-02-19 12:05:00+00:00")
+    hass.config_entries.async_update_entry(
+        config_entry, options={**config_entry.options, CONF_API_BUDGET: 1000}
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    budget = config_entry.runtime_data.client.budget
+    assert hass.data[DOMAIN].as_dict()[config_entry.data[CONF_API_NAME]]["used"] > 0
+
+    node = next(iter(config_entry.runtime_data.devices[0].get_nodes()))
+    entity_id = er.async_get(hass).async_get_entity_id(
+        SENSOR_DOMAIN, DOMAIN, f"{node.node_id}_api_budget"
+    )
+    freezer.tick(BUDGET_SENSOR_INTERVAL)
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    state = hass.states.get(entity_id)
+    assert float(state.state) == round(100 * budget.budget.used() / 1000, 1)
+    assert state.attributes["budget"] == 1000
+    assert state.attributes["entry_requests"] == budget.used()
+
+    # released with the entry
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    assert hass.data[DOMAIN].as_dict() == {}
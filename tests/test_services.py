@@ -0,0 +1,228 @@
+from unittest.mock import AsyncMock
+
+from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
+    DOMAIN as CLIMATE_DOMAIN,
+    PRESET_ECO,
+    HVACMode,
+)
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+from smartbox.error import SmartboxError
+
+from custom_components.smartbox.const import (
+    ATTR_DAYS,
+    ATTR_DURATION,
+    DOMAIN,
+    SERVICE_BULK_APPLY,
+    SERVICE_REPAIR_STATISTICS,
+    SERVICE_SET_BOOST_PARAMS,
+    SmartboxNodeType,
+)
+
+from .mocks import (
+    get_boost_duration_entity_id,
+    get_boost_temperature_entity_id,
+    get_climate_entity_id,
+    get_sensor_entity_id,
+)
+
+
+async def test_set_boost_params(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.services.has_service(DOMAIN, SERVICE_SET_BOOST_PARAMS)
+
+    mock_device = (await mock_smartbox.session.get_devices())[1]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[3]
+    set_node_setup = AsyncMock(side_effect=mock_smartbox.session.set_node_setup)
+    mock_smartbox.session.set_node_setup = set_node_setup
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        {
+            ATTR_ENTITY_ID: [
+                get_boost_temperature_entity_id(mock_node),
+                get_boost_duration_entity_id(mock_node),
+            ],
+            ATTR_TEMPERATURE: 25.0,
+            ATTR_DURATION: 120,
+        },
+        blocking=True,
+    )
+    # a single write with both parameters
+    set_node_setup.assert_awaited_once()
+    dev_id, node_info, setup = set_node_setup.await_args.args
+    assert dev_id == mock_device["dev_id"]
+    assert node_info["addr"] == mock_node["addr"]
+    assert setup["extra_options"]["boost_temp"] == "25.0"
+    assert setup["extra_options"]["boost_time"] == 120
+
+    # only the temperature of a node targeted through its temperature entity
+    set_node_setup.reset_mock()
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        {
+            ATTR_ENTITY_ID: get_boost_temperature_entity_id(mock_node),
+            ATTR_TEMPERATURE: 22.0,
+            ATTR_DURATION: 60,
+        },
+        blocking=True,
+    )
+    set_node_setup.assert_awaited_once()
+    setup = set_node_setup.await_args.args[2]
+    assert setup["extra_options"]["boost_temp"] == "22.0"
+    assert setup["extra_options"].get("boost_time") != 60
+
+    # unknown entities are ignored
+    set_node_setup.reset_mock()
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        {ATTR_ENTITY_ID: "number.unknown", ATTR_TEMPERATURE: 22.0},
+        blocking=True,
+    )
+    set_node_setup.assert_not_awaited()
+
+
+async def test_set_boost_params_error(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_device = (await mock_smartbox.session.get_devices())[1]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[3]
+    mock_smartbox.session.set_node_setup = AsyncMock(side_effect=SmartboxError("boom"))
+
+    with pytest.raises(HomeAssistantError, match=mock_node["name"]):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SET_BOOST_PARAMS,
+            {
+                ATTR_ENTITY_ID: get_boost_duration_entity_id(mock_node),
+                ATTR_DURATION: 120,
+            },
+            blocking=True,
+        )
+
+
+async def test_bulk_apply(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_ids = hass.states.async_entity_ids(CLIMATE_DOMAIN)
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_APPLY,
+        {ATTR_ENTITY_ID: entity_ids, ATTR_PRESET_MODE: PRESET_ECO},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["succeeded"] + response["failed"] == len(entity_ids)
+    for mock_device in await mock_smartbox.session.get_devices():
+        for mock_node in await mock_smartbox.session.get_nodes(mock_device["dev_id"]):
+            entity_id = get_climate_entity_id(mock_node)
+            if entity_id not in entity_ids:
+                continue
+            result = response["nodes"][entity_id]
+            # only htr_mod nodes have an eco preset
+            if mock_node["type"] == SmartboxNodeType.HTR_MOD:
+                assert result == {"success": True}
+                status = await mock_smartbox.session.get_node_status(
+                    mock_device["dev_id"], mock_node
+                )
+                assert status["mode"] == "manual"
+                assert status["selected_temp"] == "eco"
+            else:
+                assert result["success"] is False
+                assert "eco" in result["error"]
+
+
+async def test_bulk_apply_status(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    assert mock_node["type"] == SmartboxNodeType.HTR
+    set_node_status = AsyncMock(side_effect=mock_smartbox.session.set_node_status)
+    mock_smartbox.session.set_node_status = set_node_status
+    mock_smartbox.session.set_node_setup = AsyncMock()
+
+    entity_id = get_climate_entity_id(mock_node)
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_APPLY,
+        {
+            ATTR_ENTITY_ID: entity_id,
+            ATTR_HVAC_MODE: HVACMode.HEAT,
+            ATTR_TEMPERATURE: 19.5,
+            "status": {"lock": True},
+            "setup": {"window_mode_enabled": True},
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        "succeeded": 1,
+        "failed": 0,
+        "nodes": {entity_id: {"success": True}},
+    }
+    # a single status write with all the values
+    set_node_status.assert_awaited_once()
+    status = set_node_status.await_args.args[2]
+    assert status["mode"] == "manual"
+    assert status["stemp"] == "19.5"
+    assert status["lock"] is True
+    mock_smartbox.session.set_node_setup.assert_awaited_once()
+    assert mock_smartbox.session.set_node_setup.await_args.args[2] == {
+        "window_mode_enabled": True
+    }
+
+
+async def test_repair_statistics(hass, mock_smartbox, config_entry, recorder_mock):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass.services.has_service(DOMAIN, SERVICE_REPAIR_STATISTICS)
+
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    entity_id = get_sensor_entity_id(mock_node, "total_consumption")
+    repairs = config_entry.runtime_data.statistics_repairs
+    assert entity_id in repairs
+    for other_id in repairs:
+        repairs[other_id] = AsyncMock(
+            return_value={"gaps": 0, "repaired": 0, "resets": 0}
+        )
+    repairs[entity_id] = AsyncMock(return_value={"gaps": 2, "repaired": 3, "resets": 0})
+
+    # the targeted sensors only
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_REPAIR_STATISTICS,
+        {ATTR_ENTITY_ID: entity_id, ATTR_DAYS: 30},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        "sensors": {entity_id: {"success": True, "gaps": 2, "repaired": 3, "resets": 0}}
+    }
+    repairs[entity_id].assert_awaited_once_with(30)
+
+    # all the sensors, over the last week by default
+    msg = "boom"
+    repairs[entity_id].side_effect = SmartboxError(msg)
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_REPAIR_STATISTICS,
+        {},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["sensors"].keys() == repairs.keys()
+    assert response["sensors"][entity_id] == {"success": False, "error": "boom"}
+    for repair in repairs.values():
+        repair.assert_awaited_with(7)
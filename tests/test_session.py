@@ -0,0 +1,70 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from smartbox.error import SmartboxError
+
+from custom_components.smartbox.retry import RetryPolicy
+from custom_components.smartbox.scheduler import (
+    ApiPriority,
+    RequestScheduler,
+    api_priority,
+)
+from custom_components.smartbox.session import SmartboxApiSession, unwrap_session
+
+
+async def test_session_priorities():
+    mock_session = AsyncMock()
+    mock_session.get_node_status.return_value = {"mtemp": "20"}
+    scheduler = RequestScheduler(rate=60, burst=10)
+    session = SmartboxApiSession(mock_session, scheduler)
+
+    with patch.object(scheduler, "acquire", wraps=scheduler.acquire) as mock_acquire:
+        assert await session.get_node_status("device_1", {"addr": 1}) == {"mtemp": "20"}
+        mock_acquire.assert_called_with(ApiPriority.POLLING, 1)
+        mock_session.get_node_status.assert_called_once_with("device_1", {"addr": 1})
+
+        with api_priority(ApiPriority.BACKFILL):
+            await session.get_node_samples("device_1", {"addr": 1}, 0, 3600)
+            mock_acquire.assert_called_with(ApiPriority.BACKFILL, 1)
+            # writes always go first
+            await session.set_node_status("device_1", {"addr": 1}, {"stemp": "20"})
+            mock_acquire.assert_called_with(ApiPriority.USER, 1)
+            await session.set_node_setup("device_1", {"addr": 1}, {})
+            mock_acquire.assert_called_with(ApiPriority.USER, 2)
+
+        # anything else is passed through
+        await session.health_check()
+        assert mock_acquire.call_count == 4
+    assert scheduler.granted[ApiPriority.USER] == 3
+
+
+async def test_session_retries():
+    mock_session = AsyncMock()
+    mock_session.get_node_status.side_effect = [SmartboxError("boom"), {"mtemp": "20"}]
+    mock_session.set_node_status.side_effect = SmartboxError("boom")
+    scheduler = RequestScheduler(rate=60, burst=10)
+    session = SmartboxApiSession(
+        mock_session,
+        scheduler,
+        {"get_node_status": RetryPolicy(base_delay=0.01)},
+    )
+
+    assert await session.get_node_status("device_1", {"addr": 1}) == {"mtemp": "20"}
+    # each attempt is paced
+    assert scheduler.granted[ApiPriority.POLLING] == 2
+    assert session.retry_stats["get_node_status"].recovered == 1
+
+    # no policy for the writes
+    with pytest.raises(SmartboxError):
+        await session.set_node_status("device_1", {"addr": 1}, {"stemp": "20"})
+    assert mock_session.set_node_status.await_count == 1
+    assert session.retry_stats["set_node_status"].failures == 1
+
+
+def test_unwrap_session():
+    mock_session = AsyncMock()
+    session = SmartboxApiSession(mock_session, RequestScheduler(rate=60, burst=10))
+    assert session.session is mock_session
+    assert unwrap_session(session) is mock_session
+    assert unwrap_session(mock_session) is mock_session
+    assert session.reseller is mock_session.reseller
@@ -0,0 +1,261 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from smartbox.error import SmartboxError
+
+from custom_components.smartbox.statistics import (
+    FLUSH_DELAY,
+    IMPORT_OVERLAP,
+    STORAGE_SAVE_DELAY,
+    StatisticsCoordinator,
+    StatisticsState,
+    find_statistics_gaps,
+    samples_to_statistics,
+)
+
+HOUR = 3600
+NOW = 1739966400
+
+
+async def test_statistics_state_new_samples(hass, hass_storage):
+    state = StatisticsState(hass, "entry_1")
+    await state.async_load()
+    samples = [{"t": NOW - h * HOUR, "counter": 100 - h} for h in range(5, -1, -1)]
+    assert state.last_imported("node_1") is None
+    assert state.import_start("node_1", NOW - 24 * HOUR) == NOW - 24 * HOUR
+    assert state.new_samples("node_1", samples) == samples
+
+    state.set_imported("node_1", samples)
+    assert state.last_imported("node_1") == NOW
+    assert state.import_start("node_1", NOW - 24 * HOUR) == NOW - IMPORT_OVERLAP
+    assert state.new_samples("node_1", samples[-3:]) == []
+    new_sample = {"t": NOW + HOUR, "counter": 101}
+    changed_sample = {"t": NOW, "counter": 100.5}
+    assert state.new_samples("node_1", [samples[-2], changed_sample, new_sample]) == [
+        changed_sample,
+        new_sample,
+    ]
+    assert state.as_dict() == {"imported": {"node_1": NOW}, "backfill": {}}
+
+    # persisted across restarts
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=STORAGE_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+    restored = StatisticsState(hass, "entry_1")
+    await restored.async_load()
+    assert restored.last_imported("node_1") == NOW
+    assert restored.new_samples("node_1", samples[-3:]) == []
+
+    await restored.async_remove()
+    assert "smartbox.entry_1.statistics" not in hass_storage
+
+
+def test_samples_to_statistics():
+    samples = [
+        {"t": NOW + HOUR, "counter": "12.5"},
+        {"t": NOW + 1800, "counter": "11"},
+        {"t": NOW, "counter": "10"},
+    ]
+    paris = ZoneInfo("Europe/Paris")
+    statistics = samples_to_statistics(samples, paris)
+    assert statistics == [
+        {
+            "start": datetime.fromtimestamp(NOW - HOUR, paris),
+            "sum": 10.0,
+            "state": 10.0,
+        },
+        {"start": datetime.fromtimestamp(NOW, paris), "sum": 12.5, "state": 12.5},
+    ]
+    assert statistics[0]["start"].tzinfo is paris
+
+    # the local hours start at half past in India
+    statistics = samples_to_statistics(samples, ZoneInfo("Asia/Kolkata"))
+    assert [s["start"].timestamp() for s in statistics] == [NOW + 1800 - HOUR]
+    assert statistics[0]["start"].minute == 0
+
+    # defaults to the time zone of Home Assistant
+    assert samples_to_statistics(samples[:1])[0]["start"].tzinfo is (
+        dt_util.get_default_time_zone()
+    )
+    assert samples_to_statistics([], UTC) == []
+
+
+def _metadata(statistic_id):
+    return {
+        "has_mean": False,
+        "has_sum": True,
+        "source": "recorder",
+        "name": statistic_id,
+        "statistic_id": statistic_id,
+        "unit_of_measurement": "Wh",
+    }
+
+
+def _statistic(t, counter):
+    return {"start": dt_util.utc_from_timestamp(t), "sum": counter, "state": counter}
+
+
+def test_find_statistics_gaps():
+    def _statistic(h, total, state=None):
+        return {
+            "start": NOW + h * HOUR,
+            "sum": total,
+            "state": total if state is None else state,
+        }
+
+    window = (NOW, NOW + 24 * HOUR)
+    assert find_statistics_gaps([_statistic(h, h) for h in range(24)], *window) == []
+    assert find_statistics_gaps(
+        [
+            _statistic(0, 0),
+            # missing hour
+            _statistic(2, 2),
+            _statistic(3, 3),
+            _statistic(4, 4),
+            _statistic(5, 5),
+            # counter going down
+            _statistic(6, 1),
+            _statistic(7, 2),
+            _statistic(8, 3),
+            _statistic(9, 4),
+            _statistic(10, 5),
+            # sum compiled by the recorder from the state
+            _statistic(11, 6, 1006),
+            _statistic(12, None, 7),
+            _statistic(13, 8),
+            _statistic(14, 9),
+            _statistic(15, 10),
+            _statistic(16, 11),
+            _statistic(17, 12),
+        ],
+        NOW,
+        NOW + 18 * HOUR,
+    ) == [
+        (NOW, NOW + 4 * HOUR),
+        (NOW + 5 * HOUR, NOW + 8 * HOUR),
+        (NOW + 10 * HOUR, NOW + 14 * HOUR),
+    ]
+
+
+def test_find_statistics_gaps_leading():
+    def _statistic(h):
+        return {"start": NOW + h * HOUR, "sum": h, "state": h}
+
+    # the first hours of the window are missing
+    assert find_statistics_gaps(
+        [_statistic(h) for h in range(3, 24)], NOW, NOW + 24 * HOUR
+    ) == [(NOW, NOW + 5 * HOUR)]
+    # a window starting within the first hour
+    assert (
+        find_statistics_gaps(
+            [_statistic(h) for h in range(24)], NOW - HOUR / 2, NOW + 24 * HOUR
+        )
+        == []
+    )
+
+
+def test_find_statistics_gaps_trailing():
+    def _statistic(h):
+        return {"start": NOW + h * HOUR, "sum": h, "state": h}
+
+    # the last hours of the window are missing
+    assert find_statistics_gaps(
+        [_statistic(h) for h in range(20)], NOW, NOW + 24 * HOUR
+    ) == [(NOW + 19 * HOUR, NOW + 24 * HOUR)]
+    # the hour in progress is not a gap
+    assert (
+        find_statistics_gaps(
+            [_statistic(h) for h in range(24)], NOW, NOW + 24 * HOUR + HOUR / 2
+        )
+        == []
+    )
+    # no statistics at all
+    assert find_statistics_gaps([], NOW, NOW + 24 * HOUR) == [(NOW, NOW + 24 * HOUR)]
+
+
+async def test_statistics_coordinator_update(hass, freezer):
+    freezer.move_to("2025-02-19 12:14:00+00:00")
+    coordinator = StatisticsCoordinator(hass)
+
+    async def update_1():
+        coordinator.async_queue(_metadata("sensor.energy_1"), [_statistic(NOW, 1)])
+
+    async def update_2():
+        coordinator.async_queue(_metadata("sensor.energy_2"), [_statistic(NOW, 2)])
+
+    async def update_3():
+        msg = "boom"
+        raise SmartboxError(msg)
+
+    remove_1 = coordinator.async_add_update("sensor.energy_1", update_1)
+    coordinator.async_add_update("sensor.energy_2", update_2)
+    coordinator.async_add_update("sensor.energy_3", update_3)
+
+    with patch(
+        "custom_components.smartbox.statistics.async_import_statistics"
+    ) as mock_import_statistics:
+        # all the sensors are updated together, on the quarter hour
+        freezer.move_to("2025-02-19 12:15:01+00:00")
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert [
+            c.args[1]["statistic_id"] for c in mock_import_statistics.mock_calls
+        ] == [
+            "sensor.energy_1",
+            "sensor.energy_2",
+        ]
+        assert coordinator.as_dict() == {
+            "sensors": 3,
+            "pending": 0,
+            "imports": 2,
+            "flushes": 1,
+        }
+
+        remove_1()
+        mock_import_statistics.reset_mock()
+        freezer.move_to("2025-02-19 12:30:01+00:00")
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert mock_import_statistics.call_count == 1
+    coordinator.async_shutdown()
+
+
+async def test_statistics_coordinator_queue(hass):
+    coordinator = StatisticsCoordinator(hass)
+    with patch(
+        "custom_components.smartbox.statistics.async_import_statistics"
+    ) as mock_import_statistics:
+        # the statistics queued are merged, the latest value of an hour wins
+        metadata = _metadata("sensor.energy_1")
+        coordinator.async_queue(metadata, [_statistic(NOW + HOUR, 2)])
+        coordinator.async_queue(
+            metadata, [_statistic(NOW, 1), _statistic(NOW + HOUR, 3)]
+        )
+        assert coordinator.pending == 2
+        mock_import_statistics.assert_not_called()
+
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=FLUSH_DELAY + 1)
+        )
+        await hass.async_block_till_done()
+        mock_import_statistics.assert_called_once_with(
+            hass, metadata, [_statistic(NOW, 1), _statistic(NOW + HOUR, 3)]
+        )
+
+        # too many statistics are imported straight away
+        mock_import_statistics.reset_mock()
+        with patch("custom_components.smartbox.statistics.MAX_PENDING_STATISTICS", 2):
+            coordinator.async_queue(metadata, [_statistic(NOW, 1)])
+            mock_import_statistics.assert_not_called()
+            coordinator.async_queue(metadata, [_statistic(NOW + HOUR, 1)])
+            mock_import_statistics.assert_called_once()
+
+        # and the ones left on shutdown
+        mock_import_statistics.reset_mock()
+        coordinator.async_queue(metadata, [_statistic(NOW, 1)])
+        coordinator.async_shutdown()
+        mock_import_statistics.assert_called_once()